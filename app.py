@@ -1,63 +1,265 @@
-# app.py
-from flask import Flask, render_template
-from flask_socketio import SocketIO
-from threading import Thread
-import webbrowser
-import logging
-import time
-
-import scraping_1sec
-import scraping_1min
-
-# -------------------------------------------------------
-# FLASK + SOCKETIO SETUP
-# -------------------------------------------------------
-app = Flask(__name__, static_folder="static", template_folder="templates")
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode="threading")
-
-logging.basicConfig(level=logging.INFO)
-
-
-# -------------------------------------------------------
-# ROUTES
-# -------------------------------------------------------
-@app.route("/")
-@app.route("/tab1sec")
-def tab1sec():
-    return render_template("Monitor_page.html", active_tab="tab1sec")
-
-@app.route("/tab1min")
-def tab1min():
-    return render_template("Monitor_page.html", active_tab="tab1min")
-
-@app.route("/tab5min")
-def tab5min():
-    return render_template("Monitor_page.html", active_tab="tab5min")
-
-
-# -------------------------------------------------------
-# THREAD STARTERS
-# -------------------------------------------------------
-def start_1sec():
-    scraping_1sec.start_threads(socketio)
-
-def start_1min():
-    scraping_1min.start_threads(socketio)
-
-
-# -------------------------------------------------------
-# MAIN ENTRY
-# -------------------------------------------------------
-if __name__ == "__main__":
-
-    # Start background workers
-    Thread(target=start_1sec, daemon=True).start()
-    Thread(target=start_1min, daemon=True).start()
-
-    # Allow threads to start before UI opens
-    time.sleep(0.5)
-
-    webbrowser.open("http://127.0.0.1:5000/")
-
-    # IMPORTANT — debug=False for stability
-    socketio.run(app, host="0.0.0.0", port=5000, debug=False)
+# app.py
+# - MONITOR_ASYNC_MODE selects the server: "threading" (default, Werkzeug development server) or
+#   "gevent" / "eventlet" for production, an event-loop server with one greenlet per client and
+#   websocket transport. The standard library is monkey-patched before anything else is imported.
+#   The scrapers (Selenium waits, JSON state files, SQLite) would then run as greenlets and block
+#   the event loop, so in these modes the default role runs them in a child process
+#   (run_scrapers.py) publishing to the message queue, and this process serves it like a dashboard;
+#   without MONITOR_MESSAGE_QUEUE the child also hosts a local broker on fanout.DEFAULT_QUEUE
+# - MONITOR_HOST / MONITOR_PORT set the listen address; MONITOR_OPEN_BROWSER=0 skips opening a browser
+#   (the default in gevent / eventlet mode)
+# - MONITOR_MESSAGE_QUEUE (redis://..., unix:///path.sock, tcp://host:port; see fanout.py) publishes the
+#   updates to a message queue; MONITOR_ROLE=dashboard then serves clients without running the scrapers,
+#   subscribed to the queue, so several dashboard processes can fan out one scraper process
+#   (run_scrapers.py, or app.py in the default role "all")
+import os
+import atexit
+
+ASYNC_MODE = os.environ.get("MONITOR_ASYNC_MODE", "threading").strip().lower()
+if ASYNC_MODE == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+elif ASYNC_MODE == "eventlet":
+    import eventlet
+    eventlet.monkey_patch()
+
+from flask import Flask, Response, render_template, jsonify, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
+from threading import Thread
+import webbrowser
+import json
+import logging
+import time
+
+import scraping_1sec
+import scraping_1min
+from probe_metrics import probe_metrics, schedule_metrics
+from politeness import politeness
+from probe_store import probe_store
+import emitter
+import fanout
+
+# -------------------------------------------------------
+# FLASK + SOCKETIO SETUP
+# -------------------------------------------------------
+app = Flask(__name__, static_folder="static", template_folder="templates")
+HOST = os.environ.get("MONITOR_HOST", "0.0.0.0")
+PORT = int(os.environ.get("MONITOR_PORT", "5000"))
+OPEN_BROWSER = os.environ.get("MONITOR_OPEN_BROWSER", "1" if ASYNC_MODE == "threading" else "0") != "0"
+COMPRESSION_THRESHOLD = 1024  # bytes; smaller long-polling responses are sent uncompressed
+MESSAGE_QUEUE = os.environ.get("MONITOR_MESSAGE_QUEUE") or None
+ROLE = os.environ.get("MONITOR_ROLE", "all").strip().lower()  # all | dashboard
+if ROLE not in ("all", "dashboard"):
+    raise SystemExit(f"MONITOR_ROLE must be 'all' or 'dashboard', not {ROLE!r}")
+if ROLE == "dashboard" and not MESSAGE_QUEUE:
+    raise SystemExit("MONITOR_ROLE=dashboard needs MONITOR_MESSAGE_QUEUE")
+# event-loop modes: the scrapers run in a child process (see the header), never as greenlets here
+SCRAPER_PROCESS = ROLE == "all" and ASYNC_MODE != "threading"
+OWN_BROKER = SCRAPER_PROCESS and not MESSAGE_QUEUE
+if OWN_BROKER:
+    MESSAGE_QUEUE = fanout.DEFAULT_QUEUE
+scraper_process = None  # Popen of run_scrapers.py when SCRAPER_PROCESS
+
+# dashboard role (and the child-process setup): the rows come from the queue (and the publisher's
+# snapshot file at start-up)
+mirror = emitter.MirrorEmitter() if ROLE == "dashboard" or SCRAPER_PROCESS else None
+queue_options = {"client_manager": fanout.make_manager(MESSAGE_QUEUE, mirror=mirror)} if MESSAGE_QUEUE else {}
+
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE,
+                    http_compression=True, compression_threshold=COMPRESSION_THRESHOLD, **queue_options)
+
+logging.basicConfig(level=logging.INFO)
+
+READY_TIMEOUT = 30  # seconds to wait for the scrapers before opening the browser anyway
+SLOW_CLIENT_CHECK = 5  # seconds between checks for clients that do not keep up (emitter.evict_slow_clients)
+
+# scraper Worker objects, filled in by the thread starters
+workers = {}
+
+TABS = ("tab1sec", "tab1min", "tab5min")  # dashboard tabs; each is also a Socket.IO room
+client_rooms = {}  # socket sid -> (tab or None, compact wire format?)
+
+
+# -------------------------------------------------------
+# ROUTES
+# -------------------------------------------------------
+@app.route("/")
+@app.route("/tab1sec")
+def tab1sec():
+    return render_template("Monitor_page.html", active_tab="tab1sec")
+
+@app.route("/tab1min")
+def tab1min():
+    return render_template("Monitor_page.html", active_tab="tab1min")
+
+@app.route("/tab5min")
+def tab5min():
+    return render_template("Monitor_page.html", active_tab="tab5min")
+
+@app.route("/ready")
+def ready():
+    if ROLE == "dashboard":
+        return jsonify(ready=True, role=ROLE, seq=emitter.current_seq())
+    if SCRAPER_PROCESS:
+        ok = scraper_process is not None and scraper_process.poll() is None
+        return jsonify(ready=ok, scraper_process=ok, seq=emitter.current_seq()), (200 if ok else 503)
+    status = {name: w.ready.is_set() for name, w in workers.items()}
+    store_ok = probe_store.healthy()
+    ok = bool(status) and all(status.values()) and store_ok
+    return jsonify(ready=ok, workers=status, probe_store=store_ok), (200 if ok else 503)
+
+@app.route("/metrics")
+def metrics():
+    # per-URL, per-phase probe latency histograms, scheduler drift, the emit queue and the probe store (Prometheus text format)
+    body = (probe_metrics.render_prometheus() + schedule_metrics.render_prometheus()
+            + emitter.outbound.render_prometheus() + politeness.render_prometheus()
+            + probe_store.render_prometheus())
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+@app.route("/api/snapshot")
+def snapshot():
+    # latest payload of every row (optionally one tab) from memory, so a page renders on first paint;
+    # the ETag is the newest seq in the response, so an unchanged tab answers 304;
+    # ?wire=compact answers with the key table and compact rows (see emitter.py)
+    tab = request.args.get("tab") or None
+    compact = request.args.get("wire") == "compact"
+    _, rows = emitter.snapshot(tab)
+    tag = "%d-%d%s" % (rows[-1]["seq"] if rows else 0, len(rows), "c" if compact else "")
+    if request.if_none_match.contains(tag):
+        return Response(status=304, headers={"ETag": f'"{tag}"'})
+    if compact:
+        # rows first: encoding can intern new keys, which the table must then include
+        rows = [m for _, m in emitter.encode_messages([(emitter.EVENT, r) for r in rows], socketio)]
+        doc = dict(emitter.key_table.table(tab), tab=tab, rows=rows)
+    else:
+        doc = {"tab": tab, "rows": rows}
+    body = json.dumps(doc, separators=(",", ":"), ensure_ascii=False)
+    return Response(body, mimetype="application/json", headers={"ETag": f'"{tag}"', "Cache-Control": "no-cache"})
+
+@app.route("/api/schedule")
+def schedule():
+    # tick lateness percentiles, skipped ticks and late flags per scraper / URL (for the dashboard)
+    return jsonify(schedule_metrics.snapshot())
+
+
+# -------------------------------------------------------
+# SOCKET EVENTS
+# -------------------------------------------------------
+def join_tab(tab, compact):
+    # move this client into the room for tab (unknown / missing tab: every tab); returns the tab or None
+    tab = tab if tab in TABS else None
+    old = client_rooms.get(request.sid)
+    if old and old != (tab, compact):
+        leave_room(emitter.room_for(*old))
+    join_room(emitter.room_for(tab, compact))
+    client_rooms[request.sid] = (tab, compact)
+    return tab
+
+def send_snapshot(tab, compact):
+    seq, rows = emitter.snapshot(tab)
+    if compact:
+        # rows first: encoding can intern new keys, which the table must then include
+        rows = [m for _, m in emitter.encode_messages([(emitter.EVENT, r) for r in rows], socketio)]
+        emit(emitter.KEYS_EVENT, emitter.key_table.table(tab))
+    emit("snapshot", {"seq": seq, "tab": tab, "rows": rows})
+
+@socketio.on("connect")
+def on_connect(auth=None):
+    # the page connects with ?tab=<active_tab>: it only receives that tab's updates,
+    # starting with the full state of the tab right away; ?wire=compact selects the compact format
+    compact = request.args.get("wire") == "compact"
+    send_snapshot(join_tab(request.args.get("tab"), compact), compact)
+
+@socketio.on("join")
+def on_join(data=None):
+    # switch tabs without reconnecting: {"tab": "tab1min"} (optionally "wire": "compact" / "json")
+    data = data if isinstance(data, dict) else {}
+    compact = client_rooms.get(request.sid, (None, False))[1]
+    if "wire" in data:
+        compact = data["wire"] == "compact"
+    send_snapshot(join_tab(data.get("tab"), compact), compact)
+
+@socketio.on("disconnect")
+def on_disconnect(*args):
+    client_rooms.pop(request.sid, None)
+
+@socketio.on("resync")
+def on_resync(data=None):
+    # a reconnecting client sends the last "seq" it saw; it gets the messages it missed, or the
+    # current state of every row when those are no longer buffered (full=True)
+    try:
+        since = int((data or {}).get("since", 0))
+    except (TypeError, ValueError, AttributeError):
+        since = 0
+    tab, compact = client_rooms.get(request.sid, (None, False))
+    messages, full = emitter.resync(since, tab)
+    if compact:
+        messages = emitter.encode_messages(messages, socketio)
+    for event, msg in messages:
+        emit(event, msg)
+    emit("resync_done", {"seq": emitter.current_seq(), "full": full, "count": len(messages)})
+
+# push schedule alerts (a URL turning late / recovering) to the dashboard through the emit queue
+emitter.forward_alerts(socketio, schedule_metrics)
+
+
+# -------------------------------------------------------
+# THREAD STARTERS
+# -------------------------------------------------------
+def start_1sec():
+    workers["1sec"], _ = scraping_1sec.start_threads(socketio)
+
+def start_1min():
+    workers["1min"], _ = scraping_1min.start_threads(socketio)
+
+def evict_slow_clients():
+    while True:
+        socketio.sleep(SLOW_CLIENT_CHECK)
+        try:
+            emitter.evict_slow_clients(socketio)
+        except Exception:
+            logging.exception("slow client check failed")
+
+def open_browser_when_ready():
+    # wait for both scrapers to restore state instead of guessing with a sleep
+    deadline = time.time() + READY_TIMEOUT
+    while time.time() < deadline:
+        if len(workers) == 2 and all(w.ready.wait(0.05) for w in workers.values()):
+            break
+        time.sleep(0.05)
+    webbrowser.open(f"http://127.0.0.1:{PORT}/")
+
+
+# -------------------------------------------------------
+# MAIN ENTRY
+# -------------------------------------------------------
+if __name__ == "__main__":
+
+    if mirror is not None:
+        if SCRAPER_PROCESS:
+            scraper_process = fanout.spawn_scrapers(MESSAGE_QUEUE, broker=OWN_BROKER)
+            atexit.register(scraper_process.terminate)
+        # scrapers run in another process: follow the queue, starting from its last snapshot
+        fanout.follow(socketio, mirror)
+    else:
+        # Load the configs here so a broken config stops the process instead of a worker thread
+        try:
+            scraping_1sec.init()
+            scraping_1min.init()
+        except Exception:
+            raise SystemExit(1)
+
+        # Start background workers (state restore happens on their own threads; "/" is served right away)
+        Thread(target=start_1sec, daemon=True).start()
+        Thread(target=start_1min, daemon=True).start()
+        if MESSAGE_QUEUE:
+            fanout.SnapshotWriter().start()
+
+        # Open the UI once the scrapers report ready (see /ready)
+        if OPEN_BROWSER:
+            Thread(target=open_browser_when_ready, daemon=True).start()
+
+    socketio.start_background_task(evict_slow_clients)
+
+    # IMPORTANT — debug=False for stability
+    socketio.run(app, host=HOST, port=PORT, debug=False)
@@ -0,0 +1,258 @@
+# connections.py — dashboard connection-count benchmark per server async mode
+# - starts app.py in a subprocess with MONITOR_ASYNC_MODE=<mode> (no scrapers; a publisher task emits
+#   --rate updates/s through emitter.ChangeEmitter, spread over --keys rows and the dashboard tabs)
+# - connects N websocket clients (python-socketio Client, one tab room each) and measures connect time,
+#   delivery latency (emit -> client), messages received/s and the server's CPU, RSS, threads and fds
+# - sweeps every (mode, N) pair; a mode whose server does not come up (package missing) is reported and skipped
+#
+# usage: python bench/connections.py [--modes threading,gevent] [--clients 10,100,500] [--rate 50]
+#                                    [--keys 200] [--duration 10] [--out connections.json]
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from urllib.request import urlopen
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+MODES = ("threading", "gevent", "eventlet")
+CLIENTS = (10, 100, 500)
+SERVER_START_TIMEOUT = 60  # seconds for the server to answer HTTP
+CONNECT_PARALLELISM = 32  # clients connecting at the same time
+CONNECT_TIMEOUT = 20
+
+COLUMNS = ("mode", "clients", "connected", "connect_p50_ms", "connect_p99_ms", "msgs_per_s",
+           "lat_p50_ms", "lat_p99_ms", "cpu_pct", "rss_mb", "threads", "fds")
+
+
+# ---------------- server side (subprocess) ----------------
+def serve(cfg):
+    """
+    Run the dashboard server in this process with a synthetic publisher instead of the scrapers.
+    """
+    os.environ["MONITOR_ASYNC_MODE"] = cfg["mode"]
+    os.environ["MONITOR_OPEN_BROWSER"] = "0"
+    os.chdir(tempfile.mkdtemp(prefix="monitor-conn-"))
+    sys.path.insert(0, BENCH_DIR)
+    sys.path.insert(0, REPO_DIR)
+    from run_bench import SCRAPERS, load_scraper
+    for name in SCRAPERS:
+        load_scraper(name)  # app.py imports them under their module names
+    import app
+    import emitter
+
+    def publish():
+        em = emitter.ChangeEmitter(app.socketio, scope="bench")
+        period = 1.0 / cfg["rate"]
+        i = 0
+        while True:
+            n = i % cfg["keys"]
+            key = f"Bench{n:04d}"
+            em.emit(key, {"key": key, "tab": app.TABS[n % len(app.TABS)], "status": i, "sent": time.time()})
+            i += 1
+            app.socketio.sleep(period)
+
+    app.socketio.start_background_task(publish)
+    extra = {"allow_unsafe_werkzeug": True} if cfg["mode"] == "threading" else {}
+    app.socketio.run(app.app, host="127.0.0.1", port=cfg["port"], debug=False, log_output=False, **extra)
+
+
+# ---------------- process stats ----------------
+def proc_stats(pid):
+    """
+    CPU seconds, RSS (MB), thread and fd counts of pid from /proc; Nones where unavailable.
+    """
+    out = {"cpu_s": None, "rss_mb": None, "threads": None, "fds": None}
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        tck = os.sysconf("SC_CLK_TCK")
+        out["cpu_s"] = (int(fields[11]) + int(fields[12])) / tck
+        out["threads"] = int(fields[17])
+        with open(f"/proc/{pid}/statm") as f:
+            out["rss_mb"] = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+        out["fds"] = len(os.listdir(f"/proc/{pid}/fd"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    return out
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(cfg):
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", json.dumps(cfg)],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, cwd=REPO_DIR)
+    deadline = time.time() + SERVER_START_TIMEOUT
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            break
+        try:
+            with urlopen(f"http://127.0.0.1:{cfg['port']}/api/schedule", timeout=2):
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    stop_server(proc)
+    err = proc.stderr.read() if proc.stderr else ""
+    print(f"[{cfg['mode']}] server did not start:\n{err[-2000:]}", file=sys.stderr)
+    return None
+
+
+def stop_server(proc):
+    if proc.poll() is None:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+# ---------------- client side ----------------
+class Clients:
+    """
+    N socketio clients spread over the dashboard tabs; collects delivery latencies.
+    """
+
+    def __init__(self, port, n, tabs):
+        self.url = f"http://127.0.0.1:{port}"
+        self.n = n
+        self.tabs = tabs
+        self.clients = []
+        self.connect_times = []
+        self.failed = 0
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def _on_update(self, msg):
+        lat = time.time() - msg.get("sent", 0)
+        with self._lock:
+            self.latencies.append(lat)
+
+    def _connect(self, i):
+        import socketio
+        c = socketio.Client(reconnection=False)
+        c.on("update_status", self._on_update)
+        t0 = time.time()
+        try:
+            c.connect(f"{self.url}?tab={self.tabs[i % len(self.tabs)]}", transports=["websocket"],
+                      wait_timeout=CONNECT_TIMEOUT)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            return
+        with self._lock:
+            self.connect_times.append(time.time() - t0)
+            self.clients.append(c)
+
+    def connect_all(self):
+        with ThreadPoolExecutor(CONNECT_PARALLELISM) as pool:
+            list(pool.map(self._connect, range(self.n)))
+
+    def take_latencies(self):
+        with self._lock:
+            out, self.latencies = self.latencies, []
+        return out
+
+    def _disconnect(self, c):
+        try:
+            c.disconnect()
+        except Exception:
+            pass
+
+    def close(self):
+        with ThreadPoolExecutor(CONNECT_PARALLELISM) as pool:
+            list(pool.map(self._disconnect, self.clients))
+
+
+def run_point(mode, n, cfg):
+    from run_bench import percentile
+    scfg = dict(cfg, mode=mode, port=free_port())
+    proc = start_server(scfg)
+    if proc is None:
+        return None
+    clients = Clients(scfg["port"], n, ("tab1sec", "tab1min", "tab5min"))
+    try:
+        clients.connect_all()
+        time.sleep(cfg["warmup"])
+        clients.take_latencies()
+        s0, t0 = proc_stats(proc.pid), time.time()
+        time.sleep(cfg["duration"])
+        lat = sorted(clients.take_latencies())
+        s1, t1 = proc_stats(proc.pid), time.time()
+        connect = sorted(clients.connect_times)
+        wall = t1 - t0
+        return {
+            "mode": mode,
+            "clients": n,
+            "connected": len(clients.clients),
+            "failed": clients.failed,
+            "connect_p50_ms": (percentile(connect, 50) or 0) * 1000,
+            "connect_p99_ms": (percentile(connect, 99) or 0) * 1000,
+            "msgs_per_s": len(lat) / wall,
+            "lat_p50_ms": (percentile(lat, 50) or 0) * 1000,
+            "lat_p99_ms": (percentile(lat, 99) or 0) * 1000,
+            "cpu_pct": 100.0 * (s1["cpu_s"] - s0["cpu_s"]) / wall if s0["cpu_s"] is not None else None,
+            "rss_mb": s1["rss_mb"],
+            "threads": s1["threads"],
+            "fds": s1["fds"],
+        }
+    finally:
+        stop_server(proc)  # first, so the clients do not each wait for a close handshake
+        clients.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark dashboard connections per server async mode")
+    ap.add_argument("--modes", default="threading,gevent", help=f"comma-separated, from {', '.join(MODES)}")
+    ap.add_argument("--clients", default=",".join(map(str, CLIENTS)), help="comma-separated client counts")
+    ap.add_argument("--rate", type=float, default=50.0, help="updates/s emitted by the server (default 50)")
+    ap.add_argument("--keys", type=int, default=200, help="rows the updates are spread over (default 200)")
+    ap.add_argument("--duration", type=float, default=10.0, help="measured seconds per point (default 10)")
+    ap.add_argument("--warmup", type=float, default=2.0, help="seconds after connecting before measuring")
+    ap.add_argument("--out", help="write results as JSON to this path")
+    ap.add_argument("--serve", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.serve:
+        serve(json.loads(args.serve))
+        return
+
+    sys.path.insert(0, BENCH_DIR)
+    from run_bench import git_rev, print_table
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        ap.error(f"unknown mode(s): {', '.join(unknown)}")
+    cfg = {"rate": args.rate, "keys": args.keys, "duration": args.duration, "warmup": args.warmup}
+
+    results = []
+    for mode in modes:
+        for n in [int(x) for x in args.clients.split(",") if x.strip()]:
+            print(f"running {mode} with {n} clients ({args.duration:.0f}s) ...", file=sys.stderr)
+            r = run_point(mode, n, cfg)
+            if r is None:
+                break  # server cannot start in this mode; skip its other points
+            results.append(r)
+
+    print_table(results, columns=COLUMNS)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"rev": git_rev(), "at": time.strftime("%Y-%m-%d %H:%M:%S"), "config": cfg,
+                       "results": results}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# fake_bse.py — local stand-in for the BSE pages the scrapers watch (benchmarks only)
+# - GET /page/<name>?type=...&fmt=...&cadence=...&delay=...&fail=...&failmode=...&lag=...
+#   type      timestamp (default) | tickervalue
+#   fmt       hm "As on 19 Oct 26 | 14:35" (default) | hms "... | 14:35:07" | ampm "... | 02:35 PM"
+#             | long "As on 19 Oct 2026 | 14:35"
+#   cadence   seconds between value updates (default 60); the value is a pure function of the tick
+#   delay     server-side response delay in ms (stands in for page load / render time)
+#   fail      probability (0..1) of injecting a failure; failmode error | timeout | garbage | empty
+#   lag       seconds the reported "As on" time trails the real clock (to provoke stale detection)
+# - the markup mirrors the live pages: span.resizable-font.me-2 / #ContentPlaceHolder1_lblNoteDate
+#   for timestamps, td.tickervalue cells for ticker pages
+#
+# standalone: python bench/fake_bse.py [--port 8765]
+
+import time
+import random
+import argparse
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs, urlencode
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TIMEOUT_SLEEP = 30  # seconds a "timeout" failure keeps the request hanging
+
+FORMATS = {
+    "hm": "%d %b %y | %H:%M",
+    "hms": "%d %b %y | %H:%M:%S",
+    "ampm": "%d %b %y | %I:%M %p",
+    "long": "%d %b %Y | %H:%M",
+}
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body><div class="container">
+<h1 class="page-title">{title}</h1>
+{content}
+</div></body></html>
+"""
+
+
+def _opt(q, name, default, cast=str):
+    try:
+        return cast(q[name][0]) if name in q else default
+    except (TypeError, ValueError):
+        return default
+
+
+def render_timestamp(name, tick_ts, fmt, lag):
+    stamp = "As on " + datetime.fromtimestamp(tick_ts - lag).strftime(FORMATS.get(fmt, FORMATS["hm"]))
+    return (
+        f'<div class="row"><span class="resizable-font me-2">{stamp}</span></div>\n'
+        f'<span id="ContentPlaceHolder1_lblNoteDate">{stamp}</span>'
+    )
+
+
+def render_ticker(name, tick, cells=8):
+    rnd = random.Random(f"{name}:{tick}")
+    tds = "".join(f'<td class="tickervalue">{rnd.uniform(100, 90000):.2f}</td>' for _ in range(cells))
+    return f"<table><tr>{tds}</tr></table>"
+
+
+class FakeBSEHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if not parts.path.startswith("/page/"):
+            self._send(404, "<html><body>not found</body></html>")
+            return
+        name = parts.path[len("/page/"):] or "page"
+        q = parse_qs(parts.query)
+        typ = _opt(q, "type", "timestamp")
+        cadence = max(0.001, _opt(q, "cadence", 60.0, float))
+        delay = _opt(q, "delay", 0.0, float) / 1000.0
+        fail = _opt(q, "fail", 0.0, float)
+        failmode = _opt(q, "failmode", "error")
+
+        self.server.stats["requests"] += 1
+        if delay > 0:
+            time.sleep(delay)
+
+        if fail > 0 and random.random() < fail:
+            self.server.stats["failures"] += 1
+            if failmode == "timeout":
+                time.sleep(TIMEOUT_SLEEP)
+            elif failmode == "garbage":
+                self._send(200, PAGE.format(title=name, content='<span class="resizable-font me-2">As on -- | --</span>'))
+                return
+            elif failmode == "empty":
+                self._send(200, PAGE.format(title=name, content="<p>Loading...</p>"))
+                return
+            self._send(500, "<html><body><h1>Service Unavailable</h1></body></html>")
+            return
+
+        tick = int(time.time() // cadence)
+        if typ == "tickervalue":
+            content = render_ticker(name, tick)
+        else:
+            content = render_timestamp(name, tick * cadence, _opt(q, "fmt", "hm"), _opt(q, "lag", 0.0, float))
+        self._send(200, PAGE.format(title=name, content=content))
+
+    def _send(self, code, body):
+        data = body.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeBSE:
+    """
+    Threaded fake site on 127.0.0.1; start() returns self, url() builds page URLs with options.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), FakeBSEHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.stats = {"requests": 0, "failures": 0}
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self):
+        return dict(self.httpd.stats)
+
+    def url(self, name, **opts):
+        opts = {k: v for k, v in opts.items() if v is not None}
+        return f"{self.base_url}/page/{name}" + ("?" + urlencode(opts) if opts else "")
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="fake-bse", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Serve fake BSE pages for benchmarks")
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+    site = FakeBSE(port=args.port)
+    print(f"serving on {site.base_url}  (e.g. {site.url('Gainers', cadence=5, delay=200)})")
+    try:
+        site.httpd.serve_forever()
+    except KeyboardInterrupt:
+        site.httpd.server_close()
@@ -0,0 +1,155 @@
+# http_driver.py — minimal WebDriver stand-in for benchmarks against fake_bse
+# - get() fetches the page over plain HTTP (no browser), so benchmarks measure the scraper code
+#   paths, threading, state and emit overhead rather than Chrome
+# - find_element / execute_script cover exactly what the scrapers use: a CSS selector list of
+#   simple compounds (tag, #id, .class, comma-separated) and the querySelectorAll-texts script
+
+import re
+import time
+import threading
+from html.parser import HTMLParser
+from urllib.request import urlopen
+from urllib.error import HTTPError
+
+PAGE_LOAD_TIMEOUT = 10  # seconds, like a Selenium page-load timeout
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"}
+
+
+class WebDriverError(Exception):
+    pass
+
+
+class NoSuchElement(WebDriverError):
+    pass
+
+
+class _Element:
+    __slots__ = ("tag", "id", "classes", "parts")
+
+    def __init__(self, tag, attrs):
+        a = dict(attrs)
+        self.tag = tag
+        self.id = a.get("id")
+        self.classes = set((a.get("class") or "").split())
+        self.parts = []
+
+    @property
+    def text(self):
+        return " ".join("".join(self.parts).split())
+
+
+class _Collector(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.elements = []
+        self.open = []
+
+    def handle_starttag(self, tag, attrs):
+        el = _Element(tag, attrs)
+        self.elements.append(el)
+        if tag not in VOID_TAGS:
+            self.open.append(el)
+
+    def handle_endtag(self, tag):
+        for i in range(len(self.open) - 1, -1, -1):
+            if self.open[i].tag == tag:
+                del self.open[i:]
+                break
+
+    def handle_data(self, data):
+        for el in self.open:
+            el.parts.append(data)
+
+
+_COMPOUND = re.compile(r"^(?P<tag>[a-zA-Z][\w-]*)?(?P<rest>(?:[#.][\w-]+)*)$")
+
+
+def _compile(selector):
+    # "span.a.b, #x" -> [(tag, id, {classes}), ...]; descendant selectors match on their last compound
+    out = []
+    for part in selector.split(","):
+        part = part.strip().split()[-1] if part.strip() else ""
+        m = _COMPOUND.match(part)
+        if not part or not m:
+            continue
+        rest = m.group("rest")
+        ids = re.findall(r"#([\w-]+)", rest)
+        out.append((m.group("tag"), ids[0] if ids else None, set(re.findall(r"\.([\w-]+)", rest))))
+    return out
+
+
+def _matches(el, compound):
+    tag, el_id, classes = compound
+    return (tag is None or el.tag == tag) and (el_id is None or el.id == el_id) and classes <= el.classes
+
+
+class HttpDriver:
+    """
+    Just enough of selenium's WebDriver for URLWorker / Worker: get, find_element, execute_script,
+    current_url, implicitly_wait, quit.
+    """
+
+    def __init__(self, timeout=PAGE_LOAD_TIMEOUT):
+        self.timeout = timeout
+        self.current_url = "about:blank"
+        self._elements = []
+        self._closed = False
+
+    def get(self, url):
+        if self._closed:
+            raise WebDriverError("driver has been quit")
+        try:
+            with urlopen(url, timeout=self.timeout) as resp:
+                body = resp.read()
+        except HTTPError as e:
+            body = e.read()  # a browser renders the error page instead of raising
+        except Exception as e:
+            raise WebDriverError(f"page load failed: {e}")
+        parser = _Collector()
+        parser.feed(body.decode("utf-8", "replace"))
+        self._elements = parser.elements
+        self.current_url = url
+
+    def _select(self, selector):
+        compounds = _compile(selector)
+        return [el for el in self._elements if any(_matches(el, c) for c in compounds)]
+
+    def find_element(self, by, selector):
+        found = self._select(selector)
+        if not found:
+            raise NoSuchElement(selector)
+        return found[0]
+
+    def execute_script(self, script, selector=None):
+        # only the scrapers' querySelectorAll(...).map(textContent.trim()) script is supported
+        return [el.text for el in self._select(selector or "")]
+
+    def implicitly_wait(self, seconds):
+        pass
+
+    def quit(self):
+        self._closed = True
+        self._elements = []
+
+
+class HttpDriverManager:
+    """
+    Drop-in for the scrapers' DriverManager; counts driver launches. Mixed in front of a scraper's
+    own DriverManager (see run_bench.py) it keeps that class's launch pacing.
+    """
+
+    def __init__(self, launch_cost=0.0):
+        super().__init__()
+        self.launch_cost = launch_cost  # seconds to sleep per launch, to emulate Chrome start-up
+        self.launches = 0
+        self._lock = threading.Lock()
+
+    def get_driver(self, relaunch=False):
+        pace = getattr(self, "_wait_launch_slot", None)
+        if pace and relaunch:
+            pace()
+        with self._lock:
+            self.launches += 1
+        if self.launch_cost:
+            time.sleep(self.launch_cost)
+        return HttpDriver()
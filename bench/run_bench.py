@@ -0,0 +1,318 @@
+# run_bench.py — scraper throughput benchmark against the local fake BSE site
+# - each configuration runs in its own subprocess and temp working dir: fake_bse serves the pages,
+#   the real scraper module (sca_1sec / sca_1min) runs its Worker / URLWorker code, and only the
+#   browser is swapped for http_driver.HttpDriver
+# - reports probes/s, probe latency p50 / p99 (from probe_store), emits/s, error %, CPU % and RSS,
+#   plus tick lateness, thread / file-descriptor counts and driver launches (used by scale.py)
+#
+# usage: python bench/run_bench.py [PRESET ...] [--duration S] [--urls N] [--delay MS] ... [--out results.json]
+#        python bench/run_bench.py --list
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import functools
+import subprocess
+import importlib.util
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+SCRAPERS = {
+    "1sec": ("sca_1sec (1).py", "scraping_1sec"),
+    "1min": ("sca_1min.py", "scraping_1min"),
+}
+
+DEFAULTS = {
+    "scraper": "1sec",
+    "urls": 10,
+    "duration": 20.0,     # measured seconds (after warm-up)
+    "warmup": 3.0,        # seconds after the worker reports ready before measuring
+    "interval": 1,        # 1-sec URLWorker interval
+    "delay": 0.0,         # fake page response delay, ms
+    "cadence": 5.0,       # seconds between page value updates
+    "fail": 0.0,          # failure injection probability
+    "failmode": "error",  # error | timeout | garbage | empty
+    "fmt": "hm",
+    "ticker": 0.2,        # fraction of URLs that are tickervalue pages
+    "launch_cost": 0.0,   # seconds per emulated driver launch
+}
+
+PRESETS = {
+    "1sec-small": {"scraper": "1sec", "urls": 5},
+    "1sec-medium": {"scraper": "1sec", "urls": 25},
+    "1sec-slow-pages": {"scraper": "1sec", "urls": 25, "delay": 300},
+    "1sec-flaky": {"scraper": "1sec", "urls": 25, "fail": 0.1},
+    "1min-small": {"scraper": "1min", "urls": 10, "delay": 100, "duration": 30.0},
+}
+
+COLUMNS = ("name", "probes_per_s", "p50_ms", "p99_ms", "emits_per_s", "error_pct", "cpu_pct", "rss_mb")
+
+
+class CountingSocketIO:
+    """
+    Stands in for flask_socketio.SocketIO.emit; counts emits per event.
+    """
+
+    def __init__(self):
+        self.counts = {}
+
+    def emit(self, event, payload=None, **kwargs):
+        self.counts[event] = self.counts.get(event, 0) + 1
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        return None
+
+
+def fd_count():
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        pass
+    try:
+        import psutil
+        p = psutil.Process()
+        return p.num_handles() if hasattr(p, "num_handles") else p.num_fds()
+    except ImportError:
+        return None
+
+
+def tick_lateness(rows, interval):
+    """
+    Seconds each probe came later than one interval after the previous probe of the same key.
+    rows: probe_store.query_range rows (key, ts, ...) ordered by ts.
+    """
+    last = {}
+    late = []
+    for r in rows:
+        prev = last.get(r[0])
+        if prev is not None:
+            late.append(max(0.0, r[1] - prev - interval))
+        last[r[0]] = r[1]
+    return sorted(late)
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, int(round((len(sorted_values) - 1) * p / 100.0)))
+    return sorted_values[idx]
+
+
+def load_scraper(name):
+    """
+    Import the scraper file under the module name app.py uses (the 1-sec file name has a space).
+    """
+    filename, module_name = SCRAPERS[name]
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR)
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(REPO_DIR, filename))
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def write_configs(mod, site, cfg):
+    os.makedirs(os.path.dirname(mod.URL_DICT_PATH), exist_ok=True)
+    n_ticker = int(round(cfg["urls"] * cfg["ticker"]))
+    tab = "tab" + cfg["scraper"]
+    url_dict, names = {}, {}
+    for i in range(cfg["urls"]):
+        key = f"Page{i:04d}"
+        typ = "tickervalue" if i < n_ticker else "timestamp"
+        entry = {
+            "url": site.url(key, type=typ, cadence=cfg["cadence"], delay=cfg["delay"] or None,
+                            fail=cfg["fail"] or None, failmode=cfg["failmode"] if cfg["fail"] else None,
+                            fmt=cfg["fmt"]),
+            "type": typ,
+            "selector": ".tickervalue" if typ == "tickervalue" else "span.resizable-font.me-2",
+            "tab": tab,
+            "key_id": f"row-{key}",
+        }
+        if cfg["scraper"] == "1sec":
+            entry["interval"] = cfg["interval"]
+        url_dict[key] = entry
+        names[key] = key
+    with open(mod.URL_DICT_PATH, "w", encoding="utf-8") as f:
+        json.dump(url_dict, f)
+    with open(mod.NAME_MAPPING_PATH, "w", encoding="utf-8") as f:
+        json.dump(names, f)
+
+
+def run_single(cfg):
+    """
+    One configuration, in this process (call from a fresh interpreter; scraper state is global).
+    """
+    sys.path.insert(0, BENCH_DIR)
+    from fake_bse import FakeBSE
+    from http_driver import HttpDriverManager
+
+    workdir = tempfile.mkdtemp(prefix="monitor-bench-")
+    os.chdir(workdir)
+    site = FakeBSE().start()
+    try:
+        mod = load_scraper(cfg["scraper"])
+        # HTTP drivers instead of Chrome, keeping the scraper's own DriverManager behaviour (launch pacing)
+        bench_dm = type("BenchDriverManager", (HttpDriverManager, mod.DriverManager), {})
+        mod.DriverManager = functools.partial(bench_dm, cfg["launch_cost"])
+        write_configs(mod, site, cfg)
+        from probe_store import probe_store
+
+        sio = CountingSocketIO()
+        started = time.time()
+        worker, _ = mod.start_threads(sio)
+        worker.ready.wait(60)
+        ready_after = time.time() - started
+        time.sleep(cfg["warmup"])
+
+        emits0, cpu0, t0 = sio.total, time.process_time(), time.time()
+        time.sleep(cfg["duration"])
+        emits1, cpu1, t1 = sio.total, time.process_time(), time.time()
+
+        threads, fds, rss = threading.active_count(), fd_count(), rss_mb()
+        probe_store.flush()
+        rows = probe_store.query_range(t0, t1)
+        latencies = sorted(r[3] for r in rows if r[3] is not None)
+        errors = sum(1 for r in rows if r[2] not in ("ok", "stale"))
+        late = tick_lateness(rows, cfg["interval"] if cfg["scraper"] == "1sec" else 60)
+        wall = t1 - t0
+        return {
+            "probes": len(rows),
+            "probes_per_s": len(rows) / wall,
+            "p50_ms": (percentile(latencies, 50) or 0) * 1000,
+            "p99_ms": (percentile(latencies, 99) or 0) * 1000,
+            "emits_per_s": (emits1 - emits0) / wall,
+            "error_pct": 100.0 * errors / len(rows) if rows else 0.0,
+            "cpu_pct": 100.0 * (cpu1 - cpu0) / wall,
+            "rss_mb": rss,
+            "late_p50_ms": (percentile(late, 50) or 0) * 1000,
+            "late_p99_ms": (percentile(late, 99) or 0) * 1000,
+            "late_max_ms": (late[-1] if late else 0) * 1000,
+            "threads": threads,
+            "fds": fds,
+            "drivers": getattr(worker.dm, "launches", None),
+            "ready_s": ready_after,
+            "requests_served": site.stats["requests"],
+        }
+    finally:
+        site.stop()
+        os.chdir(REPO_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_config(name, cfg, timeout_pad=60):
+    """
+    Run one configuration in a subprocess; returns the result dict (with name and config) or None.
+    """
+    cmd = [sys.executable, os.path.abspath(__file__), "--single", json.dumps(cfg)]
+    budget = cfg["warmup"] + cfg["duration"] + timeout_pad
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, timeout=budget, cwd=REPO_DIR)
+    except subprocess.TimeoutExpired:
+        print(f"[{name}] timed out after {budget:.0f}s", file=sys.stderr)
+        return None
+    lines = [l for l in out.stdout.splitlines() if l.startswith("{")]
+    if out.returncode != 0 or not lines:
+        print(f"[{name}] failed (exit {out.returncode}):\n{out.stderr[-2000:]}", file=sys.stderr)
+        return None
+    result = json.loads(lines[-1])
+    result.update(name=name, config=cfg)
+    return result
+
+
+def git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=REPO_DIR).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _cell(v):
+    if v is None:
+        return "-"
+    return f"{v:.1f}" if isinstance(v, float) else str(v)
+
+
+def print_table(results, file=sys.stdout, columns=COLUMNS):
+    rows = [[_cell(r.get(c)) for c in columns] for r in results]
+    widths = [max(len(c), *(len(row[i]) for row in rows)) if rows else len(c) for i, c in enumerate(columns)]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)), file=file)
+    for row in rows:
+        print("  ".join(v.ljust(w) for v, w in zip(row, widths)), file=file)
+
+
+def add_override_args(ap):
+    for name, default in DEFAULTS.items():
+        if name == "scraper":
+            ap.add_argument("--scraper", choices=sorted(SCRAPERS), help="override scraper for every preset")
+        else:
+            ap.add_argument("--" + name.replace("_", "-"), dest=name, type=type(default),
+                            help=f"override for every preset (default {default})")
+
+
+def overrides(args):
+    return {k: getattr(args, k) for k in DEFAULTS if getattr(args, k, None) is not None}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the scrapers against a local fake BSE site")
+    ap.add_argument("presets", nargs="*", help="preset names (default: all); see --list")
+    ap.add_argument("--list", action="store_true", help="list presets and exit")
+    ap.add_argument("--out", help="write results (with git revision) as JSON to this path")
+    ap.add_argument("--single", help=argparse.SUPPRESS)
+    add_override_args(ap)
+    args = ap.parse_args(argv)
+
+    if args.single:
+        print(json.dumps(run_single(json.loads(args.single))))
+        return
+
+    if args.list:
+        for name, p in PRESETS.items():
+            print(f"{name:18s} {p}")
+        return
+
+    names = args.presets or list(PRESETS)
+    unknown = [n for n in names if n not in PRESETS]
+    if unknown:
+        ap.error(f"unknown preset(s): {', '.join(unknown)}")
+
+    results = []
+    for name in names:
+        cfg = {**DEFAULTS, **PRESETS[name], **overrides(args)}
+        print(f"running {name} ({cfg['scraper']}, {cfg['urls']} urls, {cfg['duration']:.0f}s) ...", file=sys.stderr)
+        r = run_config(name, cfg)
+        if r:
+            results.append(r)
+
+    print_table(results)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"rev": git_rev(), "at": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# scale.py — sweep the number of checklist URLs against the fake BSE site
+# - synthesises N url_dict entries per run (run_bench.write_configs) and runs the real scraper for
+#   each N in the sweep (default 10, 50, 200, 1000), one subprocess per point
+# - records throughput, probe latency, tick lateness, CPU, RSS, thread / fd counts and driver launches
+#   to CSV; plots them when matplotlib is installed (optional)
+# - HttpDriver replaces Chrome, so RSS excludes the browsers; chrome_est_mb adds CHROME_RSS_MB per
+#   launched driver to show what the thread-per-URL + Chrome-per-URL design would cost in memory
+#
+# usage: python bench/scale.py [--scraper 1sec] [--sweep 10,50,200,1000] [--duration S] [--csv scale.csv] [--plot scale.png]
+
+import os
+import csv
+import sys
+import argparse
+
+from run_bench import DEFAULTS, add_override_args, overrides, run_config, print_table
+
+SWEEP = (10, 50, 200, 1000)
+CHROME_RSS_MB = 150  # typical resident size of one headless Chrome (browser + renderer)
+
+FIELDS = ("urls", "probes_per_s", "p50_ms", "p99_ms", "late_p50_ms", "late_p99_ms", "late_max_ms",
+          "cpu_pct", "rss_mb", "chrome_est_mb", "threads", "fds", "drivers", "error_pct")
+
+# (y field, title) per subplot
+PLOTS = (
+    ("probes_per_s", "throughput (probes/s)"),
+    ("late_p99_ms", "tick lateness p99 (ms)"),
+    ("rss_mb", "RSS without Chrome (MB)"),
+    ("chrome_est_mb", "estimated RSS with Chrome (MB)"),
+    ("threads", "threads"),
+    ("fds", "open file descriptors"),
+)
+
+
+def sweep(cfg_base, sizes):
+    results = []
+    for n in sizes:
+        cfg = dict(cfg_base, urls=n)
+        name = f"{cfg['scraper']}-{n}"
+        print(f"running {name} ({cfg['duration']:.0f}s) ...", file=sys.stderr)
+        r = run_config(name, cfg, timeout_pad=120 + n * 0.5)
+        if r is None:
+            continue
+        r["urls"] = n
+        r["chrome_est_mb"] = (r.get("drivers") or 0) * CHROME_RSS_MB
+        results.append(r)
+    return results
+
+
+def write_csv(results, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(FIELDS)
+        for r in results:
+            w.writerow(["" if r.get(k) is None else (f"{r[k]:.3f}" if isinstance(r[k], float) else r[k])
+                        for k in FIELDS])
+
+
+def plot(results, path, title):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib not installed; skipping plot", file=sys.stderr)
+        return False
+    xs = [r["urls"] for r in results]
+    fig, axes = plt.subplots(2, 3, figsize=(14, 8))
+    for ax, (field, label) in zip(axes.flat, PLOTS):
+        ax.plot(xs, [r.get(field) or 0 for r in results], marker="o")
+        ax.set_xscale("log")
+        ax.set_xlabel("URLs")
+        ax.set_title(label)
+        ax.grid(True, alpha=0.3)
+    fig.suptitle(title)
+    fig.tight_layout()
+    fig.savefig(path)
+    return True
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Sweep the number of URLs and record how the scraper scales")
+    ap.add_argument("--sweep", default=",".join(map(str, SWEEP)), help="comma-separated URL counts")
+    ap.add_argument("--csv", default="scale.csv", help="CSV output path (default scale.csv)")
+    ap.add_argument("--plot", help="PNG output path (needs matplotlib)")
+    add_override_args(ap)
+    args = ap.parse_args(argv)
+
+    sizes = [int(x) for x in args.sweep.split(",") if x.strip()]
+    cfg_base = dict(DEFAULTS, **overrides(args))
+    results = sweep(cfg_base, sizes)
+
+    print_table(results)
+    write_csv(results, args.csv)
+    print(f"wrote {os.path.abspath(args.csv)}", file=sys.stderr)
+    if args.plot and results and plot(results, args.plot, f"{cfg_base['scraper']} scraper, {cfg_base['duration']:.0f}s per point"):
+        print(f"wrote {os.path.abspath(args.plot)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# config_watcher.py — hot reload of the scraper JSON configs
+# - ConfigWatcher polls file mtimes (no inotify dependency; works the same on Windows)
+# - diff_config() tells the scrapers which url_dict keys were added / removed / changed,
+#   so only the affected workers are touched
+
+import os
+import logging
+import threading
+
+POLL_INTERVAL = 2.0  # seconds
+
+logger = logging.getLogger("config_watcher")
+
+
+def _mtime(path):
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def diff_config(old, new):
+    """
+    Compare two url_dict configs. Returns (added, removed, changed) as sorted key lists.
+    """
+    old = old or {}
+    new = new or {}
+    added = sorted(k for k in new if k not in old)
+    removed = sorted(k for k in old if k not in new)
+    changed = sorted(k for k in new if k in old and new[k] != old[k])
+    return added, removed, changed
+
+
+class ConfigNotReady(Exception):
+    """
+    Raised by an on_change callback that cannot apply the change yet; the watcher retries it on
+    the next poll.
+    """
+
+
+class ConfigWatcher(threading.Thread):
+    """
+    Calls on_change() whenever any of paths changes on disk (mtime or size).
+    Exceptions from on_change are logged and the watcher keeps running; ConfigNotReady makes it
+    deliver the same change again on the next poll.
+    """
+
+    def __init__(self, paths, on_change, interval=POLL_INTERVAL, name="config-watcher"):
+        super().__init__(daemon=True, name=name)
+        self.paths = list(paths)
+        self.on_change = on_change
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self._seen = {p: _mtime(p) for p in self.paths}
+
+    def check(self):
+        """
+        One poll; returns True if a change was detected (and on_change called).
+        """
+        current = {p: _mtime(p) for p in self.paths}
+        if current == self._seen:
+            return False
+        changed = [p for p in self.paths if current[p] != self._seen.get(p)]
+        previous, self._seen = self._seen, current
+        logger.info("config change detected: %s", ", ".join(changed))
+        try:
+            self.on_change()
+        except ConfigNotReady as e:
+            self._seen = previous
+            logger.warning("config reload deferred: %s", e)
+        except Exception:
+            logger.exception("config reload failed")
+        return True
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        self.stop_event.set()
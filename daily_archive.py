@@ -0,0 +1,306 @@
+# daily_archive.py — nightly columnar archive of one day's probe history
+# - compact_day() turns a day of probe_store rows into state/archive/probes_YYYY-MM-DD.bin,
+#   streaming the rows from a cursor into typed column arrays (the day is never a list of tuples)
+# - on startup, schedule_catch_up() archives finished days that have raw rows but no archive yet
+#   (e.g. the process was down at midnight)
+# - fixed-width little-endian columns: ts (uint32 ms since day start), latency (float32 s),
+#   key index (uint16, into an interned key table), status code (uint8; high bit set when the
+#   probe saw a different value_hash than the previous probe of the same key)
+# - ArchiveReader memory-maps a file and answers range queries by bisecting the ts column,
+#   without deserialising the rest of the file
+# - MONARC1 files (before the changed bit; "other" was 255) are still read: their status column
+#   is converted to the current codes in memory, with no probe marked as changed
+#
+# File layout:
+#   header   "<8sIIq"  magic, n_keys, n_rows, day_start (epoch seconds)
+#   keys     n_keys x (uint16 length + utf-8 bytes), zero-padded to 8 bytes
+#   columns  ts[n_rows] uint32 | latency[n_rows] float32 | key[n_rows] uint16 | status[n_rows] uint8
+
+import os
+import sys
+import mmap
+import time
+import struct
+import logging
+import threading
+from array import array
+from bisect import bisect_left
+from itertools import chain
+from datetime import datetime, timedelta
+
+from probe_store import probe_store, RAW_RETENTION_DAYS
+
+ARCHIVE_DIR = os.path.join("state", "archive")
+MAGIC = b"MONARC2\0"
+MAGIC_V1 = b"MONARC1\0"
+STATUS_OTHER_V1 = 255
+HEADER = struct.Struct("<8sIIq")
+
+# status vocabulary emitted by the scrapers; anything else is archived as STATUS_OTHER
+STATUS_CODES = ("ok", "stale", "invalid format", "error", "completed", "load-error",
+                "driver-missing", "driver-create-failed", "skip")
+STATUS_INDEX = {s: i for i, s in enumerate(STATUS_CODES)}
+STATUS_OTHER = 127
+CHANGED_BIT = 0x80
+
+logger = logging.getLogger("daily_archive")
+_compact_lock = threading.Lock()
+_catch_up_lock = threading.Lock()
+_catch_up_thread = None
+
+
+def status_name(code):
+    code &= ~CHANGED_BIT
+    return STATUS_CODES[code] if code < len(STATUS_CODES) else "other"
+
+
+def archive_path(day_str, archive_dir=ARCHIVE_DIR):
+    return os.path.join(archive_dir, f"probes_{day_str}.bin")
+
+
+def _pad8(n):
+    return (-n) % 8
+
+
+def _le(a):
+    if sys.byteorder != "little":
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a.tobytes()
+
+
+def write_archive(path, day_start, rows):
+    """
+    rows: iterable of (key, ts, status, latency, value_hash) sorted by ts, all within the day.
+    """
+    keys = {}
+    last_hash = {}
+    ts_col, lat_col, key_col, st_col = array("I"), array("f"), array("H"), array("B")
+    for key, ts, status, latency, value_hash in rows:
+        idx = keys.setdefault(key, len(keys))
+        ts_col.append(max(0, int(round((ts - day_start) * 1000))))
+        lat_col.append(float(latency or 0.0))
+        key_col.append(idx)
+        code = STATUS_INDEX.get(status, STATUS_OTHER)
+        if value_hash and last_hash.get(idx) != value_hash:
+            last_hash[idx] = value_hash
+            code |= CHANGED_BIT
+        st_col.append(code)
+
+    key_blob = b"".join(struct.pack("<H", len(k.encode("utf-8"))) + k.encode("utf-8") for k in keys)
+    key_blob += b"\0" * _pad8(len(key_blob))
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys), len(ts_col), int(day_start)))
+        f.write(key_blob)
+        f.write(_le(ts_col))
+        f.write(_le(lat_col))
+        f.write(_le(key_col))
+        f.write(_le(st_col))
+    os.replace(tmp, path)
+    return len(ts_col)
+
+
+def compact_day(day_str, store=probe_store, archive_dir=ARCHIVE_DIR, overwrite=False):
+    """
+    Archive one day ("YYYY-MM-DD") of probe history from store. Returns the file path, or None if
+    the archive already exists (and overwrite is False) or the day has no probes.
+    """
+    path = archive_path(day_str, archive_dir)
+    with _compact_lock:
+        if os.path.exists(path) and not overwrite:
+            return None
+        day_start = datetime.strptime(day_str, "%Y-%m-%d")
+        t0 = day_start.timestamp()
+        t1 = (day_start + timedelta(days=1)).timestamp()
+        started = time.time()
+        if not os.path.exists(store.path):
+            return None
+        rows = store.iter_range(t0, t1)
+        first = next(rows, None)
+        if first is None:
+            return None
+        os.makedirs(archive_dir, exist_ok=True)
+        n = write_archive(path, t0, chain((first,), rows))
+        logger.info("archived %d probes for %s -> %s (%.2fs)", n, day_str, path, time.time() - started)
+        return path
+
+
+def schedule_compaction(day_str, store=probe_store):
+    """
+    Run compact_day in the background (called on day rotation; safe to call from both scrapers).
+    """
+    def job():
+        try:
+            store.flush()
+            compact_day(day_str, store)
+        except Exception:
+            logger.exception("compaction failed for %s", day_str)
+
+    t = threading.Thread(target=job, name=f"compact-{day_str}", daemon=True)
+    t.start()
+    return t
+
+
+def compact_missing(store=probe_store, archive_dir=ARCHIVE_DIR, now=None):
+    """
+    Archive every finished day that still has raw probes but no archive file. Days that reach back
+    past the raw retention window are skipped: downsampling has already removed part of them.
+    Returns the paths written.
+    """
+    if not os.path.exists(store.path):
+        return []
+    oldest = store.oldest_ts()
+    if oldest is None:
+        return []
+    now = now or time.time()
+    cutoff = now - RAW_RETENTION_DAYS * 86400
+    today = datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    day = datetime.fromtimestamp(oldest).replace(hour=0, minute=0, second=0, microsecond=0)
+    written = []
+    while day < today:
+        day_str = day.strftime("%Y-%m-%d")
+        if day.timestamp() >= cutoff and not os.path.exists(archive_path(day_str, archive_dir)):
+            path = compact_day(day_str, store, archive_dir)
+            if path:
+                written.append(path)
+        day += timedelta(days=1)
+    return written
+
+
+def schedule_catch_up(store=probe_store):
+    """
+    Run compact_missing once in the background (called on startup; safe to call from both scrapers).
+    """
+    global _catch_up_thread
+
+    def job():
+        try:
+            store.flush()
+            written = compact_missing(store)
+            if written:
+                logger.info("caught up on %d unarchived day(s)", len(written))
+        except Exception:
+            logger.exception("catch-up compaction failed")
+
+    with _catch_up_lock:
+        if _catch_up_thread is None:
+            _catch_up_thread = threading.Thread(target=job, name="compact-catch-up", daemon=True)
+            _catch_up_thread.start()
+    return _catch_up_thread
+
+
+class ArchiveReader:
+    def __init__(self, path):
+        self.path = path
+        self._f = open(path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n_keys, n_rows, day_start = HEADER.unpack_from(self._mm, 0)
+        if magic not in (MAGIC, MAGIC_V1):
+            self.close()
+            raise ValueError(f"not a probe archive: {path}")
+        self.version = 2 if magic == MAGIC else 1
+        self.n_rows = n_rows
+        self.day_start = day_start
+
+        off = HEADER.size
+        self.keys = []
+        for _ in range(n_keys):
+            (ln,) = struct.unpack_from("<H", self._mm, off)
+            self.keys.append(bytes(self._mm[off + 2:off + 2 + ln]).decode("utf-8"))
+            off += 2 + ln
+        off += _pad8(off - HEADER.size)
+        self.key_index = {k: i for i, k in enumerate(self.keys)}
+
+        self.ts = self._column(off, "I", 4)
+        off += 4 * n_rows
+        self.latency = self._column(off, "f", 4)
+        off += 4 * n_rows
+        self.key = self._column(off, "H", 2)
+        off += 2 * n_rows
+        self.status = self._column(off, "B", 1)
+        if self.version == 1:
+            # no changed bit in v1; its only code with the high bit set is "other"
+            status = array("B", self.status)
+            self.status.release()
+            self.status = array("B", (STATUS_OTHER if c == STATUS_OTHER_V1 else c for c in status))
+
+    def _column(self, off, typecode, width):
+        raw = memoryview(self._mm)[off:off + width * self.n_rows]
+        if sys.byteorder == "little":
+            return raw.cast(typecode)
+        a = array(typecode, bytes(raw))
+        a.byteswap()
+        return a
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for col in ("ts", "latency", "key", "status"):
+            v = getattr(self, col, None)
+            if isinstance(v, memoryview):
+                v.release()
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+            self._mm = None
+        self._f.close()
+
+    def _slice(self, t0=None, t1=None):
+        # row range [i, j) with t0 <= ts < t1 (epoch seconds)
+        i = 0 if t0 is None else bisect_left(self.ts, max(0, int((t0 - self.day_start) * 1000)))
+        j = self.n_rows if t1 is None else bisect_left(self.ts, max(0, int((t1 - self.day_start) * 1000)))
+        return i, max(i, j)
+
+    def range(self, t0=None, t1=None, key=None):
+        """
+        Yield (ts, key, status, latency, changed) for rows in [t0, t1), optionally for one key only.
+        """
+        i, j = self._slice(t0, t1)
+        want = None if key is None else self.key_index.get(key, -1)
+        for r in range(i, j):
+            k = self.key[r]
+            if want is not None and k != want:
+                continue
+            st = self.status[r]
+            yield (self.day_start + self.ts[r] / 1000.0, self.keys[k], status_name(st),
+                   self.latency[r], bool(st & CHANGED_BIT))
+
+    def status_counts(self, t0=None, t1=None):
+        """
+        {key: {status: count}} over [t0, t1) reading only the key/status columns.
+        """
+        i, j = self._slice(t0, t1)
+        counts = {}
+        keys, status = self.key[i:j], self.status[i:j]
+        for k, st in zip(keys, status):
+            d = counts.setdefault(self.keys[k], {})
+            name = status_name(st)
+            d[name] = d.get(name, 0) + 1
+        return counts
+
+
+def archives_between(start_day, end_day, archive_dir=ARCHIVE_DIR):
+    """
+    Paths of existing archives for days start_day..end_day inclusive ("YYYY-MM-DD").
+    """
+    d = datetime.strptime(start_day, "%Y-%m-%d")
+    end = datetime.strptime(end_day, "%Y-%m-%d")
+    out = []
+    while d <= end:
+        p = archive_path(d.strftime("%Y-%m-%d"), archive_dir)
+        if os.path.exists(p):
+            out.append(p)
+        d += timedelta(days=1)
+    return out
+
+
+if __name__ == "__main__":
+    # manual compaction: python daily_archive.py YYYY-MM-DD [YYYY-MM-DD ...]
+    logging.basicConfig(level=logging.INFO)
+    for day in sys.argv[1:] or [(datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")]:
+        print(day, compact_day(day, overwrite=True))
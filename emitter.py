@@ -0,0 +1,493 @@
+# emitter.py — change-tracking socket emitter shared by the scrapers
+# - ChangeEmitter remembers the last payload sent per key and only emits on a real transition,
+#   so heartbeat loops can call it every tick without sending anything redundant
+# - every message sent gets "seq", one process-wide increasing sequence number (both scrapers share it);
+#   it starts at the epoch milliseconds of process start, so it also keeps increasing across restarts
+# - the last RESYNC_BUFFER messages are kept; resync(since) returns what a reconnecting client missed,
+#   or the current payload of every key when the gap is older than the buffer
+# - snapshot(tab) is the latest message of every key (optionally for one dashboard tab), for the
+#   /api/snapshot endpoint and the push on socket connect
+# - messages go to the Socket.IO room named after the payload's "tab" (plus ALL_ROOM for clients
+#   that did not pick a tab), so a client only receives the tab it is looking at
+# - compact wire format, for clients that connect with ?wire=compact (rooms "c:<tab>" / "c:all"):
+#   KEYS_EVENT carries the interned key table {"statuses": [...], "keys": [[idx, checklist, key_id, tab], ...]}
+#   (in full on connect, then one entry whenever a new key appears); each update is then COMPACT_EVENT
+#   [seq, idx, status code, last_changed epoch, last_value] (a status missing from WIRE_STATUSES is
+#   sent as its string); a key interned while encoding a snapshot or resync is announced to every
+#   compact client like one interned by the sender. A mirror process only uses the publisher's
+#   indices and sends rows of keys it has no index for as full updates
+# - MirrorEmitter rebuilds this state from another process's stream (see fanout.py), so a dashboard
+#   process that does not run the scrapers answers snapshot / resync the same way
+# - emit() never touches the socket: messages go to the bounded, per-row latest-value-wins Outbound
+#   queue and one sender thread does the socket emits, so scraper threads never wait for clients;
+#   evict_slow_clients() disconnects clients whose Engine.IO send queue keeps growing (they reconnect
+#   and resync). Queue depth, coalesced / dropped messages, evictions and send time are on /metrics
+# - a message sent in place of coalesced ones lists their seqs in COALESCED_FIELD, so a mirror can tell
+#   a seq that was superseded from one that was lost, and keeps its resync buffer across the gap
+# - forward_alerts() queues schedule alerts (ALERT_EVENT) through a ChangeEmitter as well, to the rooms
+#   of the scraper's tab; they take seqs from the same log and are replayed by resync like rows
+
+import time
+import logging
+import weakref
+import threading
+from collections import deque, OrderedDict
+
+from daily_archive import STATUS_CODES
+from monitor_record import to_epoch
+from probe_metrics import Histogram, render_histogram, _labels
+
+RESYNC_BUFFER = 5000  # messages kept for resync
+EVENT = "update_status"
+ALERT_EVENT = "schedule_alert"
+SCRAPER_TABS = {"1sec": "tab1sec", "1min": "tab1min"}  # dashboard tab of each scraper's alerts
+COALESCED_FIELD = "coalesced"  # seqs a message was sent in place of (see Outbound)
+COALESCED_MAX = 64  # seqs listed per message; older ones count as lost on the receiving side
+ALL_ROOM = "all"  # room of clients that want every tab
+
+COMPACT_EVENT = "u"
+KEYS_EVENT = "keys"
+COMPACT_PREFIX = "c:"  # room prefix of compact-format clients
+WIRE_STATUSES = STATUS_CODES + ("not-started",)
+WIRE_STATUS_INDEX = {s: i for i, s in enumerate(WIRE_STATUSES)}
+EPOCH_CACHE_SIZE = 4096  # last_changed strings remembered before the parse cache is cleared
+OUTBOUND_SIZE = 10000  # rows waiting for the sender before new ones are dropped (resync recovers them)
+SLOW_CLIENT_QUEUE = 2000  # packets queued for one client before it is disconnected
+
+logger = logging.getLogger("emitter")
+
+
+def room_for(tab, compact=False):
+    room = tab or ALL_ROOM
+    return COMPACT_PREFIX + room if compact else room
+
+
+class EmitLog:
+    """
+    Sequence counter plus ring buffer of sent messages; messages are queued for sending under its
+    lock, so clients receive them in seq order.
+    """
+
+    def __init__(self, size=RESYNC_BUFFER, start=None):
+        self.lock = threading.RLock()
+        self.seq = int(time.time() * 1000) if start is None else start
+        self.buffer = deque(maxlen=size)  # (seq, event, payload)
+        self.missing = set()  # mirrored stream: skipped seqs not (yet) known to be coalesced
+
+    def reset(self, seq):
+        # caller holds self.lock
+        self.seq = seq
+        self.buffer.clear()
+        self.missing.clear()
+
+    def append(self, event, payload):
+        # caller holds self.lock
+        self.seq += 1
+        msg = dict(payload, seq=self.seq)
+        self.buffer.append((self.seq, event, msg))
+        return msg
+
+    def record(self, event, msg, covered=()):
+        """
+        Append a message that already carries its seq (mirrored from another process); covered
+        are the seqs the sender coalesced into it (they will never arrive). Skipped seqs stay
+        missing until a later message covers them; since() does not replay across a missing one.
+        False if it is not newer than the last one recorded.
+        """
+        with self.lock:
+            seq = msg.get("seq")
+            if not isinstance(seq, int) or seq <= self.seq:
+                return False
+            if seq - self.seq > self.buffer.maxlen:
+                self.reset(seq - 1)  # too far ahead (or the first message): nothing older can be replayed
+            self.missing.update(range(self.seq + 1, seq))
+            self.missing.difference_update(covered)
+            self.seq = seq
+            self.buffer.append((seq, event, msg))
+            if self.missing:
+                oldest = self.buffer[0][0]
+                self.missing = {s for s in self.missing if s > oldest}
+            return True
+
+    def since(self, seq):
+        """
+        Messages with seq > given seq, or None if some of them have already left the buffer.
+        """
+        with self.lock:
+            if seq >= self.seq:
+                return []
+            if not self.buffer or self.buffer[0][0] > seq + 1:
+                return None
+            if any(s > seq for s in self.missing):
+                return None  # lost in transit (mirror): replaying around it would skip a change
+            return [(event, msg) for s, event, msg in self.buffer if s > seq]
+
+
+class KeyTable:
+    """
+    Interned (checklist, key_id, tab) -> small int index for the compact wire format.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.index = {}  # (checklist, key_id, tab) -> idx
+        self.entries = []  # idx -> [idx, checklist, key_id, tab]
+        self._epochs = {}  # last_changed string -> epoch seconds
+        self.assign = True  # False in a mirror process: indices only come from the publisher (adopt)
+
+    def intern(self, msg):
+        """
+        (idx, entry) for the message's key; entry is None unless the key was seen for the first time.
+        (None, None) for an unknown key when this table does not assign indices.
+        """
+        ident = (msg.get("checklist"), msg.get("key_id"), msg.get("tab"))
+        with self.lock:
+            idx = self.index.get(ident)
+            if idx is not None:
+                return idx, None
+            if not self.assign:
+                return None, None
+            idx = self.index[ident] = len(self.entries)
+            entry = [idx, *ident]
+            self.entries.append(entry)
+            return idx, entry
+
+    def adopt(self, entries):
+        # take over [idx, checklist, key_id, tab] entries assigned by the publishing process
+        with self.lock:
+            for entry in entries:
+                idx, ident = entry[0], tuple(entry[1:4])
+                while len(self.entries) <= idx:
+                    self.entries.append(None)
+                self.entries[idx] = [idx, *ident]
+                self.index[ident] = idx
+
+    def epoch(self, value):
+        with self.lock:
+            ts = self._epochs.get(value)
+            if ts is None:
+                if len(self._epochs) >= EPOCH_CACHE_SIZE:
+                    self._epochs.clear()
+                ts = self._epochs[value] = to_epoch(value)
+            return ts
+
+    def encode(self, msg):
+        """
+        (compact message, new key-table entry or None) for a full update message; (None, None) if the
+        key has no index (see intern).
+        """
+        idx, entry = self.intern(msg)
+        if idx is None:
+            return None, None
+        status = msg.get("status")
+        code = WIRE_STATUS_INDEX.get(status, status)
+        return [msg.get("seq"), idx, code, self.epoch(msg.get("last_changed")), msg.get("last_value")], entry
+
+    def table(self, tab=None):
+        """
+        KEYS_EVENT payload: the status vocabulary and every key (optionally only one tab's keys).
+        """
+        with self.lock:
+            keys = [e for e in self.entries if e is not None and (tab is None or e[3] == tab)]
+        return {"statuses": WIRE_STATUSES, "keys": keys}
+
+
+class Outbound:
+    """
+    Bounded queue between the emitters and the socket, keyed per row: a row updated again before
+    the sender got to it is sent once, with its newest message (counted as coalesced). Rows leave
+    in the order of their newest seq.
+    """
+
+    def __init__(self, size=OUTBOUND_SIZE):
+        self.size = size
+        self.cond = threading.Condition()
+        self.pending = OrderedDict()  # (emitter id, key) -> (emitter, msg)
+        self.sending = False
+        self.sent = self.coalesced = self.dropped = self.errors = self.evicted = 0
+        self.max_depth = 0
+        self.send_time = Histogram()
+        self._thread = None
+
+    def put(self, em, key, msg):
+        """
+        Queue msg for em's row key; False if the queue is full and it was dropped.
+        """
+        slot = (id(em), key)
+        with self.cond:
+            old = self.pending.pop(slot, None)
+            if old is not None:
+                self.coalesced += 1
+                # a copy: msg is also the one kept for resync / snapshots
+                replaced = old[1].get(COALESCED_FIELD, []) + [old[1].get("seq")]
+                msg = dict(msg, **{COALESCED_FIELD: replaced[-COALESCED_MAX:]})
+            elif len(self.pending) >= self.size:
+                self.dropped += 1
+                return False
+            self.pending[slot] = (em, msg)
+            self.max_depth = max(self.max_depth, len(self.pending))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="EmitSender")
+                self._thread.start()
+            self.cond.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.pending:
+                    self.sending = False
+                    self.cond.notify_all()  # wake flush()
+                    self.cond.wait()
+                self.sending = True
+                _, (em, msg) = self.pending.popitem(last=False)
+            t0 = time.perf_counter()
+            try:
+                em._send(msg)
+                self.sent += 1
+            except Exception:
+                self.errors += 1
+                logger.exception("socket emit failed")
+            self.send_time.record(time.perf_counter() - t0)
+
+    def flush(self, timeout=None):
+        """
+        Wait until everything queued has been sent; False on timeout.
+        """
+        with self.cond:
+            return self.cond.wait_for(lambda: not self.pending and not self.sending, timeout)
+
+    def depth(self):
+        with self.cond:
+            return len(self.pending)
+
+    def render_prometheus(self):
+        lines = [
+            "# HELP emit_queue_depth Rows waiting to be sent to the dashboard clients.",
+            "# TYPE emit_queue_depth gauge",
+            f"emit_queue_depth {self.depth()}",
+            "# HELP emit_queue_max_depth Largest emit queue depth seen since start.",
+            "# TYPE emit_queue_max_depth gauge",
+            f"emit_queue_max_depth {self.max_depth}",
+        ]
+        for name, value, text in (
+                ("emit_sent_total", self.sent, "Messages handed to the socket."),
+                ("emit_coalesced_total", self.coalesced, "Messages replaced by a newer one for the same row before sending."),
+                ("emit_dropped_total", self.dropped, "Messages dropped because the emit queue was full."),
+                ("emit_errors_total", self.errors, "Socket emits that raised."),
+                ("emit_slow_clients_evicted_total", self.evicted, "Clients disconnected for not keeping up.")):
+            lines += [f"# HELP {name} {text}", f"# TYPE {name} counter", f"{name} {value}"]
+        lines += ["# HELP emit_send_seconds Time the sender spent per message.", "# TYPE emit_send_seconds histogram"]
+        render_histogram(lines, "emit_send_seconds", _labels(queue="outbound"), self.send_time)
+        return "\n".join(lines) + "\n"
+
+
+emit_log = EmitLog()
+key_table = KeyTable()
+outbound = Outbound()
+_emitters = weakref.WeakSet()
+
+
+class ChangeEmitter:
+    def __init__(self, socketio=None, scope="", event=EVENT, log=emit_log):
+        self.socketio = socketio
+        self.scope = scope  # e.g. "1sec": the same checklist key can exist in both scrapers
+        self.event = event
+        self.log = log
+        self._last = {}  # key -> (payload as given, message as sent)
+        _emitters.add(self)
+
+    def emit(self, key, payload, force=False):
+        """
+        Send payload for key unless it equals the last one sent. Returns the message sent
+        (payload plus "seq") or None when nothing changed.
+        """
+        with self.log.lock:
+            last = self._last.get(key)
+            if not force and last is not None and last[0] == payload:
+                return None
+            msg = self.log.append(self.event, payload)
+            self._last[key] = (dict(payload), msg)
+            if self.socketio:
+                outbound.put(self, key, msg)
+        return msg
+
+    def _send(self, msg):
+        # sender thread only (Outbound)
+        tab = msg.get("tab")
+        if not tab:
+            self.socketio.emit(self.event, msg)
+            return
+        if self.event != EVENT:
+            self.socketio.emit(self.event, msg, to=[tab, ALL_ROOM, room_for(tab, True), room_for(None, True)])
+            return
+        self.socketio.emit(self.event, msg, to=[tab, ALL_ROOM])
+        compact, entry = key_table.encode(msg)
+        if entry is not None:
+            announce_keys(self.socketio, [entry])
+        self.socketio.emit(COMPACT_EVENT, compact, to=[room_for(tab, True), room_for(None, True)])
+
+    def forget(self, key):
+        # key removed from the config: the next payload for it (if any) is sent again
+        with self.log.lock:
+            self._last.pop(key, None)
+
+    def snapshot(self):
+        """
+        Last message sent for every key.
+        """
+        with self.log.lock:
+            return [msg for _, msg in self._last.values()]
+
+
+class MirrorEmitter(ChangeEmitter):
+    """
+    Holds the latest message per row as published by another process; fed from the message queue.
+    """
+
+    def __init__(self, log=emit_log):
+        super().__init__(scope="mirror", log=log)
+        key_table.assign = False  # a local index could collide with one the publisher assigns later
+        with log.lock:
+            log.reset(0)  # every seq now comes from the publisher
+
+    def feed(self, event, msg):
+        if event == KEYS_EVENT and isinstance(msg, dict):
+            key_table.adopt(msg.get("keys") or [])
+        elif isinstance(msg, dict) and "seq" in msg:
+            # rows and alerts share the publisher's seq; only rows are kept per key
+            covered = msg.get(COALESCED_FIELD) or ()
+            if covered:
+                msg = {k: v for k, v in msg.items() if k != COALESCED_FIELD}
+            ident = (msg.get("tab"), msg.get("key_id"), msg.get("checklist"))
+            with self.log.lock:
+                if self.log.record(event, msg, covered) and event == self.event:
+                    payload = {k: v for k, v in msg.items() if k != "seq"}
+                    self._last[ident] = (payload, msg)
+
+    def load(self, state):
+        """
+        Merge export_state() output (the publisher's snapshot file): a row replaces the mirrored one
+        only if it is newer, so loading after live messages arrived (or twice) is harmless.
+        """
+        key_table.adopt(state.get("keys") or [])
+        with self.log.lock:
+            for msg in state.get("rows") or []:
+                ident = (msg.get("tab"), msg.get("key_id"), msg.get("checklist"))
+                last = self._last.get(ident)
+                if last is None or last[1].get("seq", 0) < msg.get("seq", 0):
+                    self._last[ident] = ({k: v for k, v in msg.items() if k != "seq"}, msg)
+            seq = state.get("seq") or 0
+            if seq > self.log.seq:
+                self.log.reset(seq)  # the live messages buffered so far are older than the file
+
+
+def export_state(log=emit_log):
+    """
+    {"seq", "rows", "keys"}: everything a mirror needs to start from this process's current state.
+    """
+    with log.lock:
+        seq, rows = snapshot(log=log)
+        return {"seq": seq, "rows": rows, "keys": key_table.table()["keys"]}
+
+
+def resync(since, tab=None, log=emit_log):
+    """
+    (messages, full) for a client that last saw seq `since`: the missed messages, or, when they are
+    no longer buffered, the current message of every key (full=True). messages is [(event, msg), ...],
+    limited to one tab if given.
+    """
+    with log.lock:
+        missed = log.since(since)
+        full = missed is None
+        if full:
+            missed = [(em.event, msg) for em in list(_emitters) if em.log is log for msg in em.snapshot()]
+            missed.sort(key=lambda m: m[1]["seq"])
+    if tab is not None:
+        missed = [(event, msg) for event, msg in missed if msg.get("tab") == tab]
+    return missed, full
+
+
+def snapshot(tab=None, log=emit_log):
+    """
+    (seq, rows): the current seq and the latest message of every key, oldest first, optionally
+    only rows whose payload "tab" matches.
+    """
+    with log.lock:
+        rows = [msg for em in list(_emitters) if em.log is log and em.event == EVENT for msg in em.snapshot()
+                if tab is None or msg.get("tab") == tab]
+        seq = log.seq
+    rows.sort(key=lambda m: m["seq"])
+    return seq, rows
+
+
+def evict_slow_clients(sio, limit=SLOW_CLIENT_QUEUE):
+    """
+    Disconnect clients whose Engine.IO send queue holds more than limit packets; returns how many.
+    Engine.IO queues per client without a bound, so this keeps a stalled browser from growing server
+    memory; the client reconnects and catches up with resync / the connect snapshot.
+    """
+    eio = getattr(getattr(sio, "server", None), "eio", None)
+    if eio is None:
+        return 0
+    n = 0
+    for sock in list(eio.sockets.values()):
+        q = getattr(sock, "queue", None)
+        if q is not None and not sock.closed and q.qsize() > limit:
+            logger.warning("client %s has %d packets queued; disconnecting it", sock.sid, q.qsize())
+            sock.close(wait=False, abort=True)
+            n += 1
+    outbound.evicted += n
+    return n
+
+
+def announce_keys(sio, entries):
+    """
+    Send new key-table entries to the compact clients of their tab and of every tab.
+    """
+    by_tab = {}
+    for entry in entries:
+        by_tab.setdefault(entry[3], []).append(entry)
+    for tab, keys in by_tab.items():
+        sio.emit(KEYS_EVENT, {"keys": keys}, to=[room_for(tab, True), room_for(None, True)])
+
+
+def encode_messages(messages, sio):
+    """
+    [(event, msg), ...] in the compact format: full updates become COMPACT_EVENT tuples (or stay full
+    updates when the key has no index, in a mirror process). Keys interned here for the first time
+    are announced through sio, since the sender will find them known and not announce them itself;
+    build the key table for the receiving client after calling this.
+    """
+    out, new = [], []
+    for event, msg in messages:
+        if event == EVENT:
+            compact, entry = key_table.encode(msg)
+            if entry is not None:
+                new.append(entry)
+            if compact is not None:
+                out.append((COMPACT_EVENT, compact))
+                continue
+        out.append((event, msg))
+    if new:
+        announce_keys(sio, new)
+    return out
+
+
+def forward_alerts(sio, metrics):
+    """
+    Queue the schedule alerts of metrics (probe_metrics.ScheduleMetrics) for sio like row updates:
+    through Outbound, to the rooms of the scraper's tab (every room for an unknown scraper).
+    """
+    em = ChangeEmitter(sio, scope="schedule", event=ALERT_EVENT)
+
+    def on_alert(alert):
+        em.emit((alert["scraper"], alert["key"]), dict(alert, tab=SCRAPER_TABS.get(alert["scraper"])))
+
+    metrics.on_alert(on_alert)
+    return em
+
+
+def current_seq(log=emit_log):
+    with log.lock:
+        return log.seq
@@ -0,0 +1,93 @@
+# episode_index.py — per-URL index of stale episodes for downtime queries
+# - fed incrementally by the scrapers as stale probes arrive / URLs recover
+# - per key: sorted episode starts/ends plus prefix sums of durations
+# - downtime(key, t0, t1) is O(log n); downtime_all(t0, t1) is O(keys * log n)
+
+import threading
+from bisect import bisect_left, bisect_right
+
+
+class _KeyEpisodes:
+    __slots__ = ("starts", "ends", "cum")
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.cum = [0]  # cum[i] = total duration of episodes [0, i)
+
+
+class EpisodeIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = {}  # key -> _KeyEpisodes
+
+    def observe(self, key, start, end):
+        """
+        Record episode (start, end) for key. Episodes arrive in time order; repeating the
+        start of the newest episode updates its end in place (the episode is still growing).
+        """
+        if start is None:
+            return
+        with self._lock:
+            ke = self._keys.get(key)
+            if ke is None:
+                ke = self._keys[key] = _KeyEpisodes()
+            if ke.starts and ke.starts[-1] == start:
+                ke.ends[-1] = max(ke.ends[-1], end)
+                ke.cum[-1] = ke.cum[-2] + (ke.ends[-1] - start)
+                return
+            if ke.starts and start < ke.starts[-1]:
+                # out-of-order episode (e.g. replayed from an older state file): ignore
+                return
+            ke.starts.append(start)
+            ke.ends.append(end)
+            ke.cum.append(ke.cum[-1] + (end - start))
+
+    def load(self, key, episodes):
+        """
+        Seed key from [(start, end, ...), ...] (e.g. StaleHistory.runs() on startup).
+        """
+        for ep in episodes:
+            self.observe(key, ep[0], ep[1])
+
+    def downtime(self, key, t0=None, t1=None):
+        """
+        Seconds key spent inside stale episodes within [t0, t1] (open-ended if None).
+        """
+        with self._lock:
+            ke = self._keys.get(key)
+            if ke is None or not ke.starts:
+                return 0
+            t0 = ke.starts[0] if t0 is None else t0
+            t1 = ke.ends[-1] if t1 is None else t1
+            if t1 <= t0:
+                return 0
+            i = bisect_right(ke.ends, t0)   # first episode ending after t0
+            j = bisect_left(ke.starts, t1)  # episodes [0, j) start before t1
+            if i >= j:
+                return 0
+            total = ke.cum[j] - ke.cum[i]
+            total -= max(0, t0 - ke.starts[i])      # clip the first episode
+            total -= max(0, ke.ends[j - 1] - t1)     # clip the last episode
+            return max(0, total)
+
+    def episodes(self, key, t0=None, t1=None):
+        """
+        [(start, end), ...] for key overlapping [t0, t1].
+        """
+        with self._lock:
+            ke = self._keys.get(key)
+            if ke is None:
+                return []
+            i = 0 if t0 is None else bisect_right(ke.ends, t0)
+            j = len(ke.starts) if t1 is None else bisect_left(ke.starts, t1)
+            return list(zip(ke.starts[i:j], ke.ends[i:j]))
+
+    def downtime_all(self, t0=None, t1=None):
+        with self._lock:
+            keys = list(self._keys)
+        return {k: self.downtime(k, t0, t1) for k in keys}
+
+    def clear(self):
+        with self._lock:
+            self._keys = {}
@@ -0,0 +1,335 @@
+# fanout.py — out-of-process fan-out of dashboard updates through a message queue
+# - with MONITOR_MESSAGE_QUEUE=<url>, the process running the scrapers (app.py, or run_scrapers.py on its
+#   own) publishes every Socket.IO emit to the queue; any number of dashboard processes
+#   (app.py with MONITOR_ROLE=dashboard) subscribe and deliver to their own clients
+#   (python-socketio PubSubManager, the same mechanism as Flask-SocketIO's message_queue)
+# - redis:// (also amqp://, kafka://, zmq://) use python-socketio's managers and need their client package;
+#   unix:///path/to.sock and tcp://host:port use the small broker in this file: python fanout.py <url>
+# - dashboard processes mirror the update stream into emitter.MirrorEmitter, so the connect snapshot,
+#   /api/snapshot and resync work there too; the publisher writes SNAPSHOT_PATH every SNAPSHOT_INTERVAL
+#   seconds (when something changed) so a dashboard started later begins from the current state
+# - spawn_scrapers() starts run_scrapers.py as a child process: app.py does this in gevent / eventlet
+#   mode, where the scrapers must not run as greenlets on the server's event loop
+
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import struct
+import logging
+import threading
+import subprocess
+
+import socketio
+
+import emitter
+
+CHANNEL = "flask-socketio"  # Flask-SocketIO's default channel, so redis:// peers interoperate
+DEFAULT_QUEUE = "tcp://127.0.0.1:6390"  # local broker address when no queue URL is configured
+BROKER_START_TIMEOUT = 10  # seconds to wait for a broker to accept connections
+SNAPSHOT_PATH = os.path.join("state", "dashboard_snapshot.json")
+SNAPSHOT_INTERVAL = 5  # seconds between snapshot file writes
+RECONNECT_DELAY = 1.0  # seconds between broker reconnect attempts
+SUBSCRIBER_QUEUE = 10000  # frames buffered per subscriber before the broker drops for it
+
+FRAME = struct.Struct("!I")
+ROLE_PUB = b"pub"
+ROLE_SUB = b"sub"
+
+logger = logging.getLogger("fanout")
+
+
+# ---------------- framing ----------------
+def send_frame(sock, data):
+    sock.sendall(FRAME.pack(len(data)) + data)
+
+
+def _recv_exact(sock, n):
+    buf = b""
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        buf += chunk
+    return buf
+
+
+def recv_frame(sock):
+    (n,) = FRAME.unpack(_recv_exact(sock, FRAME.size))
+    return _recv_exact(sock, n)
+
+
+def is_local_url(url):
+    return bool(url) and url.startswith(("unix://", "tcp://"))
+
+
+def _address(url):
+    # unix:///run/monitor.sock -> (AF_UNIX, path); tcp://127.0.0.1:6390 -> (AF_INET, (host, port))
+    if url.startswith("unix://"):
+        return socket.AF_UNIX, url[len("unix://"):]
+    host, _, port = url[len("tcp://"):].rstrip("/").rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def _connect(url, role):
+    family, addr = _address(url)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.connect(addr)
+        send_frame(sock, role)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+# ---------------- broker ----------------
+class Broker:
+    """
+    Relays every frame a publisher sends to all connected subscribers. A subscriber that stops
+    reading only loses its own frames (bounded queue per subscriber); nobody else waits for it.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self._subs = {}  # socket -> queue of frames
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def serve_forever(self):
+        family, addr = _address(self.url)
+        srv = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_UNIX:
+            if os.path.exists(addr):
+                os.remove(addr)  # stale socket from a previous run
+        else:
+            srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        srv.bind(addr)
+        srv.listen(128)
+        logger.info("broker listening on %s", self.url)
+        while True:
+            conn, _ = srv.accept()
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        try:
+            role = recv_frame(conn)
+            if role == ROLE_SUB:
+                self._serve_subscriber(conn)
+            else:
+                while True:
+                    self.publish(recv_frame(conn))
+        except (OSError, ConnectionError, struct.error):
+            pass
+        finally:
+            conn.close()
+
+    def _serve_subscriber(self, conn):
+        q = queue.Queue(maxsize=SUBSCRIBER_QUEUE)
+        with self._lock:
+            self._subs[conn] = q
+        try:
+            while True:
+                send_frame(conn, q.get())
+        finally:
+            with self._lock:
+                self._subs.pop(conn, None)
+
+    def publish(self, frame):
+        with self._lock:
+            subs = list(self._subs.values())
+        for q in subs:
+            try:
+                q.put_nowait(frame)
+            except queue.Full:
+                self.dropped += 1
+
+
+def wait_for_broker(url, timeout=BROKER_START_TIMEOUT):
+    """
+    Wait until a local broker accepts connections; False on timeout.
+    """
+    family, addr = _address(url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.connect(addr)
+            return True
+        except OSError:
+            time.sleep(0.1)
+        finally:
+            sock.close()
+    return False
+
+
+def spawn_scrapers(url, broker=False):
+    """
+    Start run_scrapers.py publishing to url in a child process (also serving the local broker
+    for url if broker is True). Returns the Popen.
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_scrapers.py")
+    args = [sys.executable, script, url, "--attached"] + (["--broker"] if broker else [])
+    # --attached: the child exits when this stdin pipe closes, i.e. whenever this process goes away
+    proc = subprocess.Popen(args, stdin=subprocess.PIPE)
+    logger.info("scrapers started in process %d, publishing to %s", proc.pid, url)
+    return proc
+
+
+# ---------------- python-socketio backend ----------------
+class LocalPubSubManager(socketio.PubSubManager):
+    """
+    PubSubManager over the Broker above (unix:// or tcp:// URL). Messages that cannot be published
+    while the broker is down are dropped (clients recover with resync).
+    """
+
+    name = "local"
+
+    def __init__(self, url, channel=CHANNEL, write_only=False, logger=None, json=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self.url = url
+        self._pub = None
+        self._pub_lock = threading.Lock()
+
+    def _publish(self, data):
+        frame = self.channel.encode() + b"\n" + json.dumps(data, separators=(",", ":")).encode()
+        with self._pub_lock:
+            for attempt in (1, 2):
+                try:
+                    if self._pub is None:
+                        self._pub = _connect(self.url, ROLE_PUB)
+                    send_frame(self._pub, frame)
+                    return
+                except OSError as e:
+                    if self._pub is not None:
+                        self._pub.close()
+                        self._pub = None
+                    if attempt == 2:
+                        logger.warning("publish to %s failed, message dropped: %s", self.url, e)
+
+    def _listen(self):
+        prefix = self.channel.encode() + b"\n"
+        while True:
+            try:
+                sock = _connect(self.url, ROLE_SUB)
+            except OSError:
+                time.sleep(RECONNECT_DELAY)
+                continue
+            try:
+                while True:
+                    frame = recv_frame(sock)
+                    if frame.startswith(prefix):
+                        yield json.loads(frame[len(prefix):])
+            except (OSError, ConnectionError, ValueError):
+                logger.warning("lost broker connection %s; reconnecting", self.url)
+            finally:
+                sock.close()
+
+
+class MirrorMixin:
+    """
+    Feeds every update received from another process into a MirrorEmitter before delivering it.
+    """
+
+    mirror = None
+
+    def _handle_emit(self, message):
+        data = message.get("data")
+        if self.mirror is not None and isinstance(data, list) and len(data) == 1:
+            self.mirror.feed(message.get("event"), data[0])
+        return super()._handle_emit(message)
+
+
+def _manager_class(url):
+    if is_local_url(url):
+        return LocalPubSubManager
+    if url.startswith(("redis://", "rediss://")):
+        return socketio.RedisManager
+    if url.startswith("kafka://"):
+        return socketio.KafkaManager
+    if url.startswith("zmq"):
+        return socketio.ZmqManager
+    return socketio.KombuManager
+
+
+def make_manager(url, write_only=False, mirror=None, channel=CHANNEL):
+    """
+    Client manager for url: pass as SocketIO(client_manager=...) in a dashboard, or use directly
+    (write_only=True) as the scrapers' socketio in a process without a server.
+    """
+    cls = _manager_class(url)
+    if mirror is not None:
+        cls = type("Mirrored" + cls.__name__, (MirrorMixin, cls), {"mirror": mirror})
+    return cls(url, channel=channel, write_only=write_only)
+
+
+def follow(sio, mirror, path=SNAPSHOT_PATH):
+    """
+    Start a dashboard's mirror: subscribe to the queue right away (python-socketio would only start
+    the listener on the first client connection), then merge the publisher's snapshot file, and
+    merge it once more after the next write to cover updates published before the subscription.
+    """
+    server = sio.server
+    if not server.manager_initialized:
+        server.manager_initialized = True
+        server.manager.initialize()
+    load_snapshot(mirror, path)
+
+    def reload_later():
+        sio.sleep(2 * SNAPSHOT_INTERVAL)
+        load_snapshot(mirror, path)
+
+    sio.start_background_task(reload_later)
+
+
+# ---------------- snapshot file ----------------
+def write_snapshot(path=SNAPSHOT_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(emitter.export_state(), f, separators=(",", ":"), ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def load_snapshot(mirror, path=SNAPSHOT_PATH):
+    """
+    Seed mirror from the publisher's snapshot file; False if there is none (yet).
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return False
+    mirror.load(state)
+    return True
+
+
+class SnapshotWriter(threading.Thread):
+    """
+    Rewrites the snapshot file every interval seconds while the emit seq moves.
+    """
+
+    def __init__(self, path=SNAPSHOT_PATH, interval=SNAPSHOT_INTERVAL):
+        super().__init__(daemon=True, name="SnapshotWriter")
+        self.path = path
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+    def run(self):
+        written = None
+        while not self.stop_event.wait(self.interval):
+            seq = emitter.current_seq()
+            if seq == written:
+                continue
+            try:
+                write_snapshot(self.path)
+                written = seq
+            except Exception:
+                logger.exception("snapshot write failed")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    Broker(sys.argv[1] if len(sys.argv) > 1 else os.environ.get("MONITOR_MESSAGE_QUEUE", DEFAULT_QUEUE)).serve_forever()
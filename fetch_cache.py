@@ -0,0 +1,167 @@
+# fetch_cache.py — shared fetch layer for the 1-sec and 1-min scrapers
+# - single-flight: concurrent fetches of the same page with the same load profile share one page load
+#   (the 1-sec load renders briefly and does not retry, the 1-min one waits and retries, so neither
+#   joins the other's load)
+# - short TTL cache of non-empty results so a fresh 1-sec result can be reused by the 1-min cadence;
+#   the 1-sec workers never read it (max_age=0), so a probe is never its own earlier result
+# - PageLoadError is shared by both scrapers, since a leader's exception is re-raised in its followers
+# - one module-level instance (shared_cache) used by both scrapers in the same process
+# - conditional HTTP probe (If-None-Match / If-Modified-Since) and content hashing so
+#   unchanged pages can skip all downstream work
+
+import time
+import hashlib
+import logging
+import threading
+import urllib.request
+import urllib.error
+
+from politeness import politeness
+
+DEFAULT_TTL = 1.0  # seconds a result is considered fresh
+
+logger = logging.getLogger("fetch_cache")
+
+
+class PageLoadError(Exception):
+    pass
+
+
+class _InFlight:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class FetchCache:
+    def __init__(self, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._results = {}   # key -> (fetched_at, value)
+        self._inflight = {}  # key -> _InFlight
+
+        # counters (read without the lock; approximate is fine)
+        self.loads = 0
+        self.hits = 0
+        self.joins = 0
+
+    def get_fresh(self, key, max_age=None):
+        """
+        Return a cached value for key if it is younger than max_age (defaults to ttl), else None.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            hit = self._results.get(key)
+        if hit and time.time() - hit[0] <= max_age:
+            return hit[1]
+        return None
+
+    def fetch(self, key, loader, max_age=None, profile=None):
+        """
+        Return a value for key, calling loader() at most once across concurrent callers.
+        - a fresh cached value (younger than max_age) is returned without loading; max_age=0 never
+          reads the cache (only joins loads in flight)
+        - if another thread is already loading key with the same profile, wait for its result instead
+        - exceptions raised by loader() propagate to every waiting caller
+        Only non-empty results are cached; empty ones are shared with waiters but not kept.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        slot = (key, profile)
+        with self._lock:
+            hit = self._results.get(key)
+            if max_age > 0 and hit and time.time() - hit[0] <= max_age:
+                self.hits += 1
+                return hit[1]
+            call = self._inflight.get(slot)
+            leader = call is None
+            if leader:
+                call = _InFlight()
+                self._inflight[slot] = call
+
+        if not leader:
+            self.joins += 1
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            self.loads += 1
+            call.value = loader()
+            if call.value:
+                with self._lock:
+                    self._results[key] = (time.time(), call.value)
+            return call.value
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(slot, None)
+            call.event.set()
+
+    def invalidate(self, key):
+        with self._lock:
+            self._results.pop(key, None)
+
+
+class ConditionalProbe:
+    """
+    Cheap "has this page changed?" check using HTTP validators.
+    Remembers ETag / Last-Modified per URL and sends them back on the next probe.
+    modified() returns False only on a 304; any error or missing validator counts as modified.
+    """
+
+    def __init__(self, timeout=5):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._validators = {}  # url -> (etag, last_modified)
+
+    def modified(self, url):
+        with self._lock:
+            etag, last_modified = self._validators.get(url, (None, None))
+        req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+        if etag:
+            req.add_header("If-None-Match", etag)
+        if last_modified:
+            req.add_header("If-Modified-Since", last_modified)
+        try:
+            with politeness.slot(url), urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                etag = resp.headers.get("ETag")
+                last_modified = resp.headers.get("Last-Modified")
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return False
+            return True
+        except Exception as e:
+            logger.debug("conditional probe failed for %s: %s", url, e)
+            return True
+        with self._lock:
+            if etag or last_modified:
+                self._validators[url] = (etag, last_modified)
+            else:
+                self._validators.pop(url, None)
+        return True
+
+
+def content_hash(raw):
+    """
+    Short, stable hash of an extracted value (text or list of texts) for change detection.
+    """
+    if raw is None:
+        return None
+    if isinstance(raw, (list, tuple)):
+        raw = "\x1f".join(str(v) for v in raw)
+    return hashlib.blake2b(str(raw).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def fetch_key(url, typ, selector):
+    # the same page with a different selector/type is a different result
+    return (url, typ or "timestamp", selector or "")
+
+
+shared_cache = FetchCache()
+conditional_probe = ConditionalProbe()
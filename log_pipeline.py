@@ -0,0 +1,221 @@
+# log_pipeline.py — non-blocking logging for the scrapers
+# - scraper threads only put records on a bounded in-memory queue (QueueHandler); a QueueListener
+#   thread formats and writes them, so log I/O never blocks a probe (or a thread holding state_lock)
+# - records are never formatted on the calling thread; a full queue drops records instead of waiting
+#   (the drop count is logged once the queue has room again)
+# - JSON lines: {"ts", "level", "logger", "msg", ...fields}; pass structured data as extra={"fields": {...}}
+# - rate limiting: records carrying extra rate_key / rate_sig are written when rate_sig changes for
+#   that key, otherwise at most once per RATE_WINDOW seconds (the next written line reports "suppressed")
+# - file rotation at midnight and whenever the file exceeds MAX_BYTES
+
+import os
+import re
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+QUEUE_SIZE = 10000  # records buffered before new ones are dropped
+RATE_WINDOW = 60  # seconds; a repeated record (same rate_key and rate_sig) is written at most this often
+MAX_BYTES = 20 * 1024 * 1024  # size-based rotation threshold
+BACKUP_COUNT = 14  # rotated files kept
+ROTATE_WHEN = "midnight"
+
+_listeners = {}  # log path -> (QueueListener, queue)
+_lock = threading.Lock()
+
+
+# ---------------- formatting ----------------
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        doc = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            doc.update(fields)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            doc["suppressed"] = suppressed
+        if record.exc_info:
+            doc["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            doc["exc"] = record.exc_text
+        return json.dumps(doc, default=str, ensure_ascii=False)
+
+
+# ---------------- filtering ----------------
+class RateLimitFilter(logging.Filter):
+    """
+    Passes records without a rate_key untouched. For records with one, passes the record if its
+    rate_sig differs from the last one passed for that key or RATE_WINDOW has elapsed; otherwise
+    drops it and counts it against the key.
+    """
+
+    def __init__(self, window=RATE_WINDOW):
+        super().__init__()
+        self.window = window
+        self._last = {}  # rate_key -> [rate_sig, passed_at, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, "rate_key", None)
+        if key is None:
+            return True
+        sig = getattr(record, "rate_sig", None)
+        now = record.created
+        with self._lock:
+            st = self._last.get(key)
+            if st is not None and st[0] == sig and now - st[1] < self.window:
+                st[2] += 1
+                return False
+            record.suppressed = st[2] if st is not None else 0
+            self._last[key] = [sig, now, 0]
+        return True
+
+
+def emit_log_extra(key, payload):
+    """
+    extra= for a scraper EMIT line: payload as a structured field, rate-limited per key so the
+    per-second heartbeat only logs a URL when its status / last change moves (or once a window).
+    """
+    return {
+        "fields": {"event": "emit", "key": key, "payload": payload},
+        "rate_key": ("emit", key),
+        "rate_sig": (payload.get("status"), payload.get("last_changed")),
+    }
+
+
+# ---------------- handlers ----------------
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that neither formats on the caller's thread nor waits on a full queue.
+    """
+
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # in-process queue: hand over the record as is (message args are formatted by the listener);
+        # only a traceback has to be rendered now, while it still exists
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.dropped:
+            n, self.dropped = self.dropped, 0
+            note = logging.LogRecord(record.name, logging.WARNING, __file__, 0,
+                                     "log queue full: %d record(s) dropped", (n,), None)
+            try:
+                self.queue.put_nowait(note)
+            except queue.Full:
+                self.dropped += n
+
+
+class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """
+    Rotates at the timed boundary (ROTATE_WHEN) and also whenever the file would exceed max_bytes.
+    Rotated files are named <file>.<YYYY-mm-dd_HH-MM-SS>.
+    """
+
+    def __init__(self, filename, max_bytes=MAX_BYTES, when=ROTATE_WHEN, backup_count=BACKUP_COUNT, encoding="utf-8"):
+        super().__init__(filename, when=when, backupCount=backup_count, encoding=encoding, delay=True)
+        self.max_bytes = max_bytes
+        self.suffix = "%Y-%m-%d_%H-%M-%S"
+        self.extMatch = re.compile(r"^\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}(\.\d+)?$", re.ASCII)
+        self._size_rollover = False
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            self._size_rollover = False
+            return True
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            if self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes:
+                self._size_rollover = True
+                return True
+        return False
+
+    def doRollover(self):
+        if not self._size_rollover:
+            super().doRollover()
+            return
+        # size rollover inside the current period: name the file after "now", keep the timed schedule
+        self._size_rollover = False
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        dfn = self.rotation_filename(self.baseFilename + "." + time.strftime(self.suffix))
+        n = 1
+        while os.path.exists(dfn):
+            dfn = self.rotation_filename(f"{self.baseFilename}.{time.strftime(self.suffix)}.{n}")
+            n += 1
+        self.rotate(self.baseFilename, dfn)
+        if self.backupCount > 0:
+            for old in self.getFilesToDelete():
+                os.remove(old)
+        self.stream = self._open()
+
+
+# ---------------- setup ----------------
+def _listener_for(path, json_lines, max_bytes, when, backup_count):
+    with _lock:
+        entry = _listeners.get(path)
+        if entry is None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            fh = SizedTimedRotatingFileHandler(path, max_bytes=max_bytes, when=when, backup_count=backup_count)
+            fh.setFormatter(JsonFormatter() if json_lines
+                            else logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+            q = queue.Queue(maxsize=QUEUE_SIZE)
+            listener = QueueListener(q, fh, respect_handler_level=True)
+            listener.start()
+            entry = _listeners[path] = (listener, q)
+        return entry[1]
+
+
+def attach(logger, path, json_lines=True, max_bytes=MAX_BYTES, when=ROTATE_WHEN, backup_count=BACKUP_COUNT,
+           rate_window=RATE_WINDOW):
+    """
+    Route logger through the queue pipeline writing to path. Safe to call more than once.
+    """
+    path = os.path.abspath(path)
+    for h in logger.handlers:
+        if isinstance(h, NonBlockingQueueHandler) and getattr(h, "log_path", None) == path:
+            return h
+    qh = NonBlockingQueueHandler(_listener_for(path, json_lines, max_bytes, when, backup_count))
+    qh.log_path = path
+    qh.addFilter(RateLimitFilter(rate_window))
+    logger.addHandler(qh)
+    return qh
+
+
+def shutdown():
+    """
+    Drain the queues and stop the listener threads (registered with atexit).
+    """
+    with _lock:
+        entries = list(_listeners.values())
+        _listeners.clear()
+    for listener, _ in entries:
+        listener.stop()
+        for h in listener.handlers:
+            h.close()
+
+
+atexit.register(shutdown)
@@ -0,0 +1,244 @@
+# monitor_record.py — per-URL monitor state shared by the 1-sec and 1-min scrapers
+# - one __slots__ record instead of a dict normalised with setdefault on every update
+# - timestamps held as epoch ints (0 = never); formatted only when emitted
+# - to_json / from_json read legacy state files that stored "YYYY-MM-DD HH:MM:SS" strings
+# - stale history is a fixed-size ring of stale episodes {start, end, max_lag, probes} (StaleHistory),
+#   maintained incrementally, so state size stays constant however long a URL stays stale
+
+import time
+from array import array
+from datetime import datetime
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+STALE_HISTORY_CAPACITY = 64  # stale episodes kept per URL; older ones only survive in the counters
+STALE_RUN_GAP = 120  # seconds; a stale probe further than this from the previous one opens a new episode
+EPISODE_FIELDS = ("start", "end", "max_lag", "probes")
+
+
+def to_epoch(value):
+    """
+    Epoch seconds from an int/float or a legacy formatted string; 0 if missing/unparseable.
+    """
+    if not value:
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        return int(datetime.strptime(value, TS_FORMAT).timestamp())
+    except (TypeError, ValueError):
+        return 0
+
+
+def format_epoch(ts):
+    return datetime.fromtimestamp(ts).strftime(TS_FORMAT) if ts else ""
+
+
+class StaleHistory:
+    """
+    Ring buffer of stale episodes stored as epoch-int arrays, one slot per episode:
+    start (first stale probe), end (last stale probe, or recovery time once closed),
+    max_lag (worst lag in seconds seen during the episode) and probes (stale probes counted).
+    - add() extends the open episode, or opens a new one if the last one is closed or more
+      than `gap` seconds old; when the ring is full the oldest episode is overwritten
+    - close() ends the open episode at the time the URL recovered
+    total/runs_total count every stale probe / episode ever added.
+    """
+    __slots__ = ("capacity", "starts", "ends", "lags", "probes", "head", "size", "open", "total", "runs_total")
+
+    def __init__(self, capacity=STALE_HISTORY_CAPACITY):
+        self.capacity = capacity
+        self.starts = array("q", [0]) * capacity
+        self.ends = array("q", [0]) * capacity
+        self.lags = array("q", [0]) * capacity
+        self.probes = array("l", [0]) * capacity
+        self.head = 0  # index of the oldest episode
+        self.size = 0
+        self.open = False  # newest episode still running
+        self.total = 0
+        self.runs_total = 0
+
+    def _last(self):
+        return (self.head + self.size - 1) % self.capacity
+
+    def add(self, ts, lag=0, gap=STALE_RUN_GAP):
+        """
+        Record one stale probe; returns the (start, end) of the episode it belongs to.
+        """
+        ts = int(ts)
+        lag = int(lag or 0)
+        self.total += 1
+        if self.size and self.open:
+            i = self._last()
+            if 0 <= ts - self.ends[i] <= gap:
+                self.ends[i] = ts
+                self.probes[i] += 1
+                if lag > self.lags[i]:
+                    self.lags[i] = lag
+                return self.starts[i], ts
+        if self.size < self.capacity:
+            i = (self.head + self.size) % self.capacity
+            self.size += 1
+        else:
+            i = self.head
+            self.head = (self.head + 1) % self.capacity
+        self.starts[i] = ts
+        self.ends[i] = ts
+        self.lags[i] = lag
+        self.probes[i] = 1
+        self.open = True
+        self.runs_total += 1
+        return ts, ts
+
+    def close(self, ts):
+        """
+        End the open episode at ts (first good probe); returns its (start, end) or None.
+        """
+        if not (self.size and self.open):
+            return None
+        i = self._last()
+        self.open = False
+        self.ends[i] = max(self.ends[i], int(ts))
+        return self.starts[i], self.ends[i]
+
+    def runs(self):
+        """
+        [(start, end, max_lag, probes), ...] oldest first.
+        """
+        out = []
+        for n in range(self.size):
+            i = (self.head + n) % self.capacity
+            out.append((self.starts[i], self.ends[i], self.lags[i], self.probes[i]))
+        return out
+
+    def episodes(self):
+        return [dict(zip(EPISODE_FIELDS, r)) for r in self.runs()]
+
+    def last_ts(self):
+        return self.ends[self._last()] if self.size else 0
+
+    def __len__(self):
+        return self.total
+
+    def to_json(self):
+        return {
+            "runs": [list(r) for r in self.runs()],  # [start, end, max_lag, probes]
+            "open": self.open,
+            "total": self.total,
+            "runs_total": self.runs_total,
+        }
+
+    @classmethod
+    def from_json(cls, d, capacity=STALE_HISTORY_CAPACITY):
+        h = cls(capacity)
+        if isinstance(d, list):
+            # legacy state: plain list of stale timestamps
+            for v in d:
+                ts = to_epoch(v)
+                if ts:
+                    h.add(ts)
+            return h
+        if not isinstance(d, dict):
+            return h
+        for r in (d.get("runs") or [])[-capacity:]:
+            try:
+                r = [int(x) for x in r]
+            except (TypeError, ValueError):
+                continue
+            if len(r) == 3:
+                # runs written before max_lag was tracked: [start, end, probes]
+                r = [r[0], r[1], 0, r[2]]
+            if len(r) != 4:
+                continue
+            i = (h.head + h.size) % capacity
+            h.starts[i], h.ends[i], h.lags[i], h.probes[i] = r
+            h.size += 1
+        h.open = bool(d.get("open", h.size > 0))
+        h.total = max(int(d.get("total") or 0), sum(h.probes[:h.size]))
+        h.runs_total = max(int(d.get("runs_total") or 0), h.size)
+        return h
+
+
+class MonitorRecord:
+    __slots__ = (
+        "last_value",
+        "value_hash",
+        "stale_count",
+        "last_changed",
+        "stale_history",
+        "completed",
+        "status",
+    )
+
+    def __init__(self, last_value=None, value_hash=None, stale_count=0, last_changed=0,
+                 stale_history=None, completed=False, status="not-started"):
+        self.last_value = last_value
+        self.value_hash: str | None = value_hash
+        self.stale_count: int = stale_count
+        self.last_changed: int = last_changed
+        self.stale_history: StaleHistory = stale_history if stale_history is not None else StaleHistory()
+        self.completed: bool = completed
+        self.status: str = status
+
+    def mark_changed(self, raw, value_hash=None, now=None):
+        self.last_value = raw
+        self.value_hash = value_hash
+        self.stale_count = 0
+        self.last_changed = int(now or time.time())
+        self.completed = False
+
+    def add_stale(self, now=None, lag=0, gap=STALE_RUN_GAP):
+        return self.stale_history.add(now or time.time(), lag, gap)
+
+    def end_stale(self, now=None):
+        return self.stale_history.close(now or time.time())
+
+    def last_changed_str(self):
+        return format_epoch(self.last_changed)
+
+    def to_json(self):
+        return {
+            "last_value": self.last_value,
+            "value_hash": self.value_hash,
+            "stale_count": self.stale_count,
+            "last_changed": self.last_changed,
+            "stale_history": self.stale_history.to_json(),
+            "completed": self.completed,
+            "status": self.status,
+        }
+
+    @classmethod
+    def from_json(cls, d):
+        if not isinstance(d, dict):
+            return cls()
+        return cls(
+            last_value=d.get("last_value"),
+            value_hash=d.get("value_hash"),
+            stale_count=int(d.get("stale_count") or 0),
+            last_changed=to_epoch(d.get("last_changed")),
+            stale_history=StaleHistory.from_json(d.get("stale_history", d.get("stale_times"))),
+            completed=bool(d.get("completed", False)),
+            status=d.get("status") or "not-started",
+        )
+
+    def __repr__(self):
+        return f"MonitorRecord(status={self.status!r}, last_value={self.last_value!r}, last_changed={self.last_changed})"
+
+
+# ---------------- state dict helpers ----------------
+def records_from_json(data, keys):
+    """
+    Build {key: MonitorRecord} for every configured key from a loaded state file (or {}).
+    """
+    data = data if isinstance(data, dict) else {}
+    return {k: MonitorRecord.from_json(data.get(k)) for k in keys}
+
+
+def records_to_json(records):
+    return {k: r.to_json() for k, r in records.items()}
+
+
+def get_record(records, key):
+    rec = records.get(key)
+    if rec is None:
+        rec = records[key] = MonitorRecord()
+    return rec
@@ -0,0 +1,217 @@
+# politeness.py — per-host request pacing shared by the 1-sec and 1-min scrapers
+# - every page load (driver.get) and conditional HTTP check takes a slot from its host's HostLimiter:
+#   starts at least spacing seconds apart, a token bucket of rate requests/s with burst tokens and,
+#   if max_concurrent is set, at most that many requests in flight; a request waits for its slot
+#   instead of failing. The slot covers the request only: callers release it before rendering / parsing
+# - max_concurrent is off (0) by default: every URL of a scraper is usually on one host, and a cap
+#   below the number of workers would serialise them behind page loads rather than pace the starts
+# - limits are per host (urlparse netloc) and shared process-wide, so a startup burst, a day rotation
+#   or both scrapers hitting the same site at once are smoothed instead of sent together
+# - optional config/politeness.json {"default": {...}, "<host>": {...}} overrides DEFAULT_LIMITS;
+#   it is re-read when it changes (ConfigWatcher)
+# - phase_offset() / spread_offset() place probes across their interval instead of on the same
+#   second boundary
+# - per-host wait histograms, request counters and in-flight gauges on /metrics
+
+import os
+import json
+import time
+import zlib
+import logging
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from probe_metrics import Histogram, render_histogram, _labels
+from config_watcher import ConfigWatcher
+
+CONFIG_PATH = os.path.join("config", "politeness.json")
+
+DEFAULT_LIMITS = {
+    "rate": 50.0,          # requests per second (token refill rate)
+    "burst": 10,           # tokens available at once
+    "max_concurrent": 0,   # requests in flight; 0 = no cap (starts are still paced by rate / spacing)
+    "spacing": 0.01,       # seconds between request starts
+}
+
+WAIT_METRIC = "host_wait_seconds"
+REQUESTS_METRIC = "host_requests_total"
+IN_FLIGHT_METRIC = "host_requests_in_flight"
+
+logger = logging.getLogger("politeness")
+
+
+def host_of(url):
+    return urlparse(url or "").netloc.lower() or "-"
+
+
+def phase_offset(key, interval):
+    """
+    Stable offset in [0, interval) for key: a per-URL loop starting at now + offset keeps its probes
+    at the same point of every interval, and different keys land at different points.
+    """
+    return (zlib.crc32(str(key).encode("utf-8")) / 2 ** 32) * interval
+
+
+def spread_offset(index, count, window):
+    """
+    Offset of the index-th of count probes spread evenly over window seconds (sequential loops).
+    """
+    return window * index / count if count > 0 else 0.0
+
+
+class HostLimiter:
+    """
+    Optional concurrency cap, start spacing and token bucket for one host. Slots are reserved in
+    order under a lock, then waited for outside it. clock / sleep are injectable for tests.
+    """
+
+    def __init__(self, rate, burst, max_concurrent, spacing, clock=time.monotonic, sleep=time.sleep):
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._clock = clock
+        self._sleep = sleep
+        self.in_flight = 0
+        self.requests = 0
+        self.wait = Histogram()
+        self._next_start = 0.0
+        self._updated = clock()
+        self.configure(rate, burst, max_concurrent, spacing)
+        self._tokens = float(self.burst)
+
+    def configure(self, rate, burst, max_concurrent, spacing):
+        with self._cond:
+            self.rate = max(float(rate), 1e-6)
+            self.burst = max(float(burst), 1.0)
+            self.max_concurrent = max(int(max_concurrent or 0), 0)  # 0: no cap
+            self.spacing = max(float(spacing), 0.0)
+            self._cond.notify_all()
+
+    def acquire(self):
+        """
+        Block until this request may start; returns the seconds waited.
+        """
+        t0 = self._clock()
+        with self._cond:
+            while self.max_concurrent and self.in_flight >= self.max_concurrent:
+                self._cond.wait()
+            self.in_flight += 1
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # a negative balance is a reservation: the token for this request arrives later
+            start = max(now, self._next_start, now - self._tokens / self.rate if self._tokens < 0 else now)
+            self._next_start = start + self.spacing
+        delay = start - self._clock()
+        if delay > 0:
+            self._sleep(delay)
+        waited = self._clock() - t0
+        self.wait.record(waited)
+        self.requests += 1
+        return waited
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+
+class Politeness:
+    """
+    HostLimiter per host, created on first use with the configured limits.
+    """
+
+    def __init__(self, defaults=DEFAULT_LIMITS):
+        self._lock = threading.Lock()
+        self._defaults = dict(defaults)
+        self._overrides = {}  # host -> limits
+        self._hosts = {}  # host -> HostLimiter
+        self._watcher = None
+
+    def limits_for(self, host):
+        return {**self._defaults, **self._overrides.get(host, {})}
+
+    def limiter(self, url):
+        host = host_of(url)
+        lim = self._hosts.get(host)
+        if lim is None:
+            with self._lock:
+                lim = self._hosts.get(host)
+                if lim is None:
+                    lim = self._hosts[host] = HostLimiter(**self.limits_for(host))
+        return lim
+
+    @contextmanager
+    def slot(self, url):
+        """
+        with politeness.slot(url) as waited: ... — holds one of the host's request slots.
+        """
+        lim = self.limiter(url)
+        waited = lim.acquire()
+        try:
+            yield waited
+        finally:
+            lim.release()
+
+    def configure(self, defaults=None, hosts=None):
+        """
+        Replace the default / per-host limits; existing limiters pick up the new values.
+        """
+        with self._lock:
+            if defaults is not None:
+                self._defaults = {**DEFAULT_LIMITS, **{k: v for k, v in defaults.items() if k in DEFAULT_LIMITS}}
+            if hosts is not None:
+                self._overrides = {h.lower(): {k: v for k, v in l.items() if k in DEFAULT_LIMITS}
+                                   for h, l in hosts.items() if isinstance(l, dict)}
+            limiters = list(self._hosts.items())
+        for host, lim in limiters:
+            lim.configure(**self.limits_for(host))
+
+    def load(self, path=CONFIG_PATH):
+        """
+        Apply config/politeness.json if present; a missing file means the built-in defaults.
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cfg = json.load(f)
+        except FileNotFoundError:
+            cfg = {}
+        except (OSError, ValueError) as e:
+            logger.error("politeness config %s not loaded: %s", path, e)
+            return False
+        self.configure(defaults=cfg.get("default", {}),
+                       hosts={h: l for h, l in cfg.items() if h != "default"})
+        return True
+
+    def watch(self, path=CONFIG_PATH):
+        """
+        Load the config and keep following it; safe to call from both scrapers.
+        """
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = ConfigWatcher([path], lambda: self.load(path), name="politeness-watcher")
+        self.load(path)
+        self._watcher.start()
+
+    def items(self):
+        with self._lock:
+            return sorted(self._hosts.items())
+
+    def render_prometheus(self):
+        items = self.items()
+        lines = [
+            f"# HELP {WAIT_METRIC} Time requests waited for a slot on their host (politeness limits).",
+            f"# TYPE {WAIT_METRIC} histogram",
+        ]
+        for host, lim in items:
+            render_histogram(lines, WAIT_METRIC, _labels(host=host), lim.wait)
+        lines += [f"# HELP {REQUESTS_METRIC} Requests started per host.", f"# TYPE {REQUESTS_METRIC} counter"]
+        lines += [f"{REQUESTS_METRIC}{{{_labels(host=h)}}} {lim.requests}" for h, lim in items]
+        lines += [f"# HELP {IN_FLIGHT_METRIC} Requests in flight per host.", f"# TYPE {IN_FLIGHT_METRIC} gauge"]
+        lines += [f"{IN_FLIGHT_METRIC}{{{_labels(host=h)}}} {lim.in_flight}" for h, lim in items]
+        return "\n".join(lines) + "\n"
+
+
+politeness = Politeness()
@@ -0,0 +1,305 @@
+# probe_metrics.py — per-probe latency histograms for the scrapers
+# - one histogram per (scraper, url key, phase); phases: acquire, throttle (politeness wait), get, render,
+#   extract, parse, state, emit
+# - HDR-style buckets: power-of-two octaves split into linear sub-buckets, so recording is a
+#   frexp + two integer ops and relative error stays within 1/SUB_BUCKETS at any scale
+# - render_prometheus() writes the Prometheus text format (served by app.py on /metrics)
+# - ScheduleMetrics: intended vs actual start of every scheduler tick, per URL; lateness histograms,
+#   skipped-tick counters and a "late" alert when lateness exceeds LATE_ALERT_FRACTION of the interval
+
+import math
+import time
+import logging
+import threading
+
+PHASES = ("acquire", "throttle", "get", "render", "extract", "parse", "state", "emit")
+
+MIN_EXP = -14  # smallest tracked octave starts at 2**-14 s (~61 us); faster values land in bucket 0
+MAX_EXP = 8    # largest tracked octave ends at 2**8 s (256 s); slower values go to an overflow slot
+SUB_BUCKETS = 4
+N_BUCKETS = (MAX_EXP - MIN_EXP) * SUB_BUCKETS
+
+METRIC_NAME = "probe_phase_seconds"
+LATENESS_METRIC = "tick_lateness_seconds"
+SKIPPED_METRIC = "ticks_skipped_total"
+LATE_METRIC = "tick_late"
+
+LATE_ALERT_FRACTION = 0.5  # a tick starting later than this fraction of its interval raises the alert
+
+logger = logging.getLogger("probe_metrics")
+
+
+def bucket_index(seconds):
+    if seconds <= 0:
+        return 0
+    m, e = math.frexp(seconds)  # seconds = m * 2**e, 0.5 <= m < 1
+    idx = (e - 1 - MIN_EXP) * SUB_BUCKETS + int((m * 2 - 1) * SUB_BUCKETS)
+    if idx < 0:
+        return 0
+    return min(idx, N_BUCKETS)  # N_BUCKETS = overflow slot (only counted under le="+Inf")
+
+
+def bucket_upper(idx):
+    octave, sub = divmod(idx, SUB_BUCKETS)
+    return 2.0 ** (MIN_EXP + octave) * (1 + (sub + 1) / SUB_BUCKETS)
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum", "max", "_lock")
+
+    def __init__(self):
+        self.counts = [0] * (N_BUCKETS + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        idx = bucket_index(seconds)
+        with self._lock:
+            self.counts[idx] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.count, self.sum, self.max
+
+    def percentile(self, q):
+        """
+        Upper bound of the bucket holding the q-th percentile (0-100); None when empty.
+        """
+        counts, n, _, mx = self.snapshot()
+        if not n:
+            return None
+        rank = max(1, math.ceil(n * q / 100.0))
+        seen = 0
+        for idx, c in enumerate(counts):
+            seen += c
+            if seen >= rank:
+                return mx if idx == N_BUCKETS else min(bucket_upper(idx), mx)
+        return mx
+
+
+class _Timer:
+    __slots__ = ("hist", "t0")
+
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.record(time.perf_counter() - self.t0)
+        return False
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(**kv):
+    return ",".join(f'{k}="{_label(v)}"' for k, v in kv.items())
+
+
+# cumulative buckets are exported at octave boundaries only (le = 2**e) to keep the series count down
+_EXPORT_BOUNDS = [(2.0 ** (MIN_EXP + o + 1), (o + 1) * SUB_BUCKETS) for o in range(MAX_EXP - MIN_EXP)]
+
+
+def render_histogram(lines, name, labels, hist):
+    counts, n, total, _ = hist.snapshot()
+    cum = 0
+    prev = 0
+    for le, upto in _EXPORT_BOUNDS:
+        cum += sum(counts[prev:upto])
+        prev = upto
+        lines.append(f'{name}_bucket{{{labels},le="{le:.9g}"}} {cum}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {n}')
+    lines.append(f"{name}_sum{{{labels}}} {total:.9g}")
+    lines.append(f"{name}_count{{{labels}}} {n}")
+
+
+class ProbeMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hists = {}  # (scraper, key, phase) -> Histogram
+
+    def histogram(self, scraper, key, phase):
+        k = (scraper, key, phase)
+        h = self._hists.get(k)
+        if h is None:
+            with self._lock:
+                h = self._hists.setdefault(k, Histogram())
+        return h
+
+    def observe(self, scraper, key, phase, seconds):
+        self.histogram(scraper, key, phase).record(seconds)
+
+    def timer(self, scraper, key, phase):
+        """
+        Context manager recording the elapsed time of its block.
+        """
+        return _Timer(self.histogram(scraper, key, phase))
+
+    def items(self):
+        with self._lock:
+            return sorted(self._hists.items())
+
+    def percentiles(self, pcts=(50, 99)):
+        """
+        {(scraper, key, phase): {p: seconds}} for every histogram with data.
+        """
+        return {k: {p: h.percentile(p) for p in pcts} for k, h in self.items() if h.count}
+
+    def render_prometheus(self):
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent in each phase of a probe, per scraper and URL key.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        for (scraper, key, phase), h in self.items():
+            render_histogram(lines, METRIC_NAME, _labels(scraper=scraper, url=key, phase=phase), h)
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._hists = {}
+
+
+class _TickStats:
+    __slots__ = ("lateness", "skipped", "late", "interval")
+
+    def __init__(self):
+        self.lateness = Histogram()
+        self.skipped = 0
+        self.late = False
+        self.interval = None
+
+
+class ScheduleMetrics:
+    """
+    Scheduler telemetry per (scraper, key). Listeners added with on_alert() are called as
+    fn(alert_dict) when a key turns late and when it recovers.
+    """
+
+    def __init__(self, alert_fraction=LATE_ALERT_FRACTION):
+        self.alert_fraction = alert_fraction
+        self._lock = threading.Lock()
+        self._stats = {}  # (scraper, key) -> _TickStats
+        self._listeners = []
+
+    def _get(self, scraper, key):
+        k = (scraper, key)
+        st = self._stats.get(k)
+        if st is None:
+            with self._lock:
+                st = self._stats.setdefault(k, _TickStats())
+        return st
+
+    def on_alert(self, fn):
+        self._listeners.append(fn)
+
+    def tick(self, scraper, key, intended, actual, interval):
+        """
+        Record one tick that was due at intended and started at actual (epoch seconds).
+        Returns the lateness in seconds.
+        """
+        lateness = max(0.0, actual - intended)
+        st = self._get(scraper, key)
+        st.interval = interval
+        st.lateness.record(lateness)
+        late = lateness > self.alert_fraction * interval
+        if late != st.late:
+            st.late = late
+            self._alert(scraper, key, late, lateness, interval)
+        return lateness
+
+    def skip(self, scraper, key, n, log=True):
+        if n > 0:
+            st = self._get(scraper, key)
+            with self._lock:
+                st.skipped += n
+            if log:
+                logger.warning("[%s %s] schedule fell behind: %d tick(s) skipped", scraper, key, n)
+
+    def advance(self, scraper, key, next_run, interval, max_behind):
+        """
+        Next due time after a tick that was due at next_run. When that is more than max_behind in
+        the past the schedule is snapped to now + interval and the dropped ticks are counted.
+        Returns (next_run, skipped).
+        """
+        next_run += interval
+        now = time.time()
+        if next_run >= now - max_behind:
+            return next_run, 0
+        skipped = int((now + interval - next_run) // interval)
+        self.skip(scraper, key, skipped)
+        return now + interval, skipped
+
+    def _alert(self, scraper, key, late, lateness, interval):
+        alert = {
+            "scraper": scraper,
+            "key": key,
+            "state": "late" if late else "recovered",
+            "lateness": round(lateness, 3),
+            "interval": interval,
+            "at": time.time(),
+        }
+        if late:
+            logger.warning("[%s %s] tick started %.3fs late (interval %ss)", scraper, key, lateness, interval)
+        else:
+            logger.info("[%s %s] schedule back on time", scraper, key)
+        for fn in list(self._listeners):
+            try:
+                fn(alert)
+            except Exception:
+                logger.exception("schedule alert listener failed")
+
+    def items(self):
+        with self._lock:
+            return sorted(self._stats.items())
+
+    def snapshot(self, pcts=(50, 99)):
+        """
+        [{scraper, key, interval, ticks, skipped, late, lateness_p50, lateness_p99, lateness_max}, ...]
+        """
+        out = []
+        for (scraper, key), st in self.items():
+            _, n, _, mx = st.lateness.snapshot()
+            row = {"scraper": scraper, "key": key, "interval": st.interval, "ticks": n,
+                   "skipped": st.skipped, "late": st.late, "lateness_max": mx}
+            for p in pcts:
+                row[f"lateness_p{p}"] = st.lateness.percentile(p)
+            out.append(row)
+        return out
+
+    def render_prometheus(self):
+        items = self.items()
+        lines = [
+            f"# HELP {LATENESS_METRIC} How late each scheduler tick started versus its intended time.",
+            f"# TYPE {LATENESS_METRIC} histogram",
+        ]
+        for (scraper, key), st in items:
+            render_histogram(lines, LATENESS_METRIC, _labels(scraper=scraper, url=key), st.lateness)
+        lines += [
+            f"# HELP {SKIPPED_METRIC} Scheduler ticks dropped because the schedule fell too far behind.",
+            f"# TYPE {SKIPPED_METRIC} counter",
+        ]
+        lines += [f"{SKIPPED_METRIC}{{{_labels(scraper=s, url=k)}}} {st.skipped}" for (s, k), st in items]
+        lines += [
+            f"# HELP {LATE_METRIC} 1 while the last tick started later than the alert fraction of its interval.",
+            f"# TYPE {LATE_METRIC} gauge",
+        ]
+        lines += [f"{LATE_METRIC}{{{_labels(scraper=s, url=k)}}} {int(st.late)}" for (s, k), st in items]
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._stats = {}
+
+
+probe_metrics = ProbeMetrics()
+schedule_metrics = ScheduleMetrics()
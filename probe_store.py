@@ -0,0 +1,331 @@
+# probe_store.py — SQLite time-series store for every probe made by the scrapers
+# - one row per probe: (key, ts, status, latency, value_hash)
+# - WAL mode; rows queued by the scraper threads and inserted in batches by one writer thread
+# - the queue is bounded: when the writer falls behind new rows are dropped and counted; a crashed
+#   writer is logged and restarted, and shows as unhealthy on /ready until it writes again
+# - index on (key, ts) for range queries; per-minute rollup table for multi-day trends
+# - maintenance (downsample + retention) runs from the writer thread once an hour
+
+import os
+import time
+import queue
+import sqlite3
+import logging
+import threading
+
+STATE_DIR = "state"
+DB_PATH = os.path.join(STATE_DIR, "probes.sqlite3")
+
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 1.0  # seconds between batch commits
+QUEUE_SIZE = 50000  # probe rows buffered for the writer before new ones are dropped
+RESTART_DELAY = 5  # seconds before a crashed writer loop is restarted
+MAINTENANCE_INTERVAL = 3600  # seconds
+RAW_RETENTION_DAYS = 7  # raw probe rows kept this long, then only the rollup remains
+ROLLUP_RETENTION_DAYS = 180
+ROLLUP_BUCKET = 60  # seconds per rollup row
+FETCH_CHUNK = 5000  # rows per fetchmany() when streaming a range
+
+logger = logging.getLogger("probe_store")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS probes (
+    key TEXT NOT NULL,
+    ts REAL NOT NULL,
+    status TEXT NOT NULL,
+    latency REAL,
+    value_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_probes_key_ts ON probes (key, ts);
+CREATE INDEX IF NOT EXISTS idx_probes_ts ON probes (ts);
+CREATE TABLE IF NOT EXISTS probes_rollup (
+    key TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    ok INTEGER NOT NULL,
+    stale INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    latency_sum REAL NOT NULL,
+    latency_max REAL NOT NULL,
+    PRIMARY KEY (key, bucket)
+);
+"""
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ProbeStore:
+    def __init__(self, path=DB_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, queue_size=QUEUE_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._flushed = threading.Condition()
+        self._pending = 0
+        self.written = 0
+        self.dropped = 0  # rows lost: queue full or batch insert failed
+        self.restarts = 0
+        self.error = None  # last writer crash, cleared once the restarted writer gets through a cycle
+
+    # ---------------- writer side ----------------
+    def start(self):
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return self
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = connect(self.path)
+            conn.executescript(SCHEMA)
+            conn.close()
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="probe-store", daemon=True)
+            self._thread.start()
+        return self
+
+    def record(self, key, status, latency=None, value_hash=None, ts=None):
+        """
+        Queue one probe result; never blocks. Dropped silently if the store is not started, and
+        dropped and counted if the writer is QUEUE_SIZE rows behind.
+        """
+        if self._thread is None:
+            return
+        with self._flushed:
+            self._pending += 1
+        try:
+            self._queue.put_nowait((key, ts or time.time(), status, latency, value_hash))
+        except queue.Full:
+            with self._flushed:
+                self._pending -= 1
+                self.dropped += 1
+                dropped = self.dropped
+            if dropped % 1000 == 1:
+                logger.warning("probe store queue full: %d row(s) dropped so far", dropped)
+
+    def flush(self, timeout=10):
+        """
+        Wait until everything queued so far has been committed.
+        """
+        deadline = time.time() + timeout
+        with self._flushed:
+            while self._pending and time.time() < deadline:
+                self._flushed.wait(0.05)
+        return not self._pending
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+        self._thread = None
+
+    def healthy(self):
+        """
+        True while the writer thread is running and has not crashed since its last good cycle.
+        """
+        return self._thread is not None and self._thread.is_alive() and self.error is None
+
+    def _run(self):
+        # supervisor: a crash in the writer loop is logged and the loop restarted, so probes keep
+        # being recorded instead of piling up behind a dead thread
+        while True:
+            try:
+                self._write_loop()
+                return
+            except Exception as e:
+                self.error = repr(e)
+                self.restarts += 1
+                logger.exception("probe store writer crashed; restarting in %ds", RESTART_DELAY)
+            if self._stop_event.wait(RESTART_DELAY):
+                return
+
+    def _write_loop(self):
+        conn = connect(self.path)
+        last_maintenance = time.time()
+        try:
+            while True:
+                batch = []
+                try:
+                    batch.append(self._queue.get(timeout=self.flush_interval))
+                    while len(batch) < self.batch_size:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    pass
+                if batch:
+                    failed = 0
+                    try:
+                        with conn:
+                            conn.executemany(
+                                "INSERT INTO probes (key, ts, status, latency, value_hash) VALUES (?, ?, ?, ?, ?)",
+                                batch,
+                            )
+                        self.written += len(batch)
+                    except Exception:
+                        failed = len(batch)
+                        logger.exception("probe batch insert failed (%d rows)", len(batch))
+                    finally:
+                        with self._flushed:
+                            self._pending -= len(batch)
+                            self.dropped += failed
+                            self._flushed.notify_all()
+                elif self._stop_event.is_set():
+                    break
+                if time.time() - last_maintenance >= MAINTENANCE_INTERVAL:
+                    last_maintenance = time.time()
+                    try:
+                        self.maintenance(conn)
+                    except Exception:
+                        logger.exception("probe store maintenance failed")
+                self.error = None
+        finally:
+            conn.close()
+
+    # ---------------- maintenance ----------------
+    def downsample(self, conn, before_ts):
+        """
+        Fold raw rows older than before_ts into probes_rollup, then delete them.
+        """
+        cutoff = int(before_ts) - int(before_ts) % ROLLUP_BUCKET
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO probes_rollup (key, bucket, n, ok, stale, failed, latency_sum, latency_max)
+                SELECT key,
+                       CAST(ts / ? AS INTEGER) * ?,
+                       COUNT(*),
+                       SUM(status = 'ok'),
+                       SUM(status = 'stale'),
+                       SUM(status NOT IN ('ok', 'stale')),
+                       COALESCE(SUM(latency), 0),
+                       COALESCE(MAX(latency), 0)
+                FROM probes WHERE ts < ?
+                GROUP BY 1, 2
+                ON CONFLICT (key, bucket) DO UPDATE SET
+                    n = n + excluded.n,
+                    ok = ok + excluded.ok,
+                    stale = stale + excluded.stale,
+                    failed = failed + excluded.failed,
+                    latency_sum = latency_sum + excluded.latency_sum,
+                    latency_max = MAX(latency_max, excluded.latency_max)
+                """,
+                (ROLLUP_BUCKET, ROLLUP_BUCKET, cutoff),
+            )
+            conn.execute("DELETE FROM probes WHERE ts < ?", (cutoff,))
+
+    def maintenance(self, conn=None, now=None):
+        own = conn is None
+        conn = conn or connect(self.path)
+        now = now or time.time()
+        try:
+            self.downsample(conn, now - RAW_RETENTION_DAYS * 86400)
+            with conn:
+                conn.execute("DELETE FROM probes_rollup WHERE bucket < ?", (now - ROLLUP_RETENTION_DAYS * 86400,))
+            logger.info("probe store maintenance done")
+        finally:
+            if own:
+                conn.close()
+
+    # ---------------- read side ----------------
+    def query(self, key, t0, t1):
+        """
+        Raw probes for key in [t0, t1): [(ts, status, latency, value_hash), ...].
+        """
+        conn = connect(self.path)
+        try:
+            return conn.execute(
+                "SELECT ts, status, latency, value_hash FROM probes WHERE key = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                (key, t0, t1),
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def query_range(self, t0, t1):
+        """
+        Raw probes for all keys in [t0, t1): [(key, ts, status, latency, value_hash), ...] ordered by ts.
+        """
+        return list(self.iter_range(t0, t1))
+
+    def iter_range(self, t0, t1, chunk=FETCH_CHUNK):
+        """
+        Like query_range, but streams the rows from the cursor chunk rows at a time, so a whole day
+        never has to sit in memory as a list.
+        """
+        conn = connect(self.path)
+        try:
+            cur = conn.execute(
+                "SELECT key, ts, status, latency, value_hash FROM probes WHERE ts >= ? AND ts < ? ORDER BY ts",
+                (t0, t1),
+            )
+            while True:
+                rows = cur.fetchmany(chunk)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    def oldest_ts(self):
+        """
+        Timestamp of the oldest raw probe, or None if there are none.
+        """
+        conn = connect(self.path)
+        try:
+            return conn.execute("SELECT MIN(ts) FROM probes").fetchone()[0]
+        finally:
+            conn.close()
+
+    def trend(self, key, t0, t1, bucket=3600):
+        """
+        Per-bucket counts for key over [t0, t1), merging rollup rows and not-yet-downsampled raw rows:
+        [(bucket_start, n, ok, stale, failed, mean_latency, max_latency), ...].
+        """
+        conn = connect(self.path)
+        try:
+            rows = conn.execute(
+                """
+                SELECT CAST(b / ? AS INTEGER) * ? AS tb, SUM(n), SUM(ok), SUM(stale), SUM(failed),
+                       SUM(latency_sum), MAX(latency_max)
+                FROM (
+                    SELECT bucket AS b, n, ok, stale, failed, latency_sum, latency_max
+                    FROM probes_rollup WHERE key = ? AND bucket >= ? AND bucket < ?
+                    UNION ALL
+                    SELECT ts, 1, status = 'ok', status = 'stale', status NOT IN ('ok', 'stale'),
+                           COALESCE(latency, 0), COALESCE(latency, 0)
+                    FROM probes WHERE key = ? AND ts >= ? AND ts < ?
+                )
+                GROUP BY tb ORDER BY tb
+                """,
+                (bucket, bucket, key, t0, t1, key, t0, t1),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [(tb, n, ok, stale, failed, (lat_sum / n if n else 0.0), lat_max)
+                for tb, n, ok, stale, failed, lat_sum, lat_max in rows]
+
+    def render_prometheus(self):
+        lines = []
+        for name, kind, value, text in (
+                ("probe_store_queue_depth", "gauge", self._queue.qsize(), "Probe rows waiting for the writer."),
+                ("probe_store_written_total", "counter", self.written, "Probe rows committed to SQLite."),
+                ("probe_store_dropped_total", "counter", self.dropped,
+                 "Probe rows lost because the queue was full or the insert failed."),
+                ("probe_store_writer_restarts_total", "counter", self.restarts, "Writer loop crashes (restarted)."),
+                ("probe_store_healthy", "gauge", int(self.healthy()), "1 while the writer is running.")):
+            lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def keys(self):
+        conn = connect(self.path)
+        try:
+            rows = conn.execute("SELECT DISTINCT key FROM probes UNION SELECT DISTINCT key FROM probes_rollup").fetchall()
+        finally:
+            conn.close()
+        return sorted(r[0] for r in rows)
+
+
+probe_store = ProbeStore()
@@ -0,0 +1,76 @@
+# run_scrapers.py — run both scrapers without a dashboard, publishing updates to a message queue
+# - MONITOR_MESSAGE_QUEUE (or the first argument) is the queue URL, see fanout.py; dashboards are
+#   app.py processes started with MONITOR_ROLE=dashboard and the same URL
+# - emits go through a write-only python-socketio manager, so scraping never shares a process
+#   (or a GIL) with serving clients
+# - writes the snapshot file dashboards start from (fanout.SNAPSHOT_PATH)
+# - --broker also serves the local broker for a unix:// or tcp:// URL in this process (app.py starts
+#   it this way in gevent / eventlet mode when no queue is configured)
+# - --attached exits when stdin is closed, so a child started by app.py never outlives it
+
+import os
+import sys
+import time
+import logging
+import threading
+
+import scraping_1sec
+import scraping_1min
+from probe_metrics import schedule_metrics
+from probe_store import probe_store
+import emitter
+import fanout
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("run_scrapers")
+
+
+def exit_with_parent():
+    # stdin is a pipe from the parent process: EOF means it exited (however it was stopped)
+    sys.stdin.buffer.read()
+    logger.info("parent process gone, stopping")
+    fanout.write_snapshot()
+    os._exit(0)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    serve_broker = "--broker" in argv
+    attached = "--attached" in argv
+    argv = [a for a in argv if a not in ("--broker", "--attached")]
+    url = argv[0] if argv else os.environ.get("MONITOR_MESSAGE_QUEUE")
+    if not url:
+        raise SystemExit("usage: python run_scrapers.py <queue url> [--broker] [--attached]  (or set MONITOR_MESSAGE_QUEUE)")
+    if attached:
+        threading.Thread(target=exit_with_parent, daemon=True, name="parent-watch").start()
+    if serve_broker:
+        if not fanout.is_local_url(url):
+            raise SystemExit("--broker needs a unix:// or tcp:// queue url")
+        threading.Thread(target=fanout.Broker(url).serve_forever, daemon=True, name="broker").start()
+        if not fanout.wait_for_broker(url):
+            raise SystemExit(f"broker did not start on {url}")
+
+    publisher = fanout.make_manager(url, write_only=True)
+    emitter.forward_alerts(publisher, schedule_metrics)
+
+    workers = {
+        "1sec": scraping_1sec.start_threads(publisher)[0],
+        "1min": scraping_1min.start_threads(publisher)[0],
+    }
+    fanout.SnapshotWriter().start()
+    logger.info("scrapers publishing to %s", url)
+
+    try:
+        while True:
+            time.sleep(60)
+            not_ready = [name for name, w in workers.items() if not w.ready.is_set()]
+            if not_ready:
+                logger.warning("still restoring: %s", ", ".join(not_ready))
+            if not probe_store.healthy():
+                logger.warning("probe store writer not running (last error: %s)", probe_store.error)
+    except KeyboardInterrupt:
+        fanout.write_snapshot()
+
+
+if __name__ == "__main__":
+    main()
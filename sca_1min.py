@@ -1,528 +1,698 @@
-#!/usr/bin/env python3
-# sca_1min.py (updated) — Option A: daily state JSON rotation
-# Features:
-# - new state file each day: state/monitor_state_1min_YYYY-MM-DD.json
-# - stop scraping after end time for a URL, emit final completed payload (last_value + last_changed)
-# - do not re-scrape completed URLs until next day
-# - resume next day's scraping after rotating state file
-# - conservative emit behavior to avoid spamming (emitted_completed flag)
-
-import os
-import time
-import json
-import logging
-import threading
-from datetime import datetime, timedelta
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-import re
-
-# ---------------- CONFIG ----------------
-CHROMEDRIVER_PATH = r"C:\Users\Hritikraj.arya\.wdm\drivers\chromedriver\win64\142.0.7444.163\chromedriver-win64\chromedriver.exe"
-LOG_DIR = "logs"
-STATE_DIR = "state"
-CONFIG_DIR = "config"
-URL_DICT_PATH = os.path.join(CONFIG_DIR, "url_dict_1min.json")
-NAME_MAPPING_PATH = os.path.join(CONFIG_DIR, "url_name_mapping.json")
-
-os.makedirs(LOG_DIR, exist_ok=True)
-os.makedirs(STATE_DIR, exist_ok=True)
-os.makedirs(CONFIG_DIR, exist_ok=True)
-
-STALE_THRESHOLD = 3  # minutes
-INVALID_RETRY = 3
-INVALID_RETRY_DELAY = 0.6  # seconds
-
-# ---------------- LOGGER ----------------
-logger = logging.getLogger("scraping_1min")
-logger.setLevel(logging.INFO)
-logger.propagate = False
-log_filename = os.path.join(LOG_DIR, f"scraping_1min_{datetime.now().strftime('%Y%m%d')}.log")
-if not any(isinstance(h, logging.FileHandler) and getattr(h, "baseFilename", "") == log_filename for h in logger.handlers):
-    fh = logging.FileHandler(log_filename, encoding="utf-8")
-    fh.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
-    logger.addHandler(fh)
-
-# ---------------- LOAD JSON CONFIGS ----------------
-def load_json(path):
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        logger.exception(f"Failed to load JSON: {path} | Error: {e}")
-        raise
-
-# validate config files exist (fail early)
-if not os.path.exists(URL_DICT_PATH):
-    logger.error("URL dict missing: %s", URL_DICT_PATH)
-    raise SystemExit(1)
-if not os.path.exists(NAME_MAPPING_PATH):
-    logger.error("Name mapping missing: %s", NAME_MAPPING_PATH)
-    raise SystemExit(1)
-
-url_dict = load_json(URL_DICT_PATH)
-ui_name_mapping = load_json(NAME_MAPPING_PATH)
-
-# ---------------- HELPERS ----------------
-def now_iso():
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-def state_filename_for_day(day_str):
-    # day_str expected "YYYY-MM-DD"
-    return os.path.join(STATE_DIR, f"monitor_state_1min_{day_str}.json")
-
-def load_state_file(path):
-    if not os.path.exists(path):
-        return {}
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        logger.exception("load_state failed for %s", path)
-        return {}
-
-def save_state_file(path, state):
-    tmp = path + ".tmp"
-    try:
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(state, f, indent=2, ensure_ascii=False)
-        os.replace(tmp, path)
-    except Exception:
-        logger.exception("save_state failed for %s", path)
-
-# --------------- TIMESTAMP PARSER ---------------
-def parse_reported_ts(raw_text):
-    if not raw_text or not isinstance(raw_text, str):
-        return None
-    txt = raw_text.strip()
-    txt = re.sub(r"(?i)\bas\s*on\b", "", txt).strip()
-    txt = txt.replace("\u00A0", " ").replace("\u200B", "").strip()
-
-    if "|" in txt:
-        parts = [p.strip() for p in txt.split("|") if p.strip()]
-    else:
-        parts = [p.strip() for p in re.split(r"\s{2,}", txt) if p.strip()]
-
-    if not parts:
-        parts = [p.strip() for p in txt.split(" ") if p.strip()]
-    if not parts:
-        return None
-
-    date_part = None
-    time_part = None
-
-    if len(parts) >= 2:
-        date_part = parts[0]
-        time_part = parts[1]
-    else:
-        single = parts[0]
-        tokens = single.split()
-        if tokens and ":" in tokens[-1]:
-            time_part = tokens[-1]
-            date_part = " ".join(tokens[:-1]) if len(tokens) > 1 else None
-        else:
-            date_part = single
-
-    if time_part and ":" in time_part:
-        m = re.match(r"^(\d{1,2}):(\d{1,2})(?::\d{1,2})?\s*(am|pm|AM|PM)?$", time_part.strip())
-        if m:
-            hh = m.group(1).zfill(2)
-            mm = m.group(2).zfill(2)
-            ampm = m.group(3)
-            time_part = f"{hh}:{mm}" + (f" {ampm.lower()}" if ampm else "")
-
-    candidates = []
-    if date_part and time_part:
-        candidates.append(f"{date_part} {time_part}")
-    if date_part:
-        candidates.append(date_part)
-
-    fmts = [
-        "%d %b %Y %H:%M",
-        "%d %b %y %H:%M",
-        "%d %b %Y %I:%M %p",
-        "%d %b %y %I:%M %p",
-        "%d %b %Y %H:%M:%S",
-        "%d %b %y %H:%M:%S",
-        "%d %b %Y",
-        "%d %b %y",
-    ]
-
-    for cand in candidates:
-        cand = cand.strip()
-        for fmt in fmts:
-            try:
-                return datetime.strptime(cand, fmt)
-            except Exception:
-                continue
-
-    compact = " ".join(txt.replace(",", " ").split())
-    for fmt in ("%d %b %y %H:%M", "%d %b %Y %H:%M", "%d %b %Y %I:%M %p"):
-        try:
-            return datetime.strptime(compact, fmt)
-        except Exception:
-            pass
-
-    return None
-
-# ---------------- DRIVER MANAGER ----------------
-class DriverManager:
-    def get_driver(self):
-        opts = Options()
-        opts.add_argument("--headless=new")
-        opts.add_argument("--disable-gpu")
-        opts.add_argument("--no-sandbox")
-        opts.add_argument("--disable-dev-shm-usage")
-        opts.add_argument("--window-size=1920,1080")
-        service = Service(CHROMEDRIVER_PATH)
-        d = webdriver.Chrome(service=service, options=opts)
-        d.implicitly_wait(1)
-        return d
-
-# ---------------- WORKER ----------------
-class Worker:
-    def __init__(self, socketio=None):
-        self.socketio = socketio
-        self.dm = DriverManager()
-
-        # day tracked in this process
-        self.state_day = datetime.now().strftime("%Y-%m-%d")
-        self.state_file = state_filename_for_day(self.state_day)
-
-        # load state for today if exists, else try to carry forward last file (optional)
-        self.cache = load_state_file(self.state_file) or {}
-
-        # ensure all keys exist with defaults; keep last_value/last_changed if present
-        for k in url_dict.keys():
-            if k not in self.cache:
-                self.cache[k] = {
-                    "last_value": None,
-                    "stale_count": 0,
-                    "last_changed": "",
-                    "stale_times": [],
-                    "completed": False,
-                    "emitted_completed": False  # controls repeated emits in same process run
-                }
-            else:
-                # normalize missing fields in an existing loaded state
-                self.cache[k].setdefault("last_value", None)
-                self.cache[k].setdefault("stale_count", 0)
-                self.cache[k].setdefault("last_changed", "")
-                self.cache[k].setdefault("stale_times", [])
-                self.cache[k].setdefault("completed", False)
-                self.cache[k].setdefault("emitted_completed", False)
-
-        # persist initial state file
-        save_state_file(self.state_file, self.cache)
-
-    def write_state(self):
-        try:
-            save_state_file(self.state_file, self.cache)
-        except Exception:
-            logger.exception("write_state failed")
-
-    def emit_payload(self, checklist_key, status):
-        ui_name = ui_name_mapping.get(checklist_key, checklist_key)
-        entry = self.cache.get(checklist_key, {})
-        payload = {
-            "checklist": ui_name,
-            "key_id": url_dict.get(checklist_key, {}).get("key_id"),
-            "status": status,
-            "last_changed": entry.get("last_changed", ""),
-            "last_value": entry.get("last_value"),
-            "tab": url_dict.get(checklist_key, {}).get("tab", "tab1min")
-        }
-        logger.info("EMIT -> %s", payload)
-        if self.socketio:
-            try:
-                self.socketio.emit("update_status", payload)
-            except Exception:
-                logger.exception("socket emit failed")
-
-    def extract_ts(self, driver, selector):
-        try:
-            el = driver.find_element(By.CSS_SELECTOR, selector)
-            txt = el.text.strip()
-            return txt or None
-        except Exception:
-            parts = [p.strip() for p in selector.split(",") if p.strip()]
-            for p in parts:
-                try:
-                    el = driver.find_element(By.CSS_SELECTOR, p)
-                    txt = el.text.strip()
-                    if txt:
-                        return txt
-                except Exception:
-                    continue
-            return None
-
-    def _in_time_window(self, cfg):
-        """
-        Return (in_window: bool, window_state: None|'skip'|'completed')
-        """
-        now = datetime.now().time()
-        start_s = cfg.get("start")
-        end_s = cfg.get("end")
-        if not start_s and not end_s:
-            return True, None
-
-        def parse_hm(s):
-            try:
-                hh, mm = s.split(":")
-                return int(hh), int(mm)
-            except Exception:
-                return None
-
-        if start_s:
-            st = parse_hm(start_s)
-            if st:
-                # today's start_time
-                start_time = datetime.now().replace(hour=st[0], minute=st[1], second=0, microsecond=0).time()
-                if now < start_time:
-                    return False, "skip"
-
-        if end_s:
-            et = parse_hm(end_s)
-            if et:
-                end_time = datetime.now().replace(hour=et[0], minute=et[1], second=0, microsecond=0).time()
-                if now > end_time:
-                    return False, "completed"
-
-        return True, None
-
-    def rotate_state_if_new_day(self):
-        today = datetime.now().strftime("%Y-%m-%d")
-        if today != self.state_day:
-            logger.info("New day detected: rotating state file from %s -> %s", self.state_day, today)
-            # finalize current day's file (already persisted), then create new one
-            self.state_day = today
-            self.state_file = state_filename_for_day(self.state_day)
-            # init fresh cache for the new day but keep previous day's file intact
-            self.cache = {}
-            for k in url_dict.keys():
-                self.cache[k] = {
-                    "last_value": None,
-                    "stale_count": 0,
-                    "last_changed": "",
-                    "stale_times": [],
-                    "completed": False,
-                    "emitted_completed": False
-                }
-            save_state_file(self.state_file, self.cache)
-            logger.info("Created new state file: %s", self.state_file)
-
-    def monitor(self):
-        driver = None
-        next_run = time.time()
-        try:
-            driver = self.dm.get_driver()
-        except Exception as e:
-            logger.exception("initial driver creation failed: %s", e)
-            driver = None
-
-        while True:
-            # keep 60s cadence
-            if time.time() < next_run:
-                time.sleep(0.25)
-                continue
-
-            # rotate state if new day
-            try:
-                self.rotate_state_if_new_day()
-            except Exception:
-                logger.exception("rotate_state_if_new_day failed")
-
-            # ensure driver
-            if driver is None:
-                try:
-                    driver = self.dm.get_driver()
-                except Exception as e:
-                    logger.exception("driver creation failed in loop: %s", e)
-                    time.sleep(5)
-                    next_run += 60
-                    continue
-
-            cycle_start = time.time()
-
-            # iterate configured URLs
-            for key, info in url_dict.items():
-                try:
-                    # ensure state record exists
-                    record = self.cache.get(key)
-                    if record is None:
-                        record = {
-                            "last_value": None,
-                            "stale_count": 0,
-                            "last_changed": "",
-                            "stale_times": [],
-                            "completed": False,
-                            "emitted_completed": False
-                        }
-                        self.cache[key] = record
-
-                    # If already completed for today -> do not scrape this URL
-                    if record.get("completed"):
-                        # emit completed once (e.g. on process start / UI refresh) to allow UI to lock row
-                        if not record.get("emitted_completed"):
-                            # do not modify last_value/last_changed, simply emit final state
-                            try:
-                                self.emit_payload(key, "completed")
-                                record["emitted_completed"] = True
-                                self.write_state()
-                            except Exception:
-                                logger.exception("emit completed on startup failed for %s", key)
-                        continue
-
-                    # check time window (start/end)
-                    in_window, window_state = self._in_time_window(info)
-                    if window_state == "completed":
-                        # mark completed and emit final payload once
-                        if not record.get("completed"):
-                            record["completed"] = True
-                            if not record.get("last_changed"):
-                                record["last_changed"] = now_iso()
-                            # ensure emitted_completed is reset so UI gets the final emit immediately
-                            record["emitted_completed"] = False
-                            self.cache[key] = record
-                            self.write_state()
-                            # emit final completed payload (will include last_value)
-                            self.emit_payload(key, "completed")
-                        # stop scraping this URL for the rest of the day
-                        continue
-
-                    if not in_window:
-                        # pre-start: do nothing (UI can show not-started if you choose)
-                        # we avoid emitting "not-started" every cycle to reduce churn
-                        continue
-
-                    # OK: in-window -> perform scrape
-                    url = info.get("url")
-                    selector = info.get("selector")
-                    typ = info.get("type", "timestamp")
-
-                    # load page
-                    try:
-                        driver.get(url)
-                    except Exception as e:
-                        logger.error("[%s] load fail: %s", key, e)
-                        # emit error and do not change last_value/last_changed
-                        self.emit_payload(key, "error")
-                        continue
-
-                    # allow small render pause
-                    time.sleep(1)
-
-                    # try to extract raw text (with retry)
-                    raw = self.extract_ts(driver, selector)
-                    if raw is None or raw == "":
-                        retried = False
-                        for attempt in range(INVALID_RETRY):
-                            time.sleep(INVALID_RETRY_DELAY)
-                            raw = self.extract_ts(driver, selector)
-                            if raw:
-                                retried = True
-                                break
-                        if not raw:
-                            logger.warning("[%s] invalid format after retries", key)
-                            self.emit_payload(key, "invalid format")
-                            continue
-
-                    # got raw data — compare and update state
-                    parsed_dt = parse_reported_ts(raw)
-                    reported_iso = parsed_dt.strftime("%Y-%m-%d %H:%M:%S") if parsed_dt else None
-
-                    # first discovery
-                    if record.get("last_value") is None:
-                        now = now_iso()
-                        record["last_value"] = raw
-                        record["stale_count"] = 0
-                        record["last_changed"] = now
-                        record.setdefault("stale_times", [])
-                        record.setdefault("completed", False)
-                        record.setdefault("emitted_completed", False)
-                        self.cache[key] = record
-                        self.write_state()
-                        # if reported timestamp is old relative to local, mark stale else ok
-                        if parsed_dt and (datetime.now() - parsed_dt > timedelta(minutes=STALE_THRESHOLD)):
-                            record["stale_times"].append(now)
-                            self.write_state()
-                            self.emit_payload(key, "stale")
-                        else:
-                            self.emit_payload(key, "ok")
-                        continue
-
-                    # change detected
-                    if raw != record.get("last_value"):
-                        now = now_iso()
-                        record["last_value"] = raw
-                        record["stale_count"] = 0
-                        record["last_changed"] = now
-                        # when a new value is captured during the day, ensure completed flag stays False
-                        record["completed"] = False
-                        record["emitted_completed"] = False
-                        self.cache[key] = record
-                        self.write_state()
-
-                        if parsed_dt and (datetime.now() - parsed_dt > timedelta(minutes=STALE_THRESHOLD)):
-                            record["stale_times"].append(now)
-                            self.write_state()
-                            self.emit_payload(key, "stale")
-                        else:
-                            self.emit_payload(key, "ok")
-                    else:
-                        # unchanged -> potentially become stale
-                        record["stale_count"] = record.get("stale_count", 0) + 1
-                        self.cache[key] = record
-                        self.write_state()
-
-                        ts_behind = parsed_dt and (datetime.now() - parsed_dt > timedelta(minutes=STALE_THRESHOLD))
-                        if record["stale_count"] >= STALE_THRESHOLD or ts_behind:
-                            now = now_iso()
-                            record.setdefault("stale_times", []).append(now)
-                            self.cache[key] = record
-                            self.write_state()
-                            self.emit_payload(key, "stale")
-                        # else keep quiet to avoid UI churn
-
-                except Exception as e:
-                    logger.exception("per-url handling error for %s: %s", key, e)
-                    # emit generic error so UI shows issue
-                    try:
-                        self.emit_payload(key, "error")
-                    except Exception:
-                        logger.exception("emit failure after per-url exception")
-
-            # end for all URLs in cycle
-
-            # schedule next run to keep 60-second cadence
-            next_run += 60
-            # avoid drift explosion
-            if next_run < time.time() - 60:
-                next_run = time.time() + 60
-
-            elapsed = time.time() - cycle_start
-            logger.info("1-min cycle elapsed: %.2f sec", elapsed)
-
-        # cleanup driver if loop exits
-        if driver:
-            try:
-                driver.quit()
-            except Exception:
-                pass
-
-def start_threads(socketio=None):
-    w = Worker(socketio)
-    t = threading.Thread(target=w.monitor, daemon=True)
-    t.start()
-    logger.info("Started scraping_1min worker")
-
-# if run standalone for debugging
-if __name__ == "__main__":
-    start_threads(None)
-    try:
-        while True:
-            time.sleep(60)
-    except KeyboardInterrupt:
-        print("Stopping scraper (keyboard interrupt)")
+#!/usr/bin/env python3
+# sca_1min.py (updated) — Option A: daily state JSON rotation
+# Features:
+# - new state file each day: state/monitor_state_1min_YYYY-MM-DD.json
+# - stop scraping after end time for a URL, emit final completed payload (last_value + last_changed)
+# - do not re-scrape completed URLs until next day
+# - resume next day's scraping after rotating state file
+# - emit on change only (emitter.ChangeEmitter): repeats of the last payload per URL are not sent
+
+import os
+import time
+import json
+import logging
+import threading
+from datetime import datetime
+import re
+
+from fetch_cache import shared_cache, conditional_probe, content_hash, fetch_key, PageLoadError
+from monitor_record import MonitorRecord, records_from_json, records_to_json, get_record
+from episode_index import EpisodeIndex
+from probe_store import probe_store
+from probe_metrics import probe_metrics, schedule_metrics
+from daily_archive import schedule_compaction, schedule_catch_up
+from config_watcher import ConfigWatcher, ConfigNotReady, diff_config
+import log_pipeline
+from emitter import ChangeEmitter
+from politeness import politeness, spread_offset
+
+# ---------------- CONFIG ----------------
+CHROMEDRIVER_PATH = r"C:\Users\Hritikraj.arya\.wdm\drivers\chromedriver\win64\142.0.7444.163\chromedriver-win64\chromedriver.exe"
+LOG_DIR = "logs"
+STATE_DIR = "state"
+CONFIG_DIR = "config"
+URL_DICT_PATH = os.path.join(CONFIG_DIR, "url_dict_1min.json")
+NAME_MAPPING_PATH = os.path.join(CONFIG_DIR, "url_name_mapping.json")
+
+CSS_SELECTOR = "css selector"  # selenium By.CSS_SELECTOR, without importing selenium at module load
+
+STALE_THRESHOLD = 3  # minutes
+INVALID_RETRY = 3
+INVALID_RETRY_DELAY = 0.6  # seconds
+SHARED_RESULT_MAX_AGE = 2  # seconds; reuse a 1-sec worker's result for the same page if this fresh
+FETCH_PROFILE = "1min"  # shared_cache load profile: 1 s render plus retries, so 1-sec loads are not joined
+PROBE_KEY_PREFIX = "1min:"  # probe_store key namespace (the same checklist name can exist in both cadences)
+METRICS_SCRAPER = "1min"  # scraper label on probe_metrics histograms
+DRIVER_METRICS_KEY = "_driver"  # the 1-min driver is shared by all URLs, so its acquire time has no URL key
+CYCLE_INTERVAL = 60  # seconds between cycle starts
+CYCLE_METRICS_KEY = "_cycle"  # schedule_metrics key of the cycle itself (per-URL ticks use the URL key)
+CONFIG_READY_TIMEOUT = 30  # seconds a config reload waits for the state restore before it is retried
+SPREAD_FRACTION = 0.5  # URLs of a cycle are spread over this fraction of CYCLE_INTERVAL instead of sent back to back
+
+# ---------------- LOGGER ----------------
+# handlers are attached by init(); importing this module has no side effects
+logger = logging.getLogger("scraping_1min")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+def setup_logging():
+    # queued JSON-lines logging: rotated at midnight / by size, written by a listener thread so
+    # scraper threads never wait on log I/O; repeated EMIT lines are rate-limited (see log_pipeline)
+    log_pipeline.attach(logger, os.path.join(LOG_DIR, "scraping_1min.log"))
+
+# ---------------- LOAD CONFIGS ----------------
+def load_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.exception(f"Failed to load JSON: {path} | Error: {e}")
+        raise
+
+url_dict = {}
+ui_name_mapping = {}
+_initialised = False
+
+def init():
+    """
+    Create log/state dirs, attach the log handler and load the configs. Called by start_threads;
+    safe to call more than once. Raises FileNotFoundError if a config file is missing.
+    """
+    global url_dict, ui_name_mapping, _initialised
+    if _initialised:
+        return
+    os.makedirs(LOG_DIR, exist_ok=True)
+    os.makedirs(STATE_DIR, exist_ok=True)
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    setup_logging()
+
+    # validate config files exist (fail early)
+    if not os.path.exists(URL_DICT_PATH):
+        logger.error("URL dict missing: %s", URL_DICT_PATH)
+        raise FileNotFoundError(URL_DICT_PATH)
+    if not os.path.exists(NAME_MAPPING_PATH):
+        logger.error("Name mapping missing: %s", NAME_MAPPING_PATH)
+        raise FileNotFoundError(NAME_MAPPING_PATH)
+
+    url_dict = load_json(URL_DICT_PATH)
+    ui_name_mapping = load_json(NAME_MAPPING_PATH)
+    _initialised = True
+
+# ---------------- HELPERS ----------------
+def state_filename_for_day(day_str):
+    # day_str expected "YYYY-MM-DD"
+    return os.path.join(STATE_DIR, f"monitor_state_1min_{day_str}.json")
+
+def load_state_file(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        logger.exception("load_state failed for %s", path)
+        return {}
+
+def save_state_file(path, state):
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(records_to_json(state), f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
+    except Exception:
+        logger.exception("save_state failed for %s", path)
+
+# --------------- TIMESTAMP PARSER ---------------
+def parse_reported_ts(raw_text):
+    if not raw_text or not isinstance(raw_text, str):
+        return None
+    txt = raw_text.strip()
+    txt = re.sub(r"(?i)\bas\s*on\b", "", txt).strip()
+    txt = txt.replace("\u00A0", " ").replace("\u200B", "").strip()
+
+    if "|" in txt:
+        parts = [p.strip() for p in txt.split("|") if p.strip()]
+    else:
+        parts = [p.strip() for p in re.split(r"\s{2,}", txt) if p.strip()]
+
+    if not parts:
+        parts = [p.strip() for p in txt.split(" ") if p.strip()]
+    if not parts:
+        return None
+
+    date_part = None
+    time_part = None
+
+    if len(parts) >= 2:
+        date_part = parts[0]
+        time_part = parts[1]
+    else:
+        single = parts[0]
+        tokens = single.split()
+        if tokens and ":" in tokens[-1]:
+            time_part = tokens[-1]
+            date_part = " ".join(tokens[:-1]) if len(tokens) > 1 else None
+        else:
+            date_part = single
+
+    if time_part and ":" in time_part:
+        m = re.match(r"^(\d{1,2}):(\d{1,2})(?::\d{1,2})?\s*(am|pm|AM|PM)?$", time_part.strip())
+        if m:
+            hh = m.group(1).zfill(2)
+            mm = m.group(2).zfill(2)
+            ampm = m.group(3)
+            time_part = f"{hh}:{mm}" + (f" {ampm.lower()}" if ampm else "")
+
+    candidates = []
+    if date_part and time_part:
+        candidates.append(f"{date_part} {time_part}")
+    if date_part:
+        candidates.append(date_part)
+
+    fmts = [
+        "%d %b %Y %H:%M",
+        "%d %b %y %H:%M",
+        "%d %b %Y %I:%M %p",
+        "%d %b %y %I:%M %p",
+        "%d %b %Y %H:%M:%S",
+        "%d %b %y %H:%M:%S",
+        "%d %b %Y",
+        "%d %b %y",
+    ]
+
+    for cand in candidates:
+        cand = cand.strip()
+        for fmt in fmts:
+            try:
+                return datetime.strptime(cand, fmt)
+            except Exception:
+                continue
+
+    compact = " ".join(txt.replace(",", " ").split())
+    for fmt in ("%d %b %y %H:%M", "%d %b %Y %H:%M", "%d %b %Y %I:%M %p"):
+        try:
+            return datetime.strptime(compact, fmt)
+        except Exception:
+            pass
+
+    return None
+
+# ---------------- DRIVER MANAGER ----------------
+class DriverManager:
+    def get_driver(self):
+        # selenium is imported on first use so importing the scraper (e.g. from app.py) stays cheap
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+
+        opts = Options()
+        opts.add_argument("--headless=new")
+        opts.add_argument("--disable-gpu")
+        opts.add_argument("--no-sandbox")
+        opts.add_argument("--disable-dev-shm-usage")
+        opts.add_argument("--window-size=1920,1080")
+        service = Service(CHROMEDRIVER_PATH)
+        d = webdriver.Chrome(service=service, options=opts)
+        d.implicitly_wait(1)
+        return d
+
+# ---------------- WORKER ----------------
+class Worker:
+    def __init__(self, socketio=None):
+        self.socketio = socketio
+        self.emitter = ChangeEmitter(socketio, scope=METRICS_SCRAPER)
+        self.dm = DriverManager()
+
+        # readiness / startup timing (state is restored on the monitor thread, not here)
+        self.ready = threading.Event()
+        self.started_at = time.time()
+        self.first_emit_after = None  # seconds from Worker creation to the first emit
+
+        # day tracked in this process
+        self.state_day = datetime.now().strftime("%Y-%m-%d")
+        self.state_file = state_filename_for_day(self.state_day)
+        self.cache = {}
+        self.cache_lock = threading.RLock()  # guards cache writes/adds from the config watcher thread
+
+        # key -> (value_hash, parsed_dt) so unchanged pages are not re-parsed every cycle
+        self.parsed = {}
+
+        # stale episodes for today's downtime queries (seeded from the restored state)
+        self.episodes = EpisodeIndex()
+
+        self.stop_event = threading.Event()
+        self.wake = threading.Event()  # ends a spread wait early: stop() or a config reload
+
+    def restore_state(self):
+        t0 = time.time()
+        # load state for today if exists; every configured key gets a record (last_value/last_changed preserved)
+        raw = load_state_file(self.state_file)
+        self.cache = records_from_json(raw, url_dict.keys())
+
+        # only create the day's file if it is missing; a restored file is rewritten on the next update anyway
+        if not raw:
+            save_state_file(self.state_file, self.cache)
+
+        for k, rec in self.cache.items():
+            self.episodes.load(k, rec.stale_history.runs())
+
+        # publish the restored rows right away (dashboard snapshot) instead of after the first cycle
+        for k, rec in self.cache.items():
+            self.emit_payload(k, rec.status)
+
+        self.ready.set()
+        logger.info("state restored in %.3fs (%d keys)", time.time() - t0, len(self.cache))
+
+    def write_state(self, key=None):
+        # key: URL whose probe caused the write (for the "state" histogram); None for housekeeping writes
+        try:
+            with self.cache_lock, probe_metrics.timer(METRICS_SCRAPER, key or "_state", "state"):
+                save_state_file(self.state_file, self.cache)
+        except Exception:
+            logger.exception("write_state failed")
+
+    def apply_config(self, old_cfg, new_cfg):
+        """
+        Bring state in line with a reloaded url_dict. The monitor loop picks up the new
+        url_dict on its next cycle; the driver is kept.
+        """
+        added, removed, changed = diff_config(old_cfg, new_cfg)
+        with self.cache_lock:
+            for key in removed:
+                self.cache.pop(key, None)
+                self.parsed.pop(key, None)
+                self.emitter.forget(key)
+            for key in changed:
+                self.parsed.pop(key, None)
+            for key in added:
+                get_record(self.cache, key)
+        if added or removed:
+            self.write_state()
+        self.wake.set()  # a URL waiting for its slot in the cycle is probed with the new entry (or skipped)
+        logger.info("config applied: added=%s removed=%s changed=%s", added, removed, changed)
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake.set()
+
+    def wait_spread(self, due):
+        """
+        Wait until due (a URL's slot in the cycle). Returns early on a config reload; False if stopped.
+        """
+        ahead = due - time.time()
+        if ahead > 0 and self.wake.wait(ahead):
+            self.wake.clear()
+        return not self.stop_event.is_set()
+
+    def will_probe(self, key, cfg):
+        # the cycle would probe key now: not completed for today and inside its time window
+        rec = self.cache.get(key)
+        return not (rec is not None and rec.completed) and self._in_time_window(cfg)[0]
+
+    def live_record(self, key):
+        """
+        The key's record, or None if a config reload removed the key (a probe from the url_dict
+        snapshot of the current cycle must not recreate it).
+        """
+        with self.cache_lock:
+            if key not in url_dict:
+                return None
+            return get_record(self.cache, key)
+
+    def emit_payload(self, checklist_key, status):
+        ui_name = ui_name_mapping.get(checklist_key, checklist_key)
+        entry = self.live_record(checklist_key)
+        if entry is None:
+            return
+        entry.status = status
+        payload = {
+            "checklist": ui_name,
+            "key_id": url_dict.get(checklist_key, {}).get("key_id"),
+            "status": status,
+            "last_changed": entry.last_changed_str(),
+            "last_value": entry.last_value,
+            "tab": url_dict.get(checklist_key, {}).get("tab", "tab1min")
+        }
+        try:
+            with probe_metrics.timer(METRICS_SCRAPER, checklist_key, "emit"):
+                msg = self.emitter.emit(checklist_key, payload)
+        except Exception:
+            logger.exception("socket emit failed")
+            return
+        if msg is None:
+            return  # nothing changed since the last message for this key
+        if self.first_emit_after is None:
+            self.first_emit_after = time.time() - self.started_at
+            logger.info("first emit %.3fs after start", self.first_emit_after)
+        logger.info("EMIT %s %s", checklist_key, status, extra=log_pipeline.emit_log_extra(checklist_key, msg))
+
+    def downtime(self, key=None, t0=None, t1=None):
+        """
+        Seconds spent stale today within [t0, t1] (epoch), for one key or {key: seconds} for all.
+        """
+        if key is None:
+            return self.episodes.downtime_all(t0, t1)
+        return self.episodes.downtime(key, t0, t1)
+
+    def extract_ts(self, driver, selector):
+        try:
+            el = driver.find_element(CSS_SELECTOR, selector)
+            txt = el.text.strip()
+            return txt or None
+        except Exception:
+            parts = [p.strip() for p in selector.split(",") if p.strip()]
+            for p in parts:
+                try:
+                    el = driver.find_element(CSS_SELECTOR, p)
+                    txt = el.text.strip()
+                    if txt:
+                        return txt
+                except Exception:
+                    continue
+            return None
+
+    def load_page(self, driver, url, selector, key=None):
+        key = key or url
+        try:
+            # the host slot covers the request only: it is released before the render pause / extract
+            with politeness.slot(url) as waited:
+                probe_metrics.observe(METRICS_SCRAPER, key, "throttle", waited)
+                with probe_metrics.timer(METRICS_SCRAPER, key, "get"):
+                    driver.get(url)
+        except Exception as e:
+            raise PageLoadError(e)
+
+        # allow small render pause
+        with probe_metrics.timer(METRICS_SCRAPER, key, "render"):
+            time.sleep(1)
+
+        # try to extract raw text (with retry; retry delays count towards extract)
+        with probe_metrics.timer(METRICS_SCRAPER, key, "extract"):
+            raw = self.extract_ts(driver, selector)
+            if not raw:
+                for attempt in range(INVALID_RETRY):
+                    time.sleep(INVALID_RETRY_DELAY)
+                    raw = self.extract_ts(driver, selector)
+                    if raw:
+                        break
+        return raw
+
+    def _in_time_window(self, cfg):
+        """
+        Return (in_window: bool, window_state: None|'skip'|'completed')
+        """
+        now = datetime.now().time()
+        start_s = cfg.get("start")
+        end_s = cfg.get("end")
+        if not start_s and not end_s:
+            return True, None
+
+        def parse_hm(s):
+            try:
+                hh, mm = s.split(":")
+                return int(hh), int(mm)
+            except Exception:
+                return None
+
+        if start_s:
+            st = parse_hm(start_s)
+            if st:
+                # today's start_time
+                start_time = datetime.now().replace(hour=st[0], minute=st[1], second=0, microsecond=0).time()
+                if now < start_time:
+                    return False, "skip"
+
+        if end_s:
+            et = parse_hm(end_s)
+            if et:
+                end_time = datetime.now().replace(hour=et[0], minute=et[1], second=0, microsecond=0).time()
+                if now > end_time:
+                    return False, "completed"
+
+        return True, None
+
+    def rotate_state_if_new_day(self):
+        today = datetime.now().strftime("%Y-%m-%d")
+        if today != self.state_day:
+            logger.info("New day detected: rotating state file from %s -> %s", self.state_day, today)
+            # archive yesterday's probe history in the background (columnar file, once per day)
+            schedule_compaction(self.state_day)
+            # finalize current day's file (already persisted), then create new one
+            self.state_day = today
+            self.state_file = state_filename_for_day(self.state_day)
+            # init fresh cache for the new day but keep previous day's file intact
+            with self.cache_lock:
+                self.cache = {k: MonitorRecord() for k in url_dict.keys()}
+                self.episodes.clear()
+            save_state_file(self.state_file, self.cache)
+            logger.info("Created new state file: %s", self.state_file)
+
+    def monitor(self):
+        try:
+            self.restore_state()
+        except Exception:
+            logger.exception("restore_state failed")
+            return
+
+        driver = None
+        next_run = time.time()
+        try:
+            with probe_metrics.timer(METRICS_SCRAPER, DRIVER_METRICS_KEY, "acquire"):
+                driver = self.dm.get_driver()
+        except Exception as e:
+            logger.exception("initial driver creation failed: %s", e)
+            driver = None
+
+        while not self.stop_event.is_set():
+            # keep 60s cadence
+            if time.time() < next_run:
+                time.sleep(0.25)
+                continue
+            # the cycle is due at tick_due and each URL at its spread offset after it; a URL's lateness is
+            # how long it waited behind the others past that point
+            tick_due = next_run
+            schedule_metrics.tick(METRICS_SCRAPER, CYCLE_METRICS_KEY, tick_due, time.time(), CYCLE_INTERVAL)
+
+            # rotate state if new day
+            try:
+                self.rotate_state_if_new_day()
+            except Exception:
+                logger.exception("rotate_state_if_new_day failed")
+
+            # ensure driver
+            if driver is None:
+                try:
+                    with probe_metrics.timer(METRICS_SCRAPER, DRIVER_METRICS_KEY, "acquire"):
+                        driver = self.dm.get_driver()
+                except Exception as e:
+                    logger.exception("driver creation failed in loop: %s", e)
+                    time.sleep(5)
+                    next_run += CYCLE_INTERVAL
+                    continue
+
+            cycle_start = time.time()
+
+            # iterate configured URLs; the i-th of the URLs this cycle will probe is due spread_offset(i)
+            # after the cycle start (completed and out-of-window URLs take no slot)
+            urls = list(url_dict.items())
+            slots = {key: i for i, key in enumerate(k for k, info in urls if self.will_probe(k, info))}
+            spread_window = CYCLE_INTERVAL * SPREAD_FRACTION
+            self.wake.clear()
+            for key, info in urls:
+                probe_status = None  # set once a page was actually probed; recorded in probe_store
+                probe_start = time.time()
+                record = None
+                try:
+                    # ensure state record exists (skip keys removed by a reload since the cycle started)
+                    record = self.live_record(key)
+                    if record is None:
+                        continue
+
+                    # If already completed for today -> do not scrape this URL
+                    if record.completed:
+                        # final state for the UI to lock the row; the emitter only sends it once
+                        # (e.g. on process start), repeats in later cycles are dropped
+                        self.emit_payload(key, "completed")
+                        continue
+
+                    # check time window (start/end)
+                    in_window, window_state = self._in_time_window(info)
+                    if window_state == "completed":
+                        # mark completed and emit final payload once
+                        if not record.completed:
+                            record.completed = True
+                            if not record.last_changed:
+                                record.last_changed = int(time.time())
+                            self.write_state(key)
+                            # emit final completed payload (will include last_value)
+                            self.emit_payload(key, "completed")
+                        # stop scraping this URL for the rest of the day
+                        continue
+
+                    if not in_window:
+                        # pre-start: do nothing (UI can show not-started if you choose)
+                        # we avoid emitting "not-started" every cycle to reduce churn
+                        continue
+
+                    # OK: in-window -> perform scrape, at this URL's place in the cycle
+                    url_due = tick_due + spread_offset(slots.get(key, 0), len(slots), spread_window)
+                    if url_due > time.time():
+                        if not self.wait_spread(url_due):
+                            break
+                        info = url_dict.get(key)
+                        if info is None:
+                            continue  # removed by a reload during the wait
+                        probe_start = time.time()
+                    schedule_metrics.tick(METRICS_SCRAPER, key, url_due, time.time(), CYCLE_INTERVAL)
+                    url = info.get("url")
+                    selector = info.get("selector")
+                    typ = info.get("type", "timestamp")
+
+                    # conditional HTTP check (opt-in per URL): a 304 means the last value still stands
+                    if info.get("conditional") and record.value_hash and not conditional_probe.modified(url):
+                        raw = record.last_value
+                    else:
+                        raw = None
+
+                    # load page through the shared fetch layer (reuses a fresh 1-sec result if any)
+                    try:
+                        raw = raw or shared_cache.fetch(
+                            fetch_key(url, typ, selector),
+                            lambda: self.load_page(driver, url, selector, key),
+                            max_age=SHARED_RESULT_MAX_AGE,
+                            profile=FETCH_PROFILE,
+                        )
+                    except PageLoadError as e:
+                        logger.error("[%s] load fail: %s", key, e)
+                        # emit error and do not change last_value/last_changed
+                        probe_status = "error"
+                        self.emit_payload(key, "error")
+                        continue
+
+                    if not raw:
+                        logger.warning("[%s] invalid format after retries", key)
+                        probe_status = "invalid format"
+                        self.emit_payload(key, "invalid format")
+                        continue
+
+                    # got raw data — compare and update state
+                    # unchanged content (same hash) reuses the parse from when it was first seen
+                    with probe_metrics.timer(METRICS_SCRAPER, key, "parse"):
+                        value_hash = content_hash(raw)
+                        cached = self.parsed.get(key)
+                        if cached and cached[0] == value_hash:
+                            parsed_dt = cached[1]
+                        else:
+                            parsed_dt = parse_reported_ts(raw)
+                            self.parsed[key] = (value_hash, parsed_dt)
+
+                    now = time.time()
+                    lag = (now - parsed_dt.timestamp()) if parsed_dt else (now - (record.last_changed or now))
+                    stale_ts = parsed_dt and lag > STALE_THRESHOLD * 60
+
+                    # first discovery / change detected
+                    if record.last_value is None or (value_hash != record.value_hash and raw != record.last_value):
+                        # when a new value is captured during the day, completed flag goes back to False
+                        record.mark_changed(raw, value_hash, now)
+                        # if reported timestamp is old relative to local, mark stale else ok
+                        if stale_ts:
+                            self.episodes.observe(key, *record.add_stale(now, lag))
+                        else:
+                            self.episodes.observe(key, *(record.end_stale(now) or (None, None)))
+                        self.write_state(key)
+                        probe_status = "stale" if stale_ts else "ok"
+                        self.emit_payload(key, probe_status)
+                    else:
+                        # unchanged -> potentially become stale
+                        # (the counter is only persisted when the URL turns stale; quiet probes write nothing)
+                        record.stale_count += 1
+                        record.value_hash = value_hash
+
+                        if record.stale_count >= STALE_THRESHOLD or stale_ts:
+                            self.episodes.observe(key, *record.add_stale(now, lag))
+                            self.write_state(key)
+                            probe_status = "stale"
+                            self.emit_payload(key, "stale")
+                        else:
+                            # keep quiet to avoid UI churn
+                            probe_status = "ok"
+
+                except Exception as e:
+                    logger.exception("per-url handling error for %s: %s", key, e)
+                    probe_status = "error"
+                    # emit generic error so UI shows issue
+                    try:
+                        self.emit_payload(key, "error")
+                    except Exception:
+                        logger.exception("emit failure after per-url exception")
+                finally:
+                    if probe_status:
+                        probe_store.record(PROBE_KEY_PREFIX + key, probe_status, time.time() - probe_start,
+                                           record.value_hash if record else None, probe_start)
+
+            # end for all URLs in cycle
+
+            # schedule next run to keep 60-second cadence; a cycle that overran by more than a whole
+            # interval snaps forward, and the dropped cycles count as skipped ticks for every URL
+            next_run, skipped = schedule_metrics.advance(METRICS_SCRAPER, CYCLE_METRICS_KEY, next_run,
+                                                         CYCLE_INTERVAL, CYCLE_INTERVAL)
+            if skipped:
+                for key in url_dict:
+                    schedule_metrics.skip(METRICS_SCRAPER, key, skipped, log=False)
+
+            elapsed = time.time() - cycle_start
+            logger.info("1-min cycle elapsed: %.2f sec", elapsed)
+
+        # cleanup driver if loop exits
+        if driver:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+# ---------------- HOT CONFIG RELOAD ----------------
+def reload_config(worker):
+    """
+    Re-read url_dict / ui_name_mapping and apply the difference to a running Worker.
+    A config that fails to load leaves the current one in place.
+    """
+    global url_dict, ui_name_mapping
+    # the worker must have restored state from the current config before it can be diffed
+    if not worker.ready.wait(CONFIG_READY_TIMEOUT):
+        raise ConfigNotReady("worker has not restored its state yet")
+    try:
+        new_urls = load_json(URL_DICT_PATH)
+        new_names = load_json(NAME_MAPPING_PATH)
+    except Exception:
+        logger.error("config reload skipped: config could not be loaded")
+        return
+    old_urls = url_dict
+    url_dict = new_urls
+    ui_name_mapping = new_names
+    worker.apply_config(old_urls, new_urls)
+
+def start_threads(socketio=None):
+    init()
+    probe_store.start()
+    schedule_catch_up()
+    w = Worker(socketio)
+    t = threading.Thread(target=w.monitor, daemon=True)
+    t.start()
+    w.config_watcher = ConfigWatcher([URL_DICT_PATH, NAME_MAPPING_PATH], lambda: reload_config(w))
+    w.config_watcher.start()
+    politeness.watch()
+    logger.info("Started scraping_1min worker")
+    return w, t
+
+# if run standalone for debugging
+if __name__ == "__main__":
+    try:
+        init()
+    except Exception:
+        raise SystemExit(1)
+    start_threads(None)
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        print("Stopping scraper (keyboard interrupt)")
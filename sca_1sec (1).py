@@ -3,7 +3,7 @@
 # - New daily state file: state/monitor_state_1sec_YYYY-MM-DD.json
 # - Stop scraping after end time for a URL, emit final completed payload (last_value + last_changed)
 # - Do not re-scrape completed URLs until next day
-# - Resume next day's scraping after rotating state file
+# - Resume next day's scraping after rotating state file (state switch only; threads and drivers are kept)
 # - Thread-per-URL model preserved
 
 import os
@@ -12,12 +12,19 @@ import json
 import logging
 import threading
 from datetime import datetime, timedelta
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
 import re
 
+from fetch_cache import shared_cache, conditional_probe, content_hash, fetch_key, PageLoadError
+from monitor_record import MonitorRecord, records_from_json, records_to_json, get_record
+from episode_index import EpisodeIndex
+from probe_store import probe_store
+from probe_metrics import probe_metrics, schedule_metrics
+from daily_archive import schedule_compaction, schedule_catch_up
+from config_watcher import ConfigWatcher, ConfigNotReady, diff_config
+import log_pipeline
+from emitter import ChangeEmitter
+from politeness import politeness, phase_offset
+
 # ---------------- CONFIG ----------------
 CHROMEDRIVER_PATH = r"C:\Users\Hritikraj.arya\.wdm\drivers\chromedriver\win64\142.0.7444.134\chromedriver-win32\chromedriver.exe"
 LOG_DIR = "logs"
@@ -26,22 +33,30 @@ CONFIG_DIR = "config"
 URL_DICT_PATH = os.path.join(CONFIG_DIR, "url_dict_1sec.json")
 NAME_MAPPING_PATH = os.path.join(CONFIG_DIR, "url_name_mapping1sec.json")
 
-os.makedirs(LOG_DIR, exist_ok=True)
-os.makedirs(STATE_DIR, exist_ok=True)
-os.makedirs(CONFIG_DIR, exist_ok=True)
+CSS_SELECTOR = "css selector"  # selenium By.CSS_SELECTOR, without importing selenium at module load
 
 DEFAULT_INTERVAL = 1
 RESTART_WAIT = 1  # seconds
+SCHEDULE_MAX_BEHIND = 5  # seconds a schedule may lag before it is snapped forward (dropped ticks are counted)
+HEARTBEAT_METRICS_KEY = "_heartbeat"  # schedule_metrics key of the controller's 1-second emit loop
+DRIVER_LAUNCH_SPACING = 0.5  # seconds between Chrome relaunches (after a crash / recycle), so a burst of them is staggered
+STALE_AFTER = 60  # seconds without a value change before probes count towards a stale episode
+CONFIG_READY_TIMEOUT = 30  # seconds a config reload waits for the state restore before it is retried
+STALE_SAVE_INTERVAL = 30  # seconds between state writes while a stale episode is open
+FETCH_PROFILE = "1sec"  # shared_cache load profile: short render, no retries
+PROBE_KEY_PREFIX = "1sec:"  # probe_store key namespace (the same checklist name can exist in both cadences)
+METRICS_SCRAPER = "1sec"  # scraper label on probe_metrics histograms
 
 # ---------------- LOGGER ----------------
+# handlers are attached by init(); importing this module has no side effects
 logger = logging.getLogger("scraping_1sec")
 logger.setLevel(logging.INFO)
 logger.propagate = False
-log_filename = os.path.join(LOG_DIR, f"scraping_1sec_{datetime.now().strftime('%Y%m%d')}.log")
-if not any(isinstance(h, logging.FileHandler) and getattr(h, "baseFilename", "") == log_filename for h in logger.handlers):
-    fh = logging.FileHandler(log_filename, encoding="utf-8")
-    fh.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
-    logger.addHandler(fh)
+
+def setup_logging():
+    # queued JSON-lines logging: rotated at midnight / by size, written by a listener thread so
+    # scraper threads never wait on log I/O; repeated EMIT lines are rate-limited (see log_pipeline)
+    log_pipeline.attach(logger, os.path.join(LOG_DIR, "scraping_1sec.log"))
 
 # ---------------- LOAD CONFIGS ----------------
 def load_json(path):
@@ -52,18 +67,36 @@ def load_json(path):
         logger.exception("Failed to load JSON: %s | %s", path, e)
         raise
 
-try:
-    url_dict = load_json(URL_DICT_PATH)
-except Exception as e:
-    logger.exception("Failed to load %s: %s", URL_DICT_PATH, e)
-    raise SystemExit(1)
+url_dict = {}
+ui_name_mapping = {}
+_initialised = False
+
+def init():
+    """
+    Create log/state dirs, attach the log handler and load the configs. Called by start_threads;
+    safe to call more than once. Raises if the URL config cannot be loaded.
+    """
+    global url_dict, ui_name_mapping, _initialised
+    if _initialised:
+        return
+    os.makedirs(LOG_DIR, exist_ok=True)
+    os.makedirs(STATE_DIR, exist_ok=True)
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    setup_logging()
+
+    try:
+        url_dict = load_json(URL_DICT_PATH)
+    except Exception as e:
+        logger.exception("Failed to load %s: %s", URL_DICT_PATH, e)
+        raise
 
-try:
-    ui_name_mapping = load_json(NAME_MAPPING_PATH)
-except Exception as e:
-    logger.exception("Failed to load %s: %s", NAME_MAPPING_PATH, e)
-    # fallback: identity mapping
-    ui_name_mapping = {k: k for k in url_dict.keys()}
+    try:
+        ui_name_mapping = load_json(NAME_MAPPING_PATH)
+    except Exception as e:
+        logger.exception("Failed to load %s: %s", NAME_MAPPING_PATH, e)
+        # fallback: identity mapping
+        ui_name_mapping = {k: k for k in url_dict.keys()}
+    _initialised = True
 
 # ---------------- STATE (daily file) ----------------
 def state_filename_for_day(day_str):
@@ -83,17 +116,14 @@ def save_state_file(path, state):
     tmp = path + ".tmp"
     try:
         with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(state, f, indent=2, ensure_ascii=False)
+            json.dump(records_to_json(state), f, indent=2, ensure_ascii=False)
         os.replace(tmp, path)
     except Exception:
         logger.exception("save_state_file failed for %s", path)
 
-state_lock = threading.Lock()
+state_lock = threading.RLock()  # re-entrant: emit_payload is called with the lock held
 
 # ---------------- helpers ----------------
-def now_iso():
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
 # timestamp parser (copied/adapted)
 def parse_reported_ts(raw_text):
     if not raw_text or not isinstance(raw_text, str):
@@ -171,7 +201,28 @@ def parse_reported_ts(raw_text):
 
 # ---------------- DRIVER MANAGER ----------------
 class DriverManager:
-    def get_driver(self):
+    def __init__(self, launch_spacing=DRIVER_LAUNCH_SPACING):
+        self.launch_spacing = launch_spacing
+        self._launch_lock = threading.Lock()
+        self._last_launch = 0.0
+
+    def _wait_launch_slot(self):
+        # relaunches are spaced out, not serialised: each caller reserves the next slot and starts Chrome after it
+        with self._launch_lock:
+            slot = max(time.time(), self._last_launch + self.launch_spacing)
+            self._last_launch = slot
+        delay = slot - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def get_driver(self, relaunch=False):
+        # relaunch: the worker had a driver (or tried to create one) before; only those launches are
+        # spaced, so the first startup of every worker is not delayed
+        # selenium is imported on first use so importing the scraper (e.g. from app.py) stays cheap
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+
         opts = Options()
         opts.add_argument("--headless=new")
         opts.add_argument("--disable-gpu")
@@ -180,21 +231,61 @@ class DriverManager:
         opts.add_argument("--window-size=1920,1080")
         opts.add_argument("--disable-extensions")
         service = Service(CHROMEDRIVER_PATH)
+        if relaunch:
+            self._wait_launch_slot()
         d = webdriver.Chrome(service=service, options=opts)
         d.implicitly_wait(0)
         return d
 
+# ---------------- DAY STATE ----------------
+class DayState:
+    """
+    One day's state: file, records and stale episodes. Day rotation builds a new DayState and
+    swaps Worker.day in one assignment; URLWorkers always read the current one through it.
+    """
+    __slots__ = ("day", "state_file", "state_cache", "episodes")
+
+    def __init__(self, day, state_cache=None, episodes=None):
+        self.day = day
+        self.state_file = state_filename_for_day(day)
+        self.state_cache = state_cache if state_cache is not None else {}
+        self.episodes = episodes if episodes is not None else EpisodeIndex()
+
 # ---------------- URLWorker (per-URL thread) ----------------
 class URLWorker(threading.Thread):
-    def __init__(self, key, cfg, state_file, state_cache, driver_manager, socketio=None):
+    def __init__(self, key, cfg, owner, driver_manager):
         super().__init__(daemon=True)
         self.key = key
         self.cfg = cfg
-        self.state_file = state_file
-        self.state_cache = state_cache  # shared dict reference
+        self.owner = owner  # controller holding the current DayState (owner.day)
         self.dm = driver_manager
-        self.socketio = socketio
+        self.reconfigure(cfg)
+
+        self.driver = None
+        self.driver_check_due = False  # set on day rotation: check the (possibly idle) driver before the next probe
+        self.stop_event = threading.Event()
+        self.next_run = time.time() + phase_offset(key, self.interval)  # URLs start spread over their interval
+        self.fail_count = 0
+        self.launches = 0  # driver creations attempted; every one after the first is a relaunch
+        self.saved_at = 0.0  # last save_state(); paces writes of an open stale episode
+        self.MAX_FAILS_BEFORE_RESTART = 3
 
+    # current day's state; read under state_lock so a rotation is never seen half-way
+    @property
+    def state_file(self):
+        return self.owner.day.state_file
+
+    @property
+    def state_cache(self):
+        return self.owner.day.state_cache
+
+    @property
+    def episodes(self):
+        return self.owner.day.episodes
+
+    def reconfigure(self, cfg):
+        # apply a (new) url_dict entry in place; the driver and thread are kept
+        self.cfg = cfg
         self.interval = int(cfg.get("interval", DEFAULT_INTERVAL))
         if self.interval < 1:
             self.interval = DEFAULT_INTERVAL
@@ -204,22 +295,26 @@ class URLWorker(threading.Thread):
         self.url = cfg.get("url")
         self.key_id = cfg.get("key_id")
         self.tab = cfg.get("tab", "tab1sec")
-
-        self.driver = None
-        self.stop_event = threading.Event()
-        self.next_run = time.time()
-        self.fail_count = 0
-        self.MAX_FAILS_BEFORE_RESTART = 3
+        self.fetch_key = fetch_key(self.url, self.typ, self.selector)
 
     def ensure_driver(self):
         if self.driver is None:
             try:
-                self.driver = self.dm.get_driver()
+                relaunch = self.launches > 0
+                self.launches += 1
+                self.driver = self.dm.get_driver(relaunch=relaunch)
                 logger.info("[%s] driver created", self.key)
             except Exception as e:
                 logger.exception("[%s] driver create failed: %s", self.key, e)
                 self.driver = None
 
+    def driver_alive(self):
+        try:
+            self.driver.current_url
+            return True
+        except Exception:
+            return False
+
     def safe_quit_driver(self):
         try:
             if self.driver:
@@ -228,60 +323,113 @@ class URLWorker(threading.Thread):
             pass
         self.driver = None
 
+    def live_record(self):
+        """
+        This URL's record, or None once a config reload removed the key and stopped this worker
+        (a probe still in flight must not recreate the removed entry).
+        """
+        with state_lock:
+            if self.stop_event.is_set() or self.key not in url_dict:
+                return None
+            return get_record(self.state_cache, self.key)
+
     def emit_payload(self, status):
         ui_name = ui_name_mapping.get(self.key, self.key)
         with state_lock:
-            entry = self.state_cache.get(self.key, {})
+            entry = self.live_record()
+            if entry is None:
+                return
             payload = {
                 "checklist": ui_name,
                 "key_id": self.cfg.get("key_id"),
                 "status": status,
-                "last_changed": entry.get("last_changed", ""),
-                "last_value": entry.get("last_value"),
+                "last_changed": entry.last_changed_str(),
+                "last_value": entry.last_value,
                 "tab": self.cfg.get("tab", "tab1sec"),
             }
-        logger.info("EMIT -> %s", payload)
-        if self.socketio:
-            try:
-                self.socketio.emit("update_status", payload)
-            except Exception:
-                logger.exception("socket emit failed for %s", self.key)
+        try:
+            with probe_metrics.timer(METRICS_SCRAPER, self.key, "emit"):
+                msg = self.owner.emitter.emit(self.key, payload)
+        except Exception:
+            logger.exception("socket emit failed for %s", self.key)
+            return
+        if msg is not None:
+            logger.info("EMIT %s %s", self.key, status, extra=log_pipeline.emit_log_extra(self.key, msg))
 
-    def update_cache_ok(self, raw):
+    def update_cache_ok(self, raw, value_hash=None):
         with state_lock:
-            rec = self.state_cache.setdefault(self.key, {})
-            changed = (rec.get("last_value") != raw)
-            rec["last_value"] = raw
-            rec.setdefault("stale_count", 0)
-            rec.setdefault("stale_times", [])
+            rec = self.live_record()
+            if rec is None:
+                return False
+            if value_hash is not None and rec.value_hash == value_hash and rec.status == "ok":
+                # unchanged content: bump the in-memory counters, nothing to re-parse; the state is only
+                # written when a stale episode opens and then every STALE_SAVE_INTERVAL while it lasts
+                if self.note_unchanged(rec):
+                    self.save_state()
+                return False
+            if raw is None:
+                return False
+            changed = (rec.last_value != raw)
             if changed:
-                rec["stale_count"] = 0
-                rec["last_changed"] = now_iso()
-                rec["completed"] = False
-                rec["emitted_completed"] = False
+                now = time.time()
+                self.episodes.observe(self.key, *(rec.end_stale(now) or (None, None)))
+                rec.mark_changed(raw, value_hash, now)
             else:
-                rec["stale_count"] = rec.get("stale_count", 0) + 1
-            rec["status"] = "ok"
+                rec.value_hash = value_hash
+                self.note_unchanged(rec)
+            rec.status = "ok"
+            self.save_state()
+            return changed
+
+    def save_state(self):
+        # caller holds state_lock
+        with probe_metrics.timer(METRICS_SCRAPER, self.key, "state"):
             save_state_file(self.state_file, self.state_cache)
+        self.saved_at = time.time()
+
+    def note_unchanged(self, rec):
+        # caller holds state_lock; True if the stale episode should be persisted now
+        rec.stale_count += 1
+        now = time.time()
+        lag = now - rec.last_changed if rec.last_changed else 0
+        if lag < STALE_AFTER:
+            return False
+        runs = rec.stale_history.runs_total
+        self.episodes.observe(self.key, *rec.add_stale(now, lag))
+        return rec.stale_history.runs_total != runs or now - self.saved_at >= STALE_SAVE_INTERVAL
+
+    def last_hash(self):
+        # hash of the last good value, None if there is none (or the last probe was not ok)
+        with state_lock:
+            rec = self.live_record()
+            return rec.value_hash if rec is not None and rec.status == "ok" else None
+
+    def is_stale(self):
+        # value unchanged for STALE_AFTER or longer (the probe itself succeeded)
+        with state_lock:
+            rec = self.live_record()
+            return rec is not None and bool(rec.last_changed) and time.time() - rec.last_changed >= STALE_AFTER
 
     def update_cache_status(self, status):
         with state_lock:
-            rec = self.state_cache.setdefault(self.key, {})
-            rec["status"] = status
-            save_state_file(self.state_file, self.state_cache)
+            rec = self.live_record()
+            if rec is None:
+                return
+            rec.status = status
+            self.save_state()
 
     def extract_ts(self):
         if not self.driver or not self.selector:
             return None
         try:
-            el = self.driver.find_element(By.CSS_SELECTOR, self.selector)
+            el = self.driver.find_element(CSS_SELECTOR, self.selector)
             txt = el.text.strip()
             return txt or None
         except Exception:
             parts = [p.strip() for p in self.selector.split(",") if p.strip()]
             for p in parts:
                 try:
-                    el = self.driver.find_element(By.CSS_SELECTOR, p)
+                    el = self.driver.find_element(CSS_SELECTOR, p)
                     txt = el.text.strip()
                     if txt:
                         return txt
@@ -336,6 +484,25 @@ class URLWorker(threading.Thread):
 
         return True, None
 
+    def load_page(self):
+        try:
+            # the host slot covers the request only: it is released before the render pause / extract
+            with politeness.slot(self.url) as waited:
+                probe_metrics.observe(METRICS_SCRAPER, self.key, "throttle", waited)
+                with probe_metrics.timer(METRICS_SCRAPER, self.key, "get"):
+                    self.driver.get(self.url)
+        except Exception as e:
+            raise PageLoadError(e)
+
+        # tiny render pause
+        with probe_metrics.timer(METRICS_SCRAPER, self.key, "render"):
+            time.sleep(0.08)
+
+        with probe_metrics.timer(METRICS_SCRAPER, self.key, "extract"):
+            if self.typ == "tickervalue":
+                return self.extract_tickervalue() or None
+            return self.extract_ts()
+
     def fetch_and_process(self):
         # check time window first
         in_window, window_state = self._in_time_window()
@@ -344,14 +511,13 @@ class URLWorker(threading.Thread):
         if window_state == "completed":
             # mark completed and persist (once)
             with state_lock:
-                rec = self.state_cache.setdefault(self.key, {})
-                if not rec.get("completed"):
-                    rec["completed"] = True
-                    if not rec.get("last_changed"):
-                        rec["last_changed"] = now_iso()
-                    rec["status"] = "completed"
-                    rec["emitted_completed"] = False
-                    save_state_file(self.state_file, self.state_cache)
+                rec = self.live_record()
+                if rec is not None and not rec.completed:
+                    rec.completed = True
+                    if not rec.last_changed:
+                        rec.last_changed = int(time.time())
+                    rec.status = "completed"
+                    self.save_state()
                     # emit final completed payload
                     self.emit_payload("completed")
             return "completed"
@@ -361,28 +527,29 @@ class URLWorker(threading.Thread):
             return "driver-missing"
 
         try:
+            # conditional HTTP check (opt-in per URL): a 304 means nothing to load, parse or save
+            if self.cfg.get("conditional"):
+                last_hash = self.last_hash()
+                if last_hash and not conditional_probe.modified(self.url):
+                    self.update_cache_ok(None, last_hash)
+                    return "ok"
+
+            # shared fetch layer: joins an in-flight load of the same page instead of loading it twice
             try:
-                self.driver.get(self.url)
-            except Exception as e:
+                # (max_age=0: only joins a load in flight, never a finished result, which could be this
+                # worker's own previous probe)
+                raw = shared_cache.fetch(self.fetch_key, self.load_page, max_age=0, profile=FETCH_PROFILE)
+            except PageLoadError as e:
                 logger.error("[%s] load fail: %s", self.key, e)
                 return "load-error"
 
-            # tiny render pause
-            time.sleep(0.08)
-
-            if self.typ == "tickervalue":
-                vals = self.extract_tickervalue()
-                if not vals:
-                    return "invalid format"
-                raw = vals
-            else:
-                txt = self.extract_ts()
-                if not txt:
-                    return "invalid format"
-                raw = txt
+            if not raw:
+                return "invalid format"
 
-            # update cache with OK/raw
-            self.update_cache_ok(raw)
+            # update cache with OK/raw (short-circuits when the content hash is unchanged)
+            with probe_metrics.timer(METRICS_SCRAPER, self.key, "parse"):
+                value_hash = content_hash(raw)
+            self.update_cache_ok(raw, value_hash)
             return "ok"
         except Exception as e:
             logger.exception("[%s] fetch exception: %s", self.key, e)
@@ -398,34 +565,42 @@ class URLWorker(threading.Thread):
 
             # quick completed check
             with state_lock:
-                entry = self.state_cache.get(self.key, {})
-                if entry.get("completed"):
-                    # emit completed one-time per process run if not yet emitted
-                    if not entry.get("emitted_completed"):
-                        try:
-                            self.emit_payload("completed")
-                        except Exception:
-                            logger.exception("[%s] emit completed failed", self.key)
-                        # mark emitted to avoid spamming
-                        entry["emitted_completed"] = True
-                        save_state_file(self.state_file, self.state_cache)
+                entry = self.live_record()
+                if entry is None:
+                    continue  # removed by a config reload; stop_event ends the loop
+                if entry.completed:
+                    # the emitter drops repeats: this reaches clients once (per transition / process run)
+                    self.emit_payload("completed")
                     # sleep until next interval (no fetching)
-                    self.next_run += self.interval
-                    if self.next_run < time.time() - 5:
-                        self.next_run = time.time() + self.interval
+                    self.next_run, _ = schedule_metrics.advance(METRICS_SCRAPER, self.key, self.next_run,
+                                                                self.interval, SCHEDULE_MAX_BEHIND)
                     time.sleep(0.001)
                     continue
 
+            # after a day rotation: only a driver that died (e.g. while idle after completion) is recreated
+            if self.driver_check_due:
+                self.driver_check_due = False
+                if self.driver is not None and not self.driver_alive():
+                    logger.info("[%s] driver not responding after day rotation, recreating", self.key)
+                    self.safe_quit_driver()
+
             # ensure driver
             if self.driver is None:
-                self.ensure_driver()
+                with probe_metrics.timer(METRICS_SCRAPER, self.key, "acquire"):
+                    self.ensure_driver()
                 if self.driver is None:
                     self.update_cache_status("driver-create-failed")
                     time.sleep(RESTART_WAIT)
-                    self.next_run += self.interval
+                    self.next_run, _ = schedule_metrics.advance(METRICS_SCRAPER, self.key, self.next_run,
+                                                                self.interval, SCHEDULE_MAX_BEHIND)
                     continue
 
+            probe_start = time.time()
+            schedule_metrics.tick(METRICS_SCRAPER, self.key, self.next_run, probe_start, self.interval)
             status = self.fetch_and_process()
+            if status not in ("skip", "completed"):
+                probe_store.record(PROBE_KEY_PREFIX + self.key, "stale" if status == "ok" and self.is_stale() else status,
+                                   time.time() - probe_start, self.last_hash(), probe_start)
             if status != "ok":
                 # handle failures and restarts
                 self.fail_count += 1
@@ -439,10 +614,9 @@ class URLWorker(threading.Thread):
             else:
                 self.fail_count = 0
 
-            # schedule next run precisely
-            self.next_run += self.interval
-            if self.next_run < time.time() - 5:
-                self.next_run = time.time() + self.interval
+            # schedule next run precisely (a schedule too far behind is snapped forward; skips are counted)
+            self.next_run, _ = schedule_metrics.advance(METRICS_SCRAPER, self.key, self.next_run,
+                                                        self.interval, SCHEDULE_MAX_BEHIND)
 
         logger.info("[%s] URLWorker stopping, quitting driver", self.key)
         self.safe_quit_driver()
@@ -456,110 +630,158 @@ class URLWorker(threading.Thread):
 class Worker:
     def __init__(self, socketio=None):
         self.socketio = socketio
+        self.emitter = ChangeEmitter(socketio, scope=METRICS_SCRAPER)
         self.dm = DriverManager()
         self.threads = {}
         self.stop_event = threading.Event()
 
-        # day tracked in this process
-        self.state_day = datetime.now().strftime("%Y-%m-%d")
-        self.state_file = state_filename_for_day(self.state_day)
-
-        # load today's state if exists, else try to fall back to last existing file (optional)
-        self.state_cache = load_state_file(self.state_file) or {}
-
-        # ensure keys exist with defaults but preserve last_value/last_changed
-        for k in url_dict.keys():
-            if k not in self.state_cache:
-                self.state_cache[k] = {
-                    "last_value": None,
-                    "stale_count": 0,
-                    "last_changed": "",
-                    "stale_times": [],
-                    "completed": False,
-                    "emitted_completed": False,
-                    "status": "not-started"
-                }
-            else:
-                self.state_cache[k].setdefault("last_value", None)
-                self.state_cache[k].setdefault("stale_count", 0)
-                self.state_cache[k].setdefault("last_changed", "")
-                self.state_cache[k].setdefault("stale_times", [])
-                self.state_cache[k].setdefault("completed", False)
-                self.state_cache[k].setdefault("emitted_completed", False)
-                self.state_cache[k].setdefault("status", "not-started")
+        # readiness / startup timing (state is restored on the monitor thread, not here)
+        self.ready = threading.Event()
+        self.started_at = time.time()
+        self.first_emit_after = None  # seconds from Worker creation to the first emit
+
+        # day tracked in this process: state file, records and stale episodes (seeded from the restored state)
+        self.day = DayState(datetime.now().strftime("%Y-%m-%d"))
 
-        # persist initial state file
-        save_state_file(self.state_file, self.state_cache)
+    @property
+    def state_day(self):
+        return self.day.day
+
+    @property
+    def state_file(self):
+        return self.day.state_file
+
+    @property
+    def state_cache(self):
+        return self.day.state_cache
+
+    @property
+    def episodes(self):
+        return self.day.episodes
+
+    def restore_state(self):
+        t0 = time.time()
+        # load today's state if exists; every configured key gets a record (last_value/last_changed preserved)
+        raw = load_state_file(self.state_file)
+        self.day = DayState(self.state_day, records_from_json(raw, url_dict.keys()))
+
+        # only create the day's file if it is missing; a restored file is rewritten on the next update anyway
+        if not raw:
+            save_state_file(self.state_file, self.state_cache)
+
+        for k, rec in self.state_cache.items():
+            self.episodes.load(k, rec.stale_history.runs())
 
         # create URLWorker threads
         for key, cfg in url_dict.items():
-            w = URLWorker(key, cfg, self.state_file, self.state_cache, self.dm, socketio)
+            w = URLWorker(key, cfg, self, self.dm)
             self.threads[key] = w
 
+        self.ready.set()
+        logger.info("state restored in %.3fs (%d keys)", time.time() - t0, len(self.state_cache))
+
     def rotate_state_if_new_day(self):
         today = datetime.now().strftime("%Y-%m-%d")
         if today != self.state_day:
             logger.info("New day detected: rotating state file from %s -> %s", self.state_day, today)
-            # finalize current file (already persisted), then create new day's file
-            self.state_day = today
-            self.state_file = state_filename_for_day(self.state_day)
-            # initialize fresh cache for the new day but keep previous day's file intact
-            self.state_cache = {}
-            for k in url_dict.keys():
-                self.state_cache[k] = {
-                    "last_value": None,
-                    "stale_count": 0,
-                    "last_changed": "",
-                    "stale_times": [],
-                    "completed": False,
-                    "emitted_completed": False,
-                    "status": "not-started"
-                }
-            save_state_file(self.state_file, self.state_cache)
-            # restart threads with new shared cache/state_file
-            logger.info("Restarting URLWorkers with new state file")
-            self.stop_workers()
-            # recreate URLWorkers
-            self.threads = {}
-            for key, cfg in url_dict.items():
-                w = URLWorker(key, cfg, self.state_file, self.state_cache, self.dm, self.socketio)
-                self.threads[key] = w
-            self.start_workers()
+            previous = self.state_day
+            # build the new day's state off to the side; yesterday's file is already persisted and kept intact
+            new_day = DayState(today, {k: MonitorRecord() for k in url_dict.keys()})
+            save_state_file(new_day.state_file, new_day.state_cache)
+            # atomic switch: URLWorkers keep their threads and drivers and write into the new day from here on
+            with state_lock:
+                self.day = new_day
+            for w in list(self.threads.values()):
+                w.driver_check_due = True
+            # archive yesterday's probe history in the background (columnar file, once per day)
+            schedule_compaction(previous)
+            logger.info("Switched URLWorkers to %s", new_day.state_file)
+
+    def apply_config(self, old_cfg, new_cfg):
+        """
+        Bring URLWorkers in line with a reloaded url_dict: start workers for added keys,
+        stop removed ones and reconfigure changed ones in place. Unchanged keys are not touched.
+        """
+        added, removed, changed = diff_config(old_cfg, new_cfg)
+        for key in removed:
+            w = self.threads.pop(key, None)
+            if w:
+                w.stop()
+            with state_lock:
+                self.state_cache.pop(key, None)
+            self.emitter.forget(key)
+        for key in changed:
+            w = self.threads.get(key)
+            if w:
+                w.reconfigure(new_cfg[key])
+        for key in added:
+            with state_lock:
+                get_record(self.state_cache, key)
+            w = URLWorker(key, new_cfg[key], self, self.dm)
+            self.threads[key] = w
+            w.start()
+        if added or removed or changed:
+            with state_lock:
+                save_state_file(self.state_file, self.state_cache)
+        logger.info("config applied: added=%s removed=%s changed=%s", added, removed, changed)
 
     def start_workers(self):
-        for key, w in self.threads.items():
+        for key, w in list(self.threads.items()):
             if not w.is_alive():
                 w.start()
                 logger.info("started URLWorker for %s", key)
 
     def stop_workers(self):
-        for key, w in self.threads.items():
+        for key, w in list(self.threads.items()):
             try:
                 w.stop()
             except Exception:
                 logger.exception("failed stopping worker %s", key)
 
+    def live_record(self, key):
+        """
+        The key's record, or None if a config reload removed the key (the heartbeat iterates a
+        snapshot of url_dict and must not recreate it).
+        """
+        with state_lock:
+            if key not in url_dict:
+                return None
+            return get_record(self.state_cache, key)
+
     def emit_payload(self, checklist_key, status):
         ui_name = ui_name_mapping.get(checklist_key, checklist_key)
         with state_lock:
-            entry = self.state_cache.get(checklist_key, {})
+            entry = self.live_record(checklist_key)
+            if entry is None:
+                return
             payload = {
                 "checklist": ui_name,
                 "key_id": url_dict.get(checklist_key, {}).get("key_id"),
                 "status": status,
-                "last_changed": entry.get("last_changed", ""),
-                "last_value": entry.get("last_value"),
+                "last_changed": entry.last_changed_str(),
+                "last_value": entry.last_value,
                 "tab": url_dict.get(checklist_key, {}).get("tab", "tab1sec")
             }
-        logger.info("EMIT -> %s", payload)
-        if self.socketio:
-            try:
-                self.socketio.emit("update_status", payload)
-            except Exception:
-                logger.exception("socket emit failed")
+        try:
+            with probe_metrics.timer(METRICS_SCRAPER, checklist_key, "emit"):
+                msg = self.emitter.emit(checklist_key, payload)
+        except Exception:
+            logger.exception("socket emit failed")
+            return
+        if msg is None:
+            return  # nothing changed since the last message for this key
+        if self.first_emit_after is None:
+            self.first_emit_after = time.time() - self.started_at
+            logger.info("first emit %.3fs after start", self.first_emit_after)
+        logger.info("EMIT %s %s", checklist_key, status, extra=log_pipeline.emit_log_extra(checklist_key, msg))
 
     def monitor(self):
         logger.info("Worker.monitor starting - spawning URLWorkers")
+        try:
+            self.restore_state()
+        except Exception:
+            logger.exception("restore_state failed")
+            return
         # start threads
         self.start_workers()
 
@@ -569,24 +791,27 @@ class Worker:
                 if time.time() < next_run:
                     time.sleep(0.02)
                     continue
+                schedule_metrics.tick(METRICS_SCRAPER, HEARTBEAT_METRICS_KEY, next_run, time.time(), DEFAULT_INTERVAL)
 
-                # rotate state if new day detected; this will restart workers for new day
+                # rotate state if new day detected; URLWorkers switch to the new day without restarting
                 try:
                     self.rotate_state_if_new_day()
                 except Exception:
                     logger.exception("rotate_state_if_new_day failed")
 
-                # emit current status for each URL every second (controller heartbeat)
+                # reconcile the status of each URL every second (controller heartbeat); the emitter
+                # only sends the keys whose payload actually changed
                 keys = list(url_dict.keys())
                 for key in keys:
                     with state_lock:
-                        entry = self.state_cache.get(key, {})
+                        entry = self.live_record(key)
+                        if entry is None:
+                            continue
                         # if completed -> ensure last_changed present and emit completed
-                        if entry.get("completed"):
-                            if not entry.get("last_changed"):
-                                entry["last_changed"] = now_iso()
+                        if entry.completed:
+                            if not entry.last_changed:
+                                entry.last_changed = int(time.time())
                                 save_state_file(self.state_file, self.state_cache)
-                            # emit completed (don't spam; URLWorker also emits once on transition)
                             self.emit_payload(key, "completed")
                             continue
 
@@ -596,13 +821,12 @@ class Worker:
                             self.emit_payload(key, "skip")
                             continue
 
-                        # otherwise emit last known status
-                        status = entry.get("status", "unknown")
+                        # otherwise the last known status
+                        status = entry.status or "unknown"
                         self.emit_payload(key, status)
 
-                next_run += DEFAULT_INTERVAL
-                if next_run < time.time() - 5:
-                    next_run = time.time() + DEFAULT_INTERVAL
+                next_run, _ = schedule_metrics.advance(METRICS_SCRAPER, HEARTBEAT_METRICS_KEY, next_run,
+                                                       DEFAULT_INTERVAL, SCHEDULE_MAX_BEHIND)
 
         except Exception:
             logger.exception("Worker.monitor crashed")
@@ -610,6 +834,14 @@ class Worker:
             logger.info("Worker.monitor stopping - stopping URLWorkers")
             self.stop_workers()
 
+    def downtime(self, key=None, t0=None, t1=None):
+        """
+        Seconds spent stale today within [t0, t1] (epoch), for one key or {key: seconds} for all.
+        """
+        if key is None:
+            return self.episodes.downtime_all(t0, t1)
+        return self.episodes.downtime(key, t0, t1)
+
     # helper used by monitor to check time-window per key
     def _in_time_window_for_key(self, key):
         cfg = url_dict.get(key, {})
@@ -643,16 +875,50 @@ class Worker:
         self.stop_workers()
 
 
+# ---------------- hot config reload ----------------
+def reload_config(worker):
+    """
+    Re-read url_dict / ui_name_mapping and apply the difference to a running Worker.
+    A config that fails to load leaves the current one in place.
+    """
+    global url_dict, ui_name_mapping
+    # the worker must have restored state from the current config before it can be diffed
+    if not worker.ready.wait(CONFIG_READY_TIMEOUT):
+        raise ConfigNotReady("worker has not restored its state yet")
+    try:
+        new_urls = load_json(URL_DICT_PATH)
+    except Exception:
+        logger.error("config reload skipped: %s could not be loaded", URL_DICT_PATH)
+        return
+    try:
+        new_names = load_json(NAME_MAPPING_PATH)
+    except Exception:
+        new_names = {k: k for k in new_urls.keys()}
+    old_urls = url_dict
+    url_dict = new_urls
+    ui_name_mapping = new_names
+    worker.apply_config(old_urls, new_urls)
+
 # ---------------- start_threads (naming preserved) ----------------
 def start_threads(socketio=None):
+    init()
+    probe_store.start()
+    schedule_catch_up()
     w = Worker(socketio)
     t = threading.Thread(target=w.monitor, daemon=True)
     t.start()
+    w.config_watcher = ConfigWatcher([URL_DICT_PATH, NAME_MAPPING_PATH], lambda: reload_config(w))
+    w.config_watcher.start()
+    politeness.watch()
     logger.info("Started scraping_1sec Worker (monitor thread)")
     return w, t
 
 # ---------------- standalone run support ----------------
 if __name__ == "__main__":
+    try:
+        init()
+    except Exception:
+        raise SystemExit(1)
     worker, thr = start_threads(None)
     try:
         while True:
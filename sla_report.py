@@ -0,0 +1,276 @@
+# sla_report.py — freshness SLA / uptime report over any date range
+# - loads probe history into NumPy arrays: columnar daily archives (zero-copy from the mmap)
+#   plus probe_store rows for days not archived yet (e.g. today)
+# - per URL: probes, uptime %, stale %, staleness lag (mean / p50 / p95 / p99) and
+#   update-interval distribution, all computed with vectorised NumPy ops (no per-row Python loops)
+# - writes CSV and/or a standalone HTML table
+#
+# usage: python sla_report.py START_DAY [END_DAY] [--csv out.csv] [--html out.html] [--key KEY ...]
+
+import os
+import csv
+import sys
+import time
+import html
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from probe_store import probe_store
+from daily_archive import ArchiveReader, archive_path, STATUS_INDEX, STATUS_OTHER, CHANGED_BIT
+
+# statuses from emit_payload that count as "down" (page not served / not readable)
+DOWN_STATUSES = ("invalid format", "error", "load-error", "driver-missing", "driver-create-failed")
+STALE_STATUS = STATUS_INDEX["stale"]
+DOWN_CODES = np.array([STATUS_INDEX[s] for s in DOWN_STATUSES] + [STATUS_OTHER], dtype=np.uint8)
+PERCENTILES = (50, 95, 99)
+SESSION_GAP = 3600  # seconds; a longer pause between probes of a URL (overnight, restart) starts a new session
+
+COLUMNS = (
+    ["key", "probes", "uptime_pct", "stale_pct", "lag_mean_s"]
+    + [f"lag_p{p}_s" for p in PERCENTILES]
+    + ["updates", "update_interval_mean_s"]
+    + [f"update_interval_p{p}_s" for p in PERCENTILES]
+)
+
+
+# ---------------- loading ----------------
+class History:
+    """
+    Column arrays for all probes in a range: ts (float64 epoch), key (int32 into self.keys),
+    status (uint8 code, CHANGED_BIT stripped), changed (bool), latency (float32).
+    """
+
+    def __init__(self, keys, ts, key, status, changed, latency):
+        self.keys = keys
+        self.ts = ts
+        self.key = key
+        self.status = status
+        self.changed = changed
+        self.latency = latency
+
+    def __len__(self):
+        return len(self.ts)
+
+
+def _days(start_day, end_day):
+    d = datetime.strptime(start_day, "%Y-%m-%d")
+    end = datetime.strptime(end_day, "%Y-%m-%d")
+    while d <= end:
+        yield d
+        d += timedelta(days=1)
+
+
+def _from_archive(path, key_table):
+    with ArchiveReader(path) as r:
+        remap = np.array([key_table.setdefault(k, len(key_table)) for k in r.keys], dtype=np.int32)
+        ts = r.day_start + np.frombuffer(r.ts, dtype="<u4").astype(np.float64) / 1000.0
+        key = remap[np.frombuffer(r.key, dtype="<u2")] if r.n_rows else np.zeros(0, np.int32)
+        raw_status = np.frombuffer(r.status, dtype=np.uint8).copy()
+        latency = np.frombuffer(r.latency, dtype="<f4").copy()
+    return ts, key, raw_status & ~np.uint8(CHANGED_BIT), (raw_status & CHANGED_BIT) != 0, latency
+
+
+def _codes(values, mapping):
+    """
+    Map an object column through mapping, calling it once per distinct value rather than per row.
+    """
+    uniq, inv = np.unique(values, return_inverse=True)
+    return np.array([mapping(v) for v in uniq]), inv.reshape(-1)
+
+
+def _from_store(store, t0, t1, key_table):
+    rows = store.query_range(t0, t1) if os.path.exists(store.path) else []
+    if not rows:
+        return None
+    keys, ts, status, latency, hashes = (np.array(col, dtype=object) for col in zip(*rows))
+    remap, inv = _codes(keys, lambda k: key_table.setdefault(k, len(key_table)))
+    key = remap.astype(np.int32)[inv]
+    ts = ts.astype(np.float64)
+    codes, inv = _codes(status, lambda s: STATUS_INDEX.get(s, STATUS_OTHER))
+    status = codes.astype(np.uint8)[inv]
+    latency = np.nan_to_num(latency.astype(np.float64)).astype(np.float32)  # None -> nan -> 0
+
+    # changed = value_hash differs from the last hash seen for the same key, as write_archive sets
+    # the changed bit: probes without a hash (errors) are never a change and do not reset it
+    has_hash = (hashes != None) & (hashes != "")  # element-wise on the object array
+    hash_id = np.full(len(rows), -1, dtype=np.int64)
+    hash_id[has_hash] = np.unique(hashes[has_hash].astype(str), return_inverse=True)[1].reshape(-1)
+    order = np.lexsort((ts, key))
+    k_sorted, h_sorted, has_sorted = key[order], hash_id[order], has_hash[order]
+    # index of the latest probe with a hash strictly before each row, then only within the same key
+    last = np.maximum.accumulate(np.where(has_sorted, np.arange(len(order)), -1))
+    prev = np.concatenate(([-1], last[:-1]))
+    prev_hash = np.where((prev >= 0) & (k_sorted[prev.clip(min=0)] == k_sorted), h_sorted[prev.clip(min=0)], -1)
+    changed = np.empty(len(order), dtype=bool)
+    changed[order] = has_sorted & (h_sorted != prev_hash)
+    return ts, key, status, changed, latency
+
+
+def load_history(start_day, end_day, store=probe_store, keys=None):
+    key_table = {}
+    parts = []
+    for d in _days(start_day, end_day):
+        day = d.strftime("%Y-%m-%d")
+        path = archive_path(day)
+        if os.path.exists(path):
+            parts.append(_from_archive(path, key_table))
+        else:
+            part = _from_store(store, d.timestamp(), (d + timedelta(days=1)).timestamp(), key_table)
+            if part:
+                parts.append(part)
+    names = [None] * len(key_table)
+    for k, i in key_table.items():
+        names[i] = k
+    if not parts:
+        return History(names, *(np.zeros(0, dt) for dt in (np.float64, np.int32, np.uint8, bool, np.float32)))
+    h = History(names, *(np.concatenate(cols) for cols in zip(*parts)))
+    if keys:
+        wanted = np.isin(h.key, [key_table[k] for k in keys if k in key_table])
+        h = History(names, h.ts[wanted], h.key[wanted], h.status[wanted], h.changed[wanted], h.latency[wanted])
+    return h
+
+
+# ---------------- vectorised stats ----------------
+def _group_percentiles(values, groups, n_groups, pcts):
+    """
+    Percentiles of values per group (nearest-rank on the sorted group slice). NaN for empty groups.
+    """
+    out = np.full((n_groups, len(pcts)), np.nan)
+    if len(values) == 0:
+        return out
+    order = np.lexsort((values, groups))
+    v, g = values[order], groups[order]
+    counts = np.bincount(g, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    has = counts > 0
+    for j, p in enumerate(pcts):
+        idx = starts + np.floor((counts - 1).clip(min=0) * (p / 100.0)).astype(np.int64)
+        out[has, j] = v[idx[has]]
+    return out
+
+
+def compute_report(h):
+    n_keys = len(h.keys)
+    if n_keys == 0:
+        return []
+
+    probes = np.bincount(h.key, minlength=n_keys)
+    down = np.bincount(h.key, weights=np.isin(h.status, DOWN_CODES), minlength=n_keys)
+    stale = np.bincount(h.key, weights=(h.status == STALE_STATUS), minlength=n_keys)
+
+    # sort by (key, ts) so every per-key sequence is contiguous and time-ordered
+    order = np.lexsort((h.ts, h.key))
+    key, ts, changed = h.key[order], h.ts[order], h.changed[order]
+    first = np.ones(len(key), dtype=bool)
+    first[1:] = (key[1:] != key[:-1]) | (np.diff(ts) > SESSION_GAP)
+    change_pt = changed | first  # first probe of a session has no earlier history: treat as a change
+
+    # staleness lag at each probe = ts - ts of the latest change of the same key;
+    # offsetting by key keeps the running max from leaking across keys
+    span = (ts.max() - ts.min() + 1.0) if len(ts) else 1.0
+    shifted = ts - ts.min() + key * span
+    last_change = np.maximum.accumulate(np.where(change_pt, shifted, -np.inf))
+    lag = shifted - last_change
+
+    lag_sum = np.bincount(key, weights=lag, minlength=n_keys)
+    lag_pct = _group_percentiles(lag, key, n_keys, PERCENTILES)
+
+    # update intervals = gaps between consecutive real changes of the same key and session
+    real = changed & ~first
+    ck = key[change_pt]
+    cts = ts[change_pt]
+    same = np.zeros(len(ck), dtype=bool)
+    same[1:] = (ck[1:] == ck[:-1]) & ~first[change_pt][1:]
+    is_update = real[change_pt]
+    prev_update = np.zeros(len(ck), dtype=bool)
+    prev_update[1:] = is_update[:-1]
+    sel = same & is_update & prev_update
+    intervals = np.diff(cts, prepend=cts[:1])[sel]
+    ikey = ck[sel]
+    updates = np.bincount(ikey, minlength=n_keys)
+    int_sum = np.bincount(ikey, weights=intervals, minlength=n_keys)
+    int_pct = _group_percentiles(intervals, ikey, n_keys, PERCENTILES)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        uptime = 100.0 * (1.0 - down / probes)
+        stale_pct = 100.0 * stale / probes
+        lag_mean = lag_sum / probes
+        int_mean = np.where(updates > 0, int_sum / np.maximum(updates, 1), np.nan)
+
+    rows = []
+    for i in np.argsort(np.array(h.keys, dtype=object)):
+        if probes[i] == 0:
+            continue
+        rows.append(
+            [h.keys[i], int(probes[i]), uptime[i], stale_pct[i], lag_mean[i]]
+            + list(lag_pct[i])
+            + [int(updates[i]), int_mean[i]]
+            + list(int_pct[i])
+        )
+    return rows
+
+
+# ---------------- output ----------------
+def _fmt(v):
+    if isinstance(v, float):
+        return "" if np.isnan(v) else f"{v:.2f}"
+    return str(v)
+
+
+def write_csv(rows, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(COLUMNS)
+        for r in rows:
+            w.writerow([_fmt(v) for v in r])
+
+
+def write_html(rows, path, title="Freshness SLA report"):
+    head = "".join(f"<th>{html.escape(c)}</th>" for c in COLUMNS)
+    body = "\n".join(
+        "<tr>" + "".join(f"<td>{html.escape(_fmt(v))}</td>" for v in r) + "</tr>" for r in rows
+    )
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+            f"<title>{html.escape(title)}</title>"
+            "<style>body{font-family:sans-serif}table{border-collapse:collapse}"
+            "td,th{border:1px solid #ccc;padding:4px 8px;text-align:right}"
+            "td:first-child,th:first-child{text-align:left}</style></head><body>"
+            f"<h3>{html.escape(title)}</h3><table><thead><tr>{head}</tr></thead>"
+            f"<tbody>\n{body}\n</tbody></table></body></html>\n"
+        )
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Per-URL uptime / freshness SLA report")
+    ap.add_argument("start_day", help="YYYY-MM-DD")
+    ap.add_argument("end_day", nargs="?", help="YYYY-MM-DD (default: start_day)")
+    ap.add_argument("--csv", help="write CSV to this path")
+    ap.add_argument("--html", help="write HTML to this path")
+    ap.add_argument("--key", action="append", help="restrict to these probe keys (e.g. 1min:Gainers)")
+    args = ap.parse_args(argv)
+
+    started = time.time()
+    h = load_history(args.start_day, args.end_day or args.start_day, keys=args.key)
+    loaded = time.time()
+    rows = compute_report(h)
+    done = time.time()
+
+    if args.csv:
+        write_csv(rows, args.csv)
+    if args.html:
+        write_html(rows, args.html, f"Freshness SLA report {args.start_day} .. {args.end_day or args.start_day}")
+    if not args.csv and not args.html:
+        w = csv.writer(sys.stdout)
+        w.writerow(COLUMNS)
+        for r in rows:
+            w.writerow([_fmt(v) for v in r])
+    print(f"{len(h)} probes, {len(rows)} URLs: load {loaded - started:.3f}s, compute {done - loaded:.3f}s",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
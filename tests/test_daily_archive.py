@@ -0,0 +1,110 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import daily_archive
+from daily_archive import ArchiveReader, archive_path, compact_day, compact_missing, write_archive, MAGIC_V1, HEADER
+from probe_store import ProbeStore
+
+DAY_START = 1_700_000_000
+
+
+def rows():
+    return [
+        ("A", DAY_START + 1.0, "ok", 0.1, "h1"),
+        ("B", DAY_START + 2.0, "error", 0.2, None),
+        ("A", DAY_START + 3.0, "ok", 0.1, "h1"),
+        ("A", DAY_START + 4.0, "stale", 0.3, "h2"),
+        ("B", DAY_START + 5.0, "something-new", 0.4, None),
+    ]
+
+
+def test_roundtrip(tmp_path):
+    path = str(tmp_path / "day.bin")
+    assert write_archive(path, DAY_START, rows()) == 5
+    with ArchiveReader(path) as r:
+        assert r.version == 2
+        assert r.keys == ["A", "B"]
+        got = list(r.range())
+    assert [(ts, k, st, changed) for ts, k, st, _, changed in got] == [
+        (DAY_START + 1.0, "A", "ok", True),
+        (DAY_START + 2.0, "B", "error", False),
+        (DAY_START + 3.0, "A", "ok", False),
+        (DAY_START + 4.0, "A", "stale", True),
+        (DAY_START + 5.0, "B", "other", False),
+    ]
+    assert got[1][3] == pytest.approx(0.2)
+
+
+def test_range_and_key_filter(tmp_path):
+    path = str(tmp_path / "day.bin")
+    write_archive(path, DAY_START, rows())
+    with ArchiveReader(path) as r:
+        assert [row[0] for row in r.range(DAY_START + 2, DAY_START + 4)] == [DAY_START + 2.0, DAY_START + 3.0]
+        assert [row[2] for row in r.range(key="B")] == ["error", "other"]
+        assert r.status_counts() == {"A": {"ok": 2, "stale": 1}, "B": {"error": 1, "other": 1}}
+
+
+def test_reads_v1_archive(tmp_path, monkeypatch):
+    # a MONARC1 file: no changed bit, "other" stored as 255
+    monkeypatch.setattr(daily_archive, "MAGIC", MAGIC_V1)
+    monkeypatch.setattr(daily_archive, "STATUS_OTHER", 255)
+    path = str(tmp_path / "v1.bin")
+    write_archive(path, DAY_START, [(k, ts, st, lat, None) for k, ts, st, lat, _ in rows()])
+    monkeypatch.undo()
+
+    with ArchiveReader(path) as r:
+        assert r.version == 1
+        got = [(st, changed) for _, _, st, _, changed in r.range()]
+        assert list(r.status) == [0, 3, 0, 1, daily_archive.STATUS_OTHER]
+    assert got == [("ok", False), ("error", False), ("ok", False), ("stale", False), ("other", False)]
+
+
+def test_rejects_unknown_magic(tmp_path):
+    path = tmp_path / "junk.bin"
+    path.write_bytes(HEADER.pack(b"NOTARC\0\0", 0, 0, 0))
+    with pytest.raises(ValueError):
+        ArchiveReader(str(path))
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = ProbeStore(path=str(tmp_path / "probes.sqlite3"), flush_interval=0.05).start()
+    yield s
+    s.stop()
+
+
+def day_start(days_ago, now):
+    d = datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (d - timedelta(days=days_ago)).timestamp()
+
+
+def test_compact_day(store, tmp_path):
+    start = day_start(1, datetime.now().timestamp())
+    for i in range(25):
+        store.record(f"k{i % 3}", "ok", 0.1, f"h{i}", ts=start + i)
+    store.record("k0", "ok", 0.1, None, ts=start + 86400)  # next day
+    assert store.flush(5)
+
+    day = datetime.fromtimestamp(start).strftime("%Y-%m-%d")
+    path = compact_day(day, store, str(tmp_path / "arch"))
+    with ArchiveReader(path) as r:
+        assert r.n_rows == 25 and sorted(r.keys) == ["k0", "k1", "k2"]
+    assert compact_day(day, store, str(tmp_path / "arch")) is None  # already archived
+
+
+def test_compact_missing_catches_up_on_finished_days(store, tmp_path):
+    now = day_start(0, datetime.now().timestamp()) + 3600
+    for days_ago in (9, 3, 2, 0):  # 9 days back is past raw retention: partly downsampled, skipped
+        store.record("a", "ok", 0.1, "h", ts=day_start(days_ago, now) + 60)
+    assert store.flush(5)
+    arch = str(tmp_path / "arch")
+    day = lambda n: datetime.fromtimestamp(day_start(n, now)).strftime("%Y-%m-%d")
+    os.makedirs(arch)
+    open(archive_path(day(2), arch), "wb").close()  # archived already
+
+    assert compact_missing(store, arch, now=now) == [archive_path(day(3), arch)]
+    assert not os.path.exists(archive_path(day(9), arch))
+    assert not os.path.exists(archive_path(day(0), arch))  # today is still being written
+    assert compact_missing(store, arch, now=now) == []
@@ -0,0 +1,100 @@
+import emitter
+from emitter import ChangeEmitter, EmitLog, EVENT
+
+
+def emitters(size=4):
+    log = EmitLog(size=size, start=100)
+    return log, ChangeEmitter(scope="1sec", log=log), ChangeEmitter(scope="1min", log=log)
+
+
+def test_seq_is_shared_and_increasing():
+    log, a, b = emitters()
+    assert a.emit("x", {"v": 1})["seq"] == 101
+    assert b.emit("x", {"v": 1})["seq"] == 102  # same key in another scraper is its own row
+    assert a.emit("x", {"v": 1}) is None
+    assert a.emit("x", {"v": 1}, force=True)["seq"] == 103
+    assert emitter.current_seq(log) == 103
+
+
+def test_since_returns_missed_messages():
+    log, a, _ = emitters()
+    for i in range(3):
+        a.emit(f"k{i}", {"v": i})
+    assert [m["seq"] for _, m in log.since(101)] == [102, 103]
+    assert log.since(103) == []
+    assert log.since(500) == []  # client ahead of us (e.g. after a restart): nothing to replay
+
+
+def test_since_reports_a_gap_older_than_the_buffer():
+    log, a, _ = emitters(size=4)
+    for i in range(6):
+        a.emit("k", {"v": i})  # seq 101..106, buffer keeps 103..106
+    assert log.since(101) is None
+    assert [m["seq"] for _, m in log.since(102)] == [103, 104, 105, 106]
+
+
+def test_resync_replays_or_falls_back_to_full_state():
+    log, a, b = emitters(size=4)
+    a.emit("k1", {"v": 1, "tab": "tab1sec"})  # 101
+    b.emit("k2", {"v": 1, "tab": "tab1min"})  # 102
+    for i in range(2, 6):
+        a.emit("k1", {"v": i, "tab": "tab1sec"})  # 103..106
+
+    messages, full = emitter.resync(104, log=log)
+    assert not full and [m["seq"] for _, m in messages] == [105, 106]
+
+    # 101..102 left the buffer: every row's current message, oldest first
+    messages, full = emitter.resync(100, log=log)
+    assert full and [(m["seq"], m["v"]) for _, m in messages] == [(102, 1), (106, 5)]
+    assert {event for event, _ in messages} == {EVENT}
+
+    messages, full = emitter.resync(100, tab="tab1min", log=log)
+    assert full and [m["seq"] for _, m in messages] == [102]
+
+
+def test_record_detects_gaps_in_a_mirrored_stream():
+    log = EmitLog(size=10, start=0)
+    assert log.record(EVENT, {"seq": 5})
+    assert not log.record(EVENT, {"seq": 5})  # duplicate
+    assert not log.record(EVENT, {"seq": 3})  # older
+    assert log.record(EVENT, {"seq": 6})
+    assert [m["seq"] for _, m in log.since(5)] == [6]
+    assert log.record(EVENT, {"seq": 9})  # 7 and 8 never arrived: older messages cannot be replayed
+    assert log.since(5) is None
+    assert [m["seq"] for _, m in log.since(8)] == [9]
+
+
+def test_snapshot_latest_per_row():
+    log, a, b = emitters()
+    a.emit("k1", {"v": 1, "tab": "tab1sec"})
+    b.emit("k1", {"v": 1, "tab": "tab1min"})
+    a.emit("k1", {"v": 2, "tab": "tab1sec"})
+    seq, rows = emitter.snapshot(log=log)
+    assert seq == 103 and [(m["tab"], m["v"]) for m in rows] == [("tab1min", 1), ("tab1sec", 2)]
+    assert [m["v"] for m in emitter.snapshot("tab1sec", log=log)[1]] == [2]
+
+
+def test_record_accepts_gaps_the_sender_coalesced():
+    log = EmitLog(size=10, start=0)
+    assert log.record(EVENT, {"seq": 5})
+    assert log.record(EVENT, {"seq": 7})  # 6 was coalesced into a later message, not sent yet
+    assert log.since(5) is None  # until then 6 may have been lost
+    assert log.record(EVENT, {"seq": 8}, covered=[6])
+    assert [m["seq"] for _, m in log.since(5)] == [7, 8]
+    assert log.record(EVENT, {"seq": 10}, covered=[6])  # 9 never shows up: lost
+    assert log.since(5) is None and log.since(9) == [(EVENT, {"seq": 10})]
+
+
+def test_mirror_keeps_its_buffer_across_coalesced_seqs(monkeypatch):
+    monkeypatch.setattr(emitter.key_table, "assign", True)  # restored after MirrorEmitter turns it off
+    log = EmitLog(size=10)
+    mirror = emitter.MirrorEmitter(log=log)
+    mirror.feed(EVENT, {"seq": 1000, "checklist": "A", "tab": "tab1sec", "v": 1})
+    mirror.feed(EVENT, {"seq": 1002, "checklist": "B", "tab": "tab1sec", "v": 1})
+    mirror.feed(emitter.ALERT_EVENT, {"seq": 1003, "scraper": "1sec", "key": "B", "tab": "tab1sec"})
+    mirror.feed(EVENT, {"seq": 1004, "checklist": "A", "tab": "tab1sec", "v": 3, emitter.COALESCED_FIELD: [1001]})
+    messages, full = emitter.resync(1000, log=log)
+    assert not full and [m["seq"] for _, m in messages] == [1002, 1003, 1004]
+    assert emitter.COALESCED_FIELD not in messages[-1][1]
+    # alerts are replayed but are not rows
+    assert [m["checklist"] for m in emitter.snapshot(log=log)[1]] == ["B", "A"]
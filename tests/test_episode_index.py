@@ -0,0 +1,79 @@
+import threading
+
+from episode_index import EpisodeIndex
+from monitor_record import StaleHistory
+
+T0 = 1_700_000_000
+
+
+def index_with(*episodes, key="a"):
+    idx = EpisodeIndex()
+    for start, end in episodes:
+        idx.observe(key, T0 + start, T0 + end)
+    return idx
+
+
+def test_downtime_sums_and_clips_episodes():
+    idx = index_with((0, 10), (20, 30), (50, 100))
+    assert idx.downtime("a") == 70
+    assert idx.downtime("a", T0 + 5, T0 + 25) == 5 + 5
+    assert idx.downtime("a", T0 + 60, T0 + 70) == 10  # inside one episode
+    assert idx.downtime("a", T0 + 10, T0 + 20) == 0  # between episodes
+    assert idx.downtime("a", T0 + 200, T0 + 300) == 0
+    assert idx.downtime("a", T0 + 30, T0 + 20) == 0
+    assert idx.downtime("missing") == 0
+
+
+def test_growing_episode_updates_in_place():
+    idx = EpisodeIndex()
+    h = StaleHistory()
+    for t in (0, 30, 60):
+        idx.observe("a", *h.add(T0 + t))
+    idx.observe("a", *h.close(T0 + 65))
+    assert idx.episodes("a") == [(T0, T0 + 65)]
+    assert idx.downtime("a") == 65
+    idx.observe("a", T0 - 100, T0 - 50)  # older than the newest episode: ignored
+    idx.observe("a", None, None)
+    assert idx.episodes("a") == [(T0, T0 + 65)]
+
+
+def test_episodes_overlapping_a_window():
+    idx = index_with((0, 10), (20, 30), (50, 100))
+    assert idx.episodes("a", T0 + 5, T0 + 25) == [(T0, T0 + 10), (T0 + 20, T0 + 30)]
+    assert idx.episodes("a", T0 + 30, T0 + 50) == []
+    assert len(idx.episodes("a")) == 3
+
+
+def test_load_seeds_from_stale_history_after_wrap_around():
+    h = StaleHistory(capacity=2)
+    for n in range(4):
+        h.add(T0 + 100 * n)
+        h.close(T0 + 100 * n + 20)
+    idx = EpisodeIndex()
+    idx.load("a", h.runs())
+    assert idx.episodes("a") == [(T0 + 200, T0 + 220), (T0 + 300, T0 + 320)]
+    assert idx.downtime_all() == {"a": 40}
+    idx.clear()
+    assert idx.downtime_all() == {}
+
+
+def test_concurrent_writers_and_readers():
+    idx = EpisodeIndex()
+    keys = [f"k{i}" for i in range(4)]
+
+    def write(key):
+        for n in range(500):
+            idx.observe(key, T0 + 10 * n, T0 + 10 * n + 5)
+
+    def read():
+        for _ in range(200):
+            for v in idx.downtime_all().values():
+                assert v >= 0
+
+    threads = [threading.Thread(target=write, args=(k,)) for k in keys]
+    threads += [threading.Thread(target=read) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    assert idx.downtime_all() == {k: 2500 for k in keys}
@@ -0,0 +1,114 @@
+import json
+import queue
+import threading
+import time
+
+import pytest
+
+import emitter
+import fanout
+from fanout import Broker, LocalPubSubManager, recv_frame
+
+
+def wait_for(cond, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def broker(tmp_path):
+    url = f"unix://{tmp_path / 'mq.sock'}"
+    b = Broker(url)
+    threading.Thread(target=b.serve_forever, daemon=True).start()
+    assert wait_for(lambda: (tmp_path / "mq.sock").exists())
+    return b
+
+
+def subscribe(broker, n=1):
+    socks = [fanout._connect(broker.url, fanout.ROLE_SUB) for _ in range(n)]
+    assert wait_for(lambda: len(broker._subs) == n)
+    for s in socks:
+        s.settimeout(5)
+    return socks
+
+
+def test_publish_reaches_every_subscriber(broker):
+    subs = subscribe(broker, 2)
+    pub = LocalPubSubManager(broker.url)
+    for i in range(3):
+        pub._publish({"method": "emit", "event": "update_status", "data": [{"seq": i}]})
+    prefix = fanout.CHANNEL.encode() + b"\n"
+    for s in subs:
+        frames = [recv_frame(s) for _ in range(3)]
+        assert all(f.startswith(prefix) for f in frames)
+        assert [json.loads(f[len(prefix):])["data"][0]["seq"] for f in frames] == [0, 1, 2]
+        s.close()
+
+
+def test_listen_yields_messages_of_its_channel(broker):
+    sub = LocalPubSubManager(broker.url)
+    received = []
+
+    def listen():
+        for msg in sub._listen():
+            received.append(msg)
+
+    threading.Thread(target=listen, daemon=True).start()
+    assert wait_for(lambda: len(broker._subs) == 1)
+    LocalPubSubManager(broker.url, channel="other")._publish({"n": 0})
+    LocalPubSubManager(broker.url)._publish({"n": 1})
+    assert wait_for(lambda: received)
+    assert received == [{"n": 1}]
+
+
+def test_publish_without_broker_drops(tmp_path):
+    pub = LocalPubSubManager(f"unix://{tmp_path / 'missing.sock'}")
+    pub._publish({"n": 1})  # logged and dropped, never raises
+    assert pub._pub is None
+
+
+def test_full_subscriber_queue_only_drops_for_that_subscriber():
+    b = Broker("unix:///unused")
+    slow, fast = queue.Queue(maxsize=1), queue.Queue(maxsize=10)
+    b._subs = {"slow": slow, "fast": fast}
+    for i in range(3):
+        b.publish(b"%d" % i)
+    assert slow.qsize() == 1 and fast.qsize() == 3
+    assert b.dropped == 2
+
+
+def test_mirror_manager_feeds_the_mirror(monkeypatch):
+    fed = []
+
+    class Mirror:
+        def feed(self, event, msg):
+            fed.append((event, msg))
+
+    mgr = fanout.make_manager("unix:///unused", mirror=Mirror())
+    monkeypatch.setattr(LocalPubSubManager, "_handle_emit", lambda self, message: None)
+    mgr._handle_emit({"event": "update_status", "data": [{"seq": 7}]})
+    assert fed == [("update_status", {"seq": 7})]
+
+
+def test_snapshot_file_roundtrip(tmp_path, monkeypatch):
+    log = emitter.EmitLog(start=10)
+    em = emitter.ChangeEmitter(scope="test", log=log)
+    em.emit("k", {"checklist": "K", "key_id": "row-K", "tab": "tab1sec", "status": "ok"})
+    export_state = emitter.export_state
+    monkeypatch.setattr(emitter, "export_state", lambda: export_state(log))
+    path = str(tmp_path / "snap.json")
+    fanout.write_snapshot(path)
+
+    loaded = []
+
+    class Mirror:
+        def load(self, state):
+            loaded.append(state)
+
+    assert fanout.load_snapshot(Mirror(), path)
+    assert loaded[0]["seq"] == 11 and loaded[0]["rows"][0]["checklist"] == "K"
+    assert not fanout.load_snapshot(Mirror(), str(tmp_path / "none.json"))
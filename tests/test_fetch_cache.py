@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+from fetch_cache import FetchCache, PageLoadError, fetch_key, content_hash
+
+
+class SlowLoader:
+    """
+    loader() that blocks until release(); counts calls.
+    """
+
+    def __init__(self, value="v", error=None):
+        self.value = value
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+        self.gate = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def release(self):
+        self.gate.set()
+
+
+def fetch_in_threads(cache, key, loader, n, **kw):
+    results, errors = [], []
+
+    def run():
+        try:
+            results.append(cache.fetch(key, loader, **kw))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(n)]
+    return threads, results, errors
+
+
+def start_leader_and_followers(cache, loader, n, **kw):
+    threads, results, errors = fetch_in_threads(cache, "k", loader, n, **kw)
+    threads[0].start()
+    assert loader.started.wait(5)
+    for t in threads[1:]:
+        t.start()
+    assert wait_for(lambda: cache.joins == n - 1)
+    return threads, results, errors
+
+
+def wait_for(cond, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if cond():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def test_concurrent_followers_share_one_load():
+    cache = FetchCache()
+    loader = SlowLoader("page")
+    threads, results, errors = start_leader_and_followers(cache, loader, 4)
+    loader.release()
+    for t in threads:
+        t.join(5)
+    assert results == ["page"] * 4 and not errors
+    assert (loader.calls, cache.loads, cache.joins) == (1, 1, 3)
+
+
+def test_leader_exception_reaches_every_follower():
+    cache = FetchCache()
+    loader = SlowLoader(error=PageLoadError("timeout"))
+    threads, results, errors = start_leader_and_followers(cache, loader, 3)
+    loader.release()
+    for t in threads:
+        t.join(5)
+    assert not results and len(errors) == 3
+    assert all(isinstance(e, PageLoadError) for e in errors)
+    assert cache.get_fresh("k") is None
+    # the next fetch loads again
+    assert cache.fetch("k", lambda: "ok") == "ok"
+
+
+def test_fresh_result_is_reused_until_max_age():
+    cache = FetchCache(ttl=0.2)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return f"v{len(calls)}"
+
+    assert cache.fetch("k", loader) == "v1"
+    assert cache.fetch("k", loader) == "v1"
+    assert cache.hits == 1
+    assert cache.fetch("k", loader, max_age=0) == "v2"  # never reads a finished result
+    time.sleep(0.25)
+    assert cache.fetch("k", loader) == "v3"
+    cache.invalidate("k")
+    assert cache.fetch("k", loader) == "v4"
+
+
+def test_empty_results_are_not_cached():
+    cache = FetchCache()
+    assert cache.fetch("k", lambda: None) is None
+    assert cache.fetch("k", lambda: "") == ""
+    assert cache.fetch("k", lambda: "v") == "v"
+    assert cache.loads == 3
+
+
+def test_loads_of_another_profile_are_not_joined():
+    cache = FetchCache()
+    slow = SlowLoader("1min page")
+    t = threading.Thread(target=cache.fetch, args=("k", slow), kwargs={"profile": "1min"})
+    t.start()
+    assert slow.started.wait(5)
+    # a 1-sec fetch of the same page loads on its own instead of waiting for the slow 1-min load
+    assert cache.fetch("k", lambda: "1sec page", max_age=0, profile="1sec") == "1sec page"
+    assert cache.joins == 0
+    slow.release()
+    t.join(5)
+    # finished non-empty results are shared across profiles
+    assert cache.fetch("k", lambda: pytest.fail("should be cached"), profile="1min") == "1min page"
+
+
+def test_fetch_key_and_hash():
+    assert fetch_key("u", None, None) == fetch_key("u", "timestamp", "")
+    assert fetch_key("u", "timestamp", "a") != fetch_key("u", "timestamp", "b")
+    assert content_hash("x") == content_hash("x") != content_hash("y")
@@ -0,0 +1,100 @@
+import threading
+
+import pytest
+
+import emitter
+from emitter import ChangeEmitter, KeyTable, EVENT, KEYS_EVENT, COMPACT_EVENT
+
+
+class RecordingSio:
+    """
+    socketio stand-in: records emits; with block set, the first emit (the sender's) waits until release().
+    """
+
+    def __init__(self, block=False):
+        self.emits = []
+        self.lock = threading.Lock()
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+        self.block = block
+
+    def emit(self, event, data=None, to=None):
+        if self.block and not self.entered.is_set():
+            self.entered.set()
+            self.gate.wait(5)
+        with self.lock:
+            self.emits.append((event, data, to))
+
+    def release(self):
+        self.gate.set()
+
+    def events(self, name):
+        with self.lock:
+            return [data for event, data, _ in self.emits if event == name]
+
+
+@pytest.fixture
+def table(monkeypatch):
+    t = KeyTable()
+    monkeypatch.setattr(emitter, "key_table", t)
+    return t
+
+
+def row(name, seq, tab="tab1sec", status="ok"):
+    return {"checklist": name, "key_id": f"row-{name}", "tab": tab, "status": status,
+            "last_changed": "2026-10-19 10:00:00", "last_value": "v", "seq": seq}
+
+
+def test_encode_interns_once(table):
+    compact, entry = table.encode(row("A", 5))
+    assert entry == [0, "A", "row-A", "tab1sec"]
+    assert compact[:3] == [5, 0, emitter.WIRE_STATUS_INDEX["ok"]]
+    compact, entry = table.encode(row("A", 6, status="something-new"))
+    assert entry is None
+    assert compact[1:3] == [0, "something-new"]
+    assert table.table("tab1min")["keys"] == []
+    assert table.table()["keys"] == [[0, "A", "row-A", "tab1sec"]]
+
+
+def test_snapshot_encode_announces_new_keys(table):
+    sio = RecordingSio()
+    out = emitter.encode_messages([(EVENT, row("A", 1)), (EVENT, row("B", 2, tab="tab1min")), ("other", {"x": 1})], sio)
+    assert [event for event, _ in out] == [COMPACT_EVENT, COMPACT_EVENT, "other"]
+    # table built after encoding holds every index used by the rows
+    known = {e[0] for e in table.table()["keys"]}
+    assert {m[1] for event, m in out if event == COMPACT_EVENT} <= known
+    announced = sorted(e[0] for keys in sio.events(KEYS_EVENT) for e in keys["keys"])
+    assert announced == [0, 1]
+    assert ("keys", {"keys": [[1, "B", "row-B", "tab1min"]]}, ["c:tab1min", "c:all"]) in sio.emits
+
+
+def test_key_interned_by_snapshot_while_row_is_queued(table):
+    # the sender is stuck on a slow socket while a compact client connects
+    sio = RecordingSio(block=True)
+    em = ChangeEmitter(sio, scope="test", log=emitter.EmitLog(start=0))
+    em.emit("first", row("First", 0))
+    assert sio.entered.wait(5)  # sender holds "first"
+    msg = em.emit("A", row("A", 0))  # waits in Outbound
+
+    snapshot_rows = emitter.encode_messages([(EVENT, msg)], sio)
+    client_table = table.table()
+    idx = snapshot_rows[0][1][1]
+    assert idx in {e[0] for e in client_table["keys"]}
+
+    sio.release()
+    assert emitter.outbound.flush(5)
+    # every index sent in a compact update was announced exactly once
+    announced = [e[0] for keys in sio.events(KEYS_EVENT) for e in keys["keys"]]
+    assert sorted(announced) == sorted(set(announced))
+    assert {u[1] for u in sio.events(COMPACT_EVENT)} <= set(announced)
+
+
+def test_mirror_table_does_not_assign(table):
+    table.assign = False
+    table.adopt([[3, "A", "row-A", "tab1sec"]])
+    sio = RecordingSio()
+    out = emitter.encode_messages([(EVENT, row("A", 1)), (EVENT, row("B", 2))], sio)
+    assert out[0] == (COMPACT_EVENT, [1, 3, 0, out[0][1][3], "v"])
+    assert out[1] == (EVENT, row("B", 2))  # unknown key stays a full update
+    assert sio.emits == []
+    assert table.table()["keys"] == [[3, "A", "row-A", "tab1sec"]]
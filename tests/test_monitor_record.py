@@ -0,0 +1,73 @@
+from monitor_record import MonitorRecord, StaleHistory, format_epoch, records_from_json, to_epoch
+
+T0 = 1_700_000_000
+
+
+def test_probes_within_gap_extend_one_episode():
+    h = StaleHistory(capacity=4)
+    assert h.add(T0, lag=5) == (T0, T0)
+    assert h.add(T0 + 60, lag=65) == (T0, T0 + 60)
+    assert h.add(T0 + 120, lag=10) == (T0, T0 + 120)
+    assert h.runs() == [(T0, T0 + 120, 65, 3)]
+    assert (len(h), h.runs_total, h.last_ts()) == (3, 1, T0 + 120)
+
+
+def test_gap_or_close_opens_a_new_episode():
+    h = StaleHistory(capacity=4)
+    h.add(T0)
+    h.add(T0 + 500, gap=120)  # too far from the previous probe
+    assert h.close(T0 + 510) == (T0 + 500, T0 + 510)
+    assert h.close(T0 + 520) is None  # nothing open
+    h.add(T0 + 530)  # within the gap, but the last episode was closed
+    assert [r[:2] for r in h.runs()] == [(T0, T0), (T0 + 500, T0 + 510), (T0 + 530, T0 + 530)]
+    assert h.open and h.runs_total == 3
+
+
+def test_ring_wraps_around_and_keeps_the_newest_episodes():
+    h = StaleHistory(capacity=3)
+    for n in range(7):
+        h.add(T0 + 1000 * n, lag=n)
+        h.close(T0 + 1000 * n + 10)
+    assert h.size == 3 and h.head == 7 % 3
+    assert h.runs() == [(T0 + 1000 * n, T0 + 1000 * n + 10, n, 1) for n in (4, 5, 6)]
+    assert (len(h), h.runs_total) == (7, 7)  # counters survive eviction
+    h.add(T0 + 7000)
+    h.add(T0 + 7030)  # extends the episode written over the old head
+    assert h.runs()[-1] == (T0 + 7000, T0 + 7030, 0, 2)
+    assert h.episodes()[0] == {"start": T0 + 5000, "end": T0 + 5010, "max_lag": 5, "probes": 1}
+
+
+def test_json_roundtrip_after_wrap_around():
+    h = StaleHistory(capacity=3)
+    for n in range(5):
+        h.add(T0 + 1000 * n, lag=n)
+    back = StaleHistory.from_json(h.to_json(), capacity=3)
+    assert back.runs() == h.runs()
+    assert (back.open, back.total, back.runs_total) == (True, 5, 5)
+    back.add(T0 + 4050)  # still open: extends the newest episode
+    assert back.runs()[-1] == (T0 + 4000, T0 + 4050, 4, 2)
+
+
+def test_from_json_reads_legacy_formats():
+    legacy = StaleHistory.from_json([format_epoch(T0), format_epoch(T0 + 30), "garbage", None])
+    assert legacy.runs() == [(T0, T0 + 30, 0, 2)]
+    three = StaleHistory.from_json({"runs": [[T0, T0 + 5, 2], ["x"]], "open": False})
+    assert three.runs() == [(T0, T0 + 5, 0, 2)] and not three.open
+    assert StaleHistory.from_json("nonsense").runs() == []
+
+
+def test_monitor_record_roundtrip_and_legacy_timestamps():
+    rec = MonitorRecord()
+    rec.mark_changed("v1", "h1", now=T0)
+    rec.add_stale(now=T0 + 60, lag=60)
+    rec.end_stale(now=T0 + 70)
+    back = MonitorRecord.from_json(rec.to_json())
+    assert (back.last_value, back.value_hash, back.last_changed) == ("v1", "h1", T0)
+    assert back.stale_history.runs() == [(T0 + 60, T0 + 70, 60, 1)]
+
+    old = MonitorRecord.from_json({"last_changed": format_epoch(T0), "stale_times": [format_epoch(T0 + 5)]})
+    assert old.last_changed == T0 and len(old.stale_history) == 1
+    assert to_epoch("bad") == 0 and to_epoch(None) == 0
+
+    records = records_from_json({"a": rec.to_json()}, ["a", "b"])
+    assert records["a"].value_hash == "h1" and records["b"].status == "not-started"
@@ -0,0 +1,147 @@
+import threading
+
+import emitter
+from emitter import Outbound
+
+
+class StubEmitter:
+    """
+    Outbound's view of a ChangeEmitter: _send records; the first one can be held back.
+    """
+
+    def __init__(self, hold=False):
+        self.sent = []
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+        if not hold:
+            self.gate.set()
+
+    def _send(self, msg):
+        self.entered.set()
+        self.gate.wait(5)
+        self.sent.append(msg)
+
+
+def test_sends_in_order():
+    q = Outbound()
+    em = StubEmitter()
+    for i in range(5):
+        assert q.put(em, f"k{i}", {"seq": i})
+    assert q.flush(5)
+    assert [m["seq"] for m in em.sent] == [0, 1, 2, 3, 4]
+    assert (q.sent, q.coalesced, q.dropped) == (5, 0, 0)
+
+
+def test_coalesces_per_row_and_orders_by_newest_seq():
+    q = Outbound()
+    em = StubEmitter(hold=True)
+    q.put(em, "busy", {"seq": 0})
+    assert em.entered.wait(5)  # sender is stuck on "busy"
+    q.put(em, "a", {"seq": 1})
+    q.put(em, "b", {"seq": 2})
+    q.put(em, "a", {"seq": 3})  # replaces seq 1 and moves "a" behind "b"
+    assert q.depth() == 2
+    em.gate.set()
+    assert q.flush(5)
+    assert [m["seq"] for m in em.sent] == [0, 2, 3]
+    assert q.coalesced == 1
+    assert em.sent[2][emitter.COALESCED_FIELD] == [1]  # tells a mirror seq 1 will not arrive
+    assert emitter.COALESCED_FIELD not in em.sent[1]
+
+
+def test_coalesced_seqs_accumulate_without_touching_the_logged_message():
+    q = Outbound()
+    em = StubEmitter(hold=True)
+    q.put(em, "busy", {"seq": 0})
+    assert em.entered.wait(5)
+    logged = [{"seq": i} for i in (1, 2, 3)]
+    for msg in logged:
+        q.put(em, "a", msg)
+    em.gate.set()
+    assert q.flush(5)
+    assert em.sent[-1] == {"seq": 3, emitter.COALESCED_FIELD: [1, 2]}
+    assert logged[-1] == {"seq": 3}
+
+
+def test_rows_of_different_emitters_do_not_coalesce():
+    q = Outbound()
+    hold = StubEmitter(hold=True)
+    q.put(hold, "busy", {"seq": 0})
+    assert hold.entered.wait(5)
+    e1, e2 = StubEmitter(), StubEmitter()
+    q.put(e1, "a", {"seq": 1})
+    q.put(e2, "a", {"seq": 2})
+    assert q.depth() == 2
+    hold.gate.set()
+    assert q.flush(5)
+    assert [m["seq"] for m in e1.sent] == [1] and [m["seq"] for m in e2.sent] == [2]
+
+
+def test_full_queue_drops_new_rows_but_still_coalesces():
+    q = Outbound(size=2)
+    em = StubEmitter(hold=True)
+    q.put(em, "busy", {"seq": 0})
+    assert em.entered.wait(5)
+    assert q.put(em, "a", {"seq": 1})
+    assert q.put(em, "b", {"seq": 2})
+    assert not q.put(em, "c", {"seq": 3})
+    assert q.put(em, "a", {"seq": 4})  # an already queued row is replaced, not dropped
+    assert (q.dropped, q.max_depth) == (1, 2)
+    em.gate.set()
+    assert q.flush(5)
+    assert [m["seq"] for m in em.sent] == [0, 2, 4]
+
+
+def test_send_errors_are_counted():
+    class Failing:
+        def _send(self, msg):
+            raise RuntimeError("socket gone")
+
+    q = Outbound()
+    em = StubEmitter()
+    q.put(Failing(), "a", {"seq": 1})
+    q.put(em, "b", {"seq": 2})
+    assert q.flush(5)
+    assert q.errors == 1 and [m["seq"] for m in em.sent] == [2]
+    assert "emit_errors_total 1" in q.render_prometheus()
+
+
+def test_change_emitter_queues_only_changes(monkeypatch):
+    q = Outbound()
+    monkeypatch.setattr(emitter, "outbound", q)
+    sent = []
+
+    class Sio:
+        def emit(self, event, data=None, to=None):
+            sent.append((event, data, to))
+
+    em = emitter.ChangeEmitter(Sio(), scope="test", log=emitter.EmitLog(start=0))
+    assert em.emit("a", {"status": "ok"}) == {"status": "ok", "seq": 1}
+    assert q.flush(5)
+    assert em.emit("a", {"status": "ok"}) is None
+    assert em.emit("a", {"status": "stale"})["seq"] == 2
+    assert q.flush(5)
+    assert [data["seq"] for event, data, _ in sent if event == emitter.EVENT] == [1, 2]
+
+
+def test_alerts_are_queued_to_the_scraper_tab(monkeypatch):
+    q = Outbound()
+    monkeypatch.setattr(emitter, "outbound", q)
+    sent = []
+
+    class Sio:
+        def emit(self, event, data=None, to=None):
+            sent.append((event, data, to))
+
+    class Metrics:
+        def on_alert(self, fn):
+            self.fire = fn
+
+    metrics = Metrics()
+    em = emitter.forward_alerts(Sio(), metrics)
+    em.log = emitter.EmitLog(start=0)
+    metrics.fire({"scraper": "1min", "key": "Gainers", "state": "late", "lateness": 9.0})
+    assert q.flush(5)
+    (event, data, to), = sent
+    assert event == emitter.ALERT_EVENT and data["seq"] == 1 and data["tab"] == "tab1min"
+    assert to == ["tab1min", "all", "c:tab1min", "c:all"]
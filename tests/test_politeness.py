@@ -0,0 +1,118 @@
+import threading
+
+import pytest
+
+from politeness import HostLimiter, Politeness, DEFAULT_LIMITS, phase_offset, spread_offset
+
+
+class FakeClock:
+    """
+    clock() / sleep() pair for HostLimiter: sleeping only moves the clock.
+    """
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def limiter(clock, rate=1.0, burst=3, max_concurrent=0, spacing=0.0):
+    return HostLimiter(rate, burst, max_concurrent, spacing, clock=clock, sleep=clock.sleep)
+
+
+def take(lim, n=1):
+    waited = []
+    for _ in range(n):
+        waited.append(lim.acquire())
+        lim.release()
+    return waited
+
+
+def test_burst_then_one_token_per_interval():
+    clock = FakeClock()
+    lim = limiter(clock, rate=2.0, burst=3)
+    assert take(lim, 3) == [0.0, 0.0, 0.0]
+    assert take(lim, 2) == [pytest.approx(0.5), pytest.approx(0.5)]
+    assert lim.requests == 5 and lim.in_flight == 0
+
+
+def test_tokens_refill_up_to_burst():
+    clock = FakeClock()
+    lim = limiter(clock, rate=1.0, burst=3)
+    take(lim, 3)
+    clock.now += 1.5  # 1.5 tokens back
+    assert take(lim, 2) == [0.0, pytest.approx(0.5)]
+    clock.now += 60  # refill stops at burst
+    assert take(lim, 4) == [0.0, 0.0, 0.0, pytest.approx(1.0)]
+
+
+def test_spacing_between_starts():
+    clock = FakeClock()
+    lim = limiter(clock, rate=1000.0, burst=100, spacing=0.25)
+    assert take(lim, 3) == [0.0, pytest.approx(0.25), pytest.approx(0.25)]
+
+
+def test_reservations_queue_behind_each_other():
+    # acquires that all arrive at once get consecutive start times, without double-booking a token
+    clock = FakeClock()
+    lim = limiter(clock, rate=4.0, burst=1)
+    starts = []
+    for _ in range(3):
+        lim.acquire()
+        starts.append(clock.now)
+    assert starts == [1000.0, pytest.approx(1000.25), pytest.approx(1000.5)]
+    assert lim.in_flight == 3  # no cap by default
+
+
+def test_concurrency_cap_blocks_until_release():
+    clock = FakeClock()
+    lim = limiter(clock, rate=1000.0, burst=100, max_concurrent=1)
+    lim.acquire()
+    entered = threading.Event()
+
+    def second():
+        lim.acquire()
+        entered.set()
+
+    t = threading.Thread(target=second, daemon=True)
+    t.start()
+    assert not entered.wait(0.2)
+    lim.release()
+    assert entered.wait(5)
+    t.join(5)
+    assert lim.in_flight == 1
+
+
+def test_raising_the_cap_wakes_waiters():
+    clock = FakeClock()
+    lim = limiter(clock, rate=1000.0, burst=100, max_concurrent=1)
+    lim.acquire()
+    entered = threading.Event()
+    threading.Thread(target=lambda: (lim.acquire(), entered.set()), daemon=True).start()
+    assert not entered.wait(0.1)
+    lim.configure(1000.0, 100, 0, 0.0)  # cap removed
+    assert entered.wait(5)
+
+
+def test_politeness_per_host_limits_and_defaults():
+    assert DEFAULT_LIMITS["max_concurrent"] == 0
+    p = Politeness()
+    p.configure(defaults={"rate": 5}, hosts={"Example.com": {"burst": 2, "bogus": 1}})
+    a, b = p.limiter("https://example.com/x"), p.limiter("https://example.com/y")
+    assert a is b and (a.rate, a.burst, a.max_concurrent) == (5.0, 2.0, 0)
+    assert p.limiter("https://other.org/").burst == DEFAULT_LIMITS["burst"]
+    with p.slot("https://other.org/") as waited:
+        assert waited >= 0 and p.limiter("https://other.org/").in_flight == 1
+    assert p.limiter("https://other.org/").in_flight == 0
+
+
+def test_offsets():
+    assert 0 <= phase_offset("k", 10) < 10 and phase_offset("k", 10) == phase_offset("k", 10)
+    assert [spread_offset(i, 4, 60) for i in range(4)] == [0, 15, 30, 45]
+    assert spread_offset(0, 0, 60) == 0.0
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+import probe_store
+from probe_store import ProbeStore
+
+T0 = 1_699_999_200  # multiple of the rollup bucket and of 3600
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = ProbeStore(path=str(tmp_path / "probes.sqlite3"), flush_interval=0.05).start()
+    yield s
+    s.stop()
+
+
+def test_record_before_start_is_dropped(tmp_path):
+    s = ProbeStore(path=str(tmp_path / "p.sqlite3"))
+    s.record("a", "ok")
+    assert s.flush(1) and s.written == 0
+
+
+def test_record_and_query(store):
+    store.record("a", "ok", 0.1, "h1", ts=T0 + 1)
+    store.record("b", "error", 0.2, None, ts=T0 + 2)
+    store.record("a", "stale", 0.3, "h1", ts=T0 + 3)
+    assert store.flush(5)
+    assert store.written == 3
+    assert store.query("a", T0, T0 + 10) == [(T0 + 1, "ok", 0.1, "h1"), (T0 + 3, "stale", 0.3, "h1")]
+    assert [r[0] for r in store.query_range(T0, T0 + 10)] == ["a", "b", "a"]
+    assert store.query_range(T0 + 3, T0 + 10) == [("a", T0 + 3, "stale", 0.3, "h1")]
+    assert sorted(store.keys()) == ["a", "b"]
+    assert store.oldest_ts() == T0 + 1
+
+
+def test_iter_range_streams_in_chunks(store):
+    for i in range(25):
+        store.record("a", "ok", ts=T0 + i)
+    assert store.flush(5)
+    rows = store.iter_range(T0 + 5, T0 + 100, chunk=10)
+    assert next(rows)[1] == T0 + 5
+    assert [r[1] for r in rows] == [T0 + i for i in range(6, 25)]
+
+
+def test_downsample_keeps_trend(store, monkeypatch):
+    for i in range(4):
+        store.record("a", ("ok", "ok", "stale", "error")[i], 0.5 * (i + 1), None, ts=T0 + 10 * i)
+    store.record("a", "ok", 1.0, None, ts=T0 + 3600 + 5)  # recent, stays raw
+    assert store.flush(5)
+    before = store.trend("a", T0, T0 + 7200)
+
+    monkeypatch.setattr(probe_store, "RAW_RETENTION_DAYS", 0)
+    monkeypatch.setattr(probe_store, "ROLLUP_RETENTION_DAYS", 10 ** 5)
+    store.maintenance(now=T0 + 3600)
+
+    assert store.query("a", T0, T0 + 3600) == []  # folded into the rollup
+    assert len(store.query("a", T0 + 3600, T0 + 7200)) == 1
+    after = store.trend("a", T0, T0 + 7200)
+    assert after == before
+    tb, n, ok, stale, failed, mean_lat, max_lat = after[0]
+    assert (tb, n, ok, stale, failed, max_lat) == (T0, 4, 2, 1, 1, 2.0)
+    assert mean_lat == pytest.approx(1.25)
+
+
+def test_full_queue_drops_and_counts(tmp_path):
+    s = ProbeStore(path=str(tmp_path / "p.sqlite3"), queue_size=2)
+    s._thread = threading.Thread(target=lambda: None)  # started, but the writer never drains
+    for i in range(5):
+        s.record("a", "ok", ts=T0 + i)
+    assert s._queue.qsize() == 2 and s.dropped == 3 and s._pending == 2
+    assert "probe_store_dropped_total 3" in s.render_prometheus()
+
+
+def test_crashed_writer_is_restarted(store, monkeypatch):
+    monkeypatch.setattr(probe_store, "RESTART_DELAY", 0.01)
+    real_connect = probe_store.connect
+    calls = []
+
+    def flaky_connect(path):
+        calls.append(path)
+        if len(calls) == 2:  # the writer's connection (the first one creates the schema)
+            raise OSError("disk gone")
+        return real_connect(path)
+
+    store.stop()
+    monkeypatch.setattr(probe_store, "connect", flaky_connect)
+    store.start()
+    store.record("a", "ok", ts=T0)
+    assert store.flush(5) and store.written == 1
+    assert store.restarts == 1 and store.healthy()
+    assert "probe_store_writer_restarts_total 1" in store.render_prometheus()
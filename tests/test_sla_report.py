@@ -0,0 +1,40 @@
+import numpy as np
+
+import sla_report
+from daily_archive import ArchiveReader, write_archive, STATUS_INDEX, STATUS_OTHER
+from probe_store import ProbeStore
+
+T0 = 1_700_000_000
+
+ROWS = [
+    ("A", T0 + 1, "ok", 0.1, "h1"),
+    ("B", T0 + 2, "error", None, None),
+    ("A", T0 + 3, "error", 0.1, None),  # no hash: not a change, and h1 stays the last hash
+    ("A", T0 + 4, "ok", 0.3, "h1"),
+    ("A", T0 + 5, "stale", 0.3, "h2"),
+    ("B", T0 + 6, "weird", 0.4, "x"),
+    ("B", T0 + 7, "ok", 0.4, "x"),
+]
+
+
+def test_store_rows_match_the_archive(tmp_path):
+    store = ProbeStore(path=str(tmp_path / "p.sqlite3"), flush_interval=0.05).start()
+    try:
+        for key, ts, status, latency, value_hash in ROWS:
+            store.record(key, status, latency, value_hash, ts=ts)
+        assert store.flush(5)
+        key_table = {}
+        ts, key, status, changed, latency = sla_report._from_store(store, T0, T0 + 10, key_table)
+    finally:
+        store.stop()
+
+    names = {i: k for k, i in key_table.items()}
+    assert [names[k] for k in key] == [r[0] for r in ROWS]
+    assert list(ts) == [r[1] for r in ROWS]
+    assert list(status) == [STATUS_INDEX.get(r[2], STATUS_OTHER) for r in ROWS]
+    assert np.allclose(latency, [r[3] or 0.0 for r in ROWS])
+
+    path = str(tmp_path / "day.bin")
+    write_archive(path, T0, ROWS)
+    with ArchiveReader(path) as r:
+        assert list(changed) == [c for *_, c in r.range()] == [True, False, False, False, True, True, False]